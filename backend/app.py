@@ -1,158 +1,305 @@
 #!/usr/bin/env python3
+import gc
+import json
 import os
-import pickle
+import queue
+import re
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime
 from pathlib import Path
-import joblib
 import numpy as np
-import pandas as pd
-import requests
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, send_file, stream_with_context
 from flask_cors import CORS
 
+# pandas, joblib, requests and scikit-learn are imported where they are first
+# needed so that starting the server (and the catalog endpoints) stays fast;
+# `python backend/startup_profile.py` reports and enforces the import budget.
+from artifacts import BACKEND_DIR, CROP_MODEL_PATH, MODELS_DIR, compute_model_version
+from catalog import (
+    CROP_INFO, CROP_LABELS, DEFAULT_CROP_DETAILS, FEATURE_COLUMNS, INDIAN_STATES, REQUIRED_FIELDS, SOIL_INFO, SOIL_TYPES,
+    crop_name_for_class, encode_soil_type
+)
+from crop_calendar import MONTH_NAMES, CropCalendar, load_climate_normals
+from drift import DriftMonitor
+from fallback import SuitabilityScorer
+from fertilizer import NUTRIENTS, NutrientPlanner
+from lookup_grid import LookupGrid
+from memory_diagnostics import GROUP_BY, AllocationTracker, estimate_object_bytes, process_memory
+from model_registry import DEFAULT_MODEL_ID, LoadedModel, ModelRegistry
+from prediction_cache import SharedPredictionCache
+from prediction_log import PredictionLogger
+from profiling import ADMIN_TOKEN_HEADER, RequestProfiler, admin_token_valid
+from ranking import ClassConstraints
+from sensors import DEFAULT_THRESHOLDS, SensorHub
+from shadow import ShadowEvaluator
+from single_flight import SingleFlight
+from soil_index import EARTH_RADIUS_KM, SoilSampleIndex
+from soil_store import STATISTICS, SoilProfileStore
+from weather import DEFAULT_WEATHER, OpenWeatherProvider, StaticWeatherProvider, WeatherCache
+
 # Initialize Flask app
 app = Flask(__name__)
 FRONTEND_ORIGIN = os.getenv('FRONTEND_ORIGIN', 'http://localhost:8080')
-CORS(app, origins=[FRONTEND_ORIGIN]) 
+CORS(app, origins=[FRONTEND_ORIGIN], expose_headers=['Server-Timing'])
 
 # --- Globals ---
 model_loaded = False
 crop_model = None
 label_encoder = None
 scaler = None  # Add scaler for feature scaling
+model_version = None  # Identifies the loaded artifact; changes on every reload of a new file
+crop_calendar = None
+class_constraints = None  # Per-class CROP_INFO masks for constraint-aware ranking
 
-# --- Model & Data Paths ---
-# Models are in the Models directory
-BACKEND_DIR = Path(__file__).parent
-MODELS_DIR = BACKEND_DIR.parent / 'Models'
-CROP_MODEL_PATH = MODELS_DIR / 'crop_model.pkl'
-
-# Debug: Print the paths to verify they exist
-print(f"BACKEND_DIR: {BACKEND_DIR}")
-print(f"MODELS_DIR: {MODELS_DIR}")
-print(f"CROP_MODEL_PATH: {CROP_MODEL_PATH}")
-print(f"CROP_MODEL_PATH exists: {CROP_MODEL_PATH.exists()}")
-
-# --- Crop & Soil Information ---
-CROP_INFO = {
-    'rice': {'season': 'Kharif', 'duration': '120-150 days', 'water_requirement': 'High', 'soil_preference': 'Clay, Loam', 'nutrient_req': 'N: 80-120, P: 40-60, K: 40-60 kg/ha', 'market_value': 'Medium', 'yield_potential': '4-6 tons/ha', 'fertilizers': 'Urea, DAP, MOP', 'pests_diseases': 'Stem borer, Brown planthopper, Blast'},
-    'maize': {'season': 'Kharif/Rabi', 'duration': '90-120 days', 'water_requirement': 'Medium', 'soil_preference': 'Loam, Sandy Loam', 'nutrient_req': 'N: 120-150, P: 60-80, K: 40-60 kg/ha', 'market_value': 'Medium', 'yield_potential': '5-8 tons/ha', 'fertilizers': 'Urea, DAP, MOP', 'pests_diseases': 'Fall armyworm, Stem borer, Rust'},
-    'jute': {'season': 'Kharif', 'duration': '120-150 days', 'water_requirement': 'High', 'soil_preference': 'Alluvial, Loam', 'nutrient_req': 'N: 40-60, P: 20-30, K: 20-30 kg/ha', 'market_value': 'Medium', 'yield_potential': '2-3 tons/ha (fiber)', 'fertilizers': 'Urea, SSP', 'pests_diseases': 'Jute semilooper, Yellow mite'},
-    'cotton': {'season': 'Kharif', 'duration': '150-180 days', 'water_requirement': 'Medium-High', 'soil_preference': 'Black soil, Alluvial', 'nutrient_req': 'N: 120-180, P: 60-90, K: 60-90 kg/ha', 'market_value': 'High', 'yield_potential': '2-4 tons/ha', 'fertilizers': 'Urea, DAP, MOP', 'pests_diseases': 'Bollworm, Whitefly, Leaf curl virus'},
-    'coconut': {'season': 'Perennial', 'duration': '7-10 years to mature', 'water_requirement': 'High', 'soil_preference': 'Sandy Loam, Laterite', 'nutrient_req': 'N: 500g, P: 320g, K: 1200g per palm/year', 'market_value': 'High', 'yield_potential': '80-150 nuts/palm/year', 'fertilizers': 'Organic manure, NPK complex', 'pests_diseases': 'Rhinoceros beetle, Red palm weevil, Bud rot'},
-    'papaya': {'season': 'Perennial', 'duration': '9-12 months to first harvest', 'water_requirement': 'Medium', 'soil_preference': 'Loam, Sandy Loam', 'nutrient_req': 'N: 200-300g, P: 200-300g, K: 400-500g per plant/year', 'market_value': 'High', 'yield_potential': '40-60 tons/ha', 'fertilizers': 'NPK complex, FYM', 'pests_diseases': 'Papaya ring spot virus, Mealybug'},
-    'orange': {'season': 'Perennial', 'duration': '3-4 years to first harvest', 'water_requirement': 'Medium', 'soil_preference': 'Loam, Sandy Loam', 'nutrient_req': 'N: 400-800g, P: 200-400g, K: 400-800g per tree/year', 'market_value': 'High', 'yield_potential': '20-40 tons/ha', 'fertilizers': 'NPK complex, Zinc sulfate', 'pests_diseases': 'Citrus canker, Citrus tristeza virus'},
-    'apple': {'season': 'Rabi (temperate)', 'duration': '4-8 years to mature', 'water_requirement': 'Medium', 'soil_preference': 'Loam', 'nutrient_req': 'N: 70g, P: 35g, K: 70g per year of tree age', 'market_value': 'Very High', 'yield_potential': '10-20 tons/ha', 'fertilizers': 'CAN, MOP, SSP', 'pests_diseases': 'Apple scab, Codling moth'},
-    'muskmelon': {'season': 'Summer', 'duration': '80-100 days', 'water_requirement': 'Medium', 'soil_preference': 'Sandy Loam', 'nutrient_req': 'N: 80-100, P: 40-50, K: 40-50 kg/ha', 'market_value': 'High', 'yield_potential': '15-20 tons/ha', 'fertilizers': 'Urea, DAP, MOP', 'pests_diseases': 'Powdery mildew, Fruit fly'},
-    'watermelon': {'season': 'Summer', 'duration': '80-100 days', 'water_requirement': 'High', 'soil_preference': 'Sandy, Sandy Loam', 'nutrient_req': 'N: 100-120, P: 50-60, K: 50-60 kg/ha', 'market_value': 'Medium', 'yield_potential': '20-30 tons/ha', 'fertilizers': 'Urea, DAP, MOP', 'pests_diseases': 'Anthracnose, Downy mildew'},
-    'grapes': {'season': 'Perennial', 'duration': '2-3 years to first harvest', 'water_requirement': 'Medium', 'soil_preference': 'Sandy Loam, Loam', 'nutrient_req': 'N: 60-90, P: 30-60, K: 90-120 kg/ha', 'market_value': 'Very High', 'yield_potential': '15-30 tons/ha', 'fertilizers': 'NPK complex, FYM', 'pests_diseases': 'Powdery mildew, Downy mildew, Flea beetle'},
-    'mango': {'season': 'Perennial', 'duration': '4-6 years to first harvest', 'water_requirement': 'Medium', 'soil_preference': 'Alluvial, Loam', 'nutrient_req': 'N: 100g, P: 50g, K: 100g per year of tree age', 'market_value': 'High', 'yield_potential': '8-15 tons/ha', 'fertilizers': 'FYM, NPK complex', 'pests_diseases': 'Mango hopper, Powdery mildew, Anthracnose'},
-    'banana': {'season': 'Perennial', 'duration': '9-12 months', 'water_requirement': 'High', 'soil_preference': 'Loam, Clay Loam', 'nutrient_req': 'N: 200-300g, P: 60-90g, K: 300-450g per plant', 'market_value': 'Medium', 'yield_potential': '40-60 tons/ha', 'fertilizers': 'Urea, MOP, SSP', 'pests_diseases': 'Panama wilt, Bunchy top virus, Sigatoka leaf spot'},
-    'pomegranate': {'season': 'Perennial', 'duration': '2-3 years to first harvest', 'water_requirement': 'Low-Medium', 'soil_preference': 'Sandy Loam, Loam', 'nutrient_req': 'N: 250g, P: 125g, K: 125g per plant/year', 'market_value': 'Very High', 'yield_potential': '8-12 tons/ha', 'fertilizers': 'FYM, NPK complex', 'pests_diseases': 'Bacterial blight, Fruit borer'},
-    'lentil': {'season': 'Rabi', 'duration': '100-120 days', 'water_requirement': 'Low', 'soil_preference': 'Loam, Clay Loam', 'nutrient_req': 'N: 20, P: 40-60, K: 20 kg/ha', 'market_value': 'Medium', 'yield_potential': '1-1.5 tons/ha', 'fertilizers': 'DAP, Rhizobium culture', 'pests_diseases': 'Wilt, Rust, Pod borer'},
-    'blackgram': {'season': 'Kharif/Summer', 'duration': '80-100 days', 'water_requirement': 'Low', 'soil_preference': 'Loam, Clay Loam', 'nutrient_req': 'N: 20, P: 40, K: 20 kg/ha', 'market_value': 'Medium', 'yield_potential': '1-1.2 tons/ha', 'fertilizers': 'DAP, Rhizobium culture', 'pests_diseases': 'Yellow mosaic virus, Pod borer'},
-    'mungbean': {'season': 'Kharif/Summer', 'duration': '70-90 days', 'water_requirement': 'Low', 'soil_preference': 'Sandy Loam, Loam', 'nutrient_req': 'N: 20, P: 40, K: 20 kg/ha', 'market_value': 'Medium', 'yield_potential': '1-1.5 tons/ha', 'fertilizers': 'DAP, Rhizobium culture', 'pests_diseases': 'Yellow mosaic virus, Powdery mildew'},
-    'mothbeans': {'season': 'Kharif', 'duration': '70-90 days', 'water_requirement': 'Very Low', 'soil_preference': 'Sandy, Sandy Loam', 'nutrient_req': 'N: 10-15, P: 20-30 kg/ha', 'market_value': 'Low', 'yield_potential': '0.5-1 tons/ha', 'fertilizers': 'DAP', 'pests_diseases': 'Yellow mosaic virus'},
-    'pigeonpeas': {'season': 'Kharif', 'duration': '150-180 days', 'water_requirement': 'Low', 'soil_preference': 'Loam, Sandy Loam', 'nutrient_req': 'N: 20, P: 40-60, K: 20 kg/ha', 'market_value': 'Medium', 'yield_potential': '1.5-2 tons/ha', 'fertilizers': 'DAP, Rhizobium culture', 'pests_diseases': 'Wilt, Pod borer, Sterility mosaic'},
-    'kidneybeans': {'season': 'Rabi/Kharif', 'duration': '90-120 days', 'water_requirement': 'Medium', 'soil_preference': 'Loam', 'nutrient_req': 'N: 80-120, P: 60-80, K: 40-50 kg/ha', 'market_value': 'High', 'yield_potential': '1.5-2.5 tons/ha', 'fertilizers': 'Urea, DAP, MOP', 'pests_diseases': 'Bean rust, Anthracnose, Aphids'},
-    'chickpea': {'season': 'Rabi', 'duration': '100-120 days', 'water_requirement': 'Low', 'soil_preference': 'Sandy Loam, Loam', 'nutrient_req': 'N: 20, P: 40-60, K: 20 kg/ha', 'market_value': 'Medium', 'yield_potential': '1.5-2.5 tons/ha', 'fertilizers': 'DAP, Rhizobium culture', 'pests_diseases': 'Wilt, Pod borer'},
-    'coffee': {'season': 'Perennial (Kharif flowering)', 'duration': '3-4 years to mature', 'water_requirement': 'Medium-High', 'soil_preference': 'Loam, Clay Loam (well-drained)', 'nutrient_req': 'N: 90-120, P: 60-90, K: 90-120 kg/ha', 'market_value': 'Very High', 'yield_potential': '0.8-1.5 tons/ha (beans)', 'fertilizers': 'NPK complex, FYM', 'pests_diseases': 'Coffee berry borer, White stem borer, Leaf rust'}
-}
+# --- Model Registry ---
+# Optional region-specific models routed by explicit id, region or state (see
+# model_registry.py for the file format). They load on first use and the least
+# recently used are evicted to stay within MODEL_MEMORY_BUDGET_MB; everything
+# else is served by the default model above.
+MODEL_REGISTRY_PATH = Path(os.getenv('MODEL_REGISTRY_PATH', str(MODELS_DIR / 'model_registry.json')))
+MODEL_MEMORY_BUDGET_MB = float(os.getenv('MODEL_MEMORY_BUDGET_MB', '512'))
+try:
+    model_registry = ModelRegistry.from_file(MODEL_REGISTRY_PATH, int(MODEL_MEMORY_BUDGET_MB * 1024 * 1024)) \
+        if MODEL_REGISTRY_PATH.exists() else ModelRegistry(budget_bytes=int(MODEL_MEMORY_BUDGET_MB * 1024 * 1024))
+except Exception as e:
+    print(f"Warning: Could not load model registry {MODEL_REGISTRY_PATH}: {e}")
+    model_registry = ModelRegistry(budget_bytes=int(MODEL_MEMORY_BUDGET_MB * 1024 * 1024))
 
-# --- Crop Label Mapping ---
-# This maps the numeric labels from the trained model to actual crop names
-# The order should match how the crops were encoded during training
-CROP_LABELS = [
-    'rice', 'maize', 'jute', 'cotton', 'coconut', 'papaya', 'orange', 'apple',
-    'muskmelon', 'watermelon', 'grapes', 'mango', 'banana', 'pomegranate',
-    'lentil', 'blackgram', 'mungbean', 'mothbeans', 'pigeonpeas', 'kidneybeans',
-    'chickpea', 'coffee'
-]
+# --- Request Deadlines ---
+# Clients may send a relative budget (milliseconds) via header or query parameter;
+# otherwise the server default applies. Requests that outlive their deadline are
+# abandoned at the next pipeline stage instead of being scored and serialized.
+DEADLINE_HEADER = 'X-Request-Timeout-Ms'
+DEADLINE_QUERY_PARAM = 'timeout_ms'
+DEFAULT_DEADLINE_MS = int(os.getenv('REQUEST_DEADLINE_MS', '10000'))
+MAX_DEADLINE_MS = int(os.getenv('MAX_REQUEST_DEADLINE_MS', '60000'))
+# Scoring endpoints reject an invalid budget; every other route ignores it
+DEADLINE_ENDPOINTS = ('predict_crop', 'get_regional_recommendation', 'get_advisory',
+                      'get_location_recommendation', 'ingest_sensor_readings')
 
-SOIL_TYPES = [
-    'Sandy', 'Loam', 'Black', 'Clay', 'Red', 'Silt', 'Chalky', 'Peaty', 'Gravel', 'Laterite', 'Alluvial', 'Coastal'
+# --- Request Profiling ---
+# Requests are profiled with cProfile only when they send `X-Profile: 1` with the
+# admin token, or are sampled at PROFILE_SAMPLE_RATE on the listed path prefixes.
+# Profiles go to a ring of pstats files listed under /admin/profiles.
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+PROFILE_DIR = Path(os.getenv('PROFILE_DIR', str(BACKEND_DIR.parent / 'profiles')))
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_PATH_PREFIXES = [
+    prefix for prefix in os.getenv('PROFILE_PATH_PREFIXES', '/predict,/regional-recommendation,/location-recommendation').split(',')
+    if prefix
 ]
+PROFILE_KEEP_FILES = int(os.getenv('PROFILE_KEEP_FILES', '50'))
+request_profiler = RequestProfiler(app.wsgi_app, PROFILE_DIR, ADMIN_TOKEN, PROFILE_SAMPLE_RATE,
+                                   PROFILE_PATH_PREFIXES, PROFILE_KEEP_FILES)
+app.wsgi_app = request_profiler
 
-SOIL_INFO = {
-    'Sandy': {'description': 'Light, warm, dry and tend to be acidic and low in nutrients.', 'characteristics': 'Large particles, gritty feel, good drainage, poor water retention.', 'suitable_crops': 'Root vegetables like carrots, potatoes, drought-tolerant crops like watermelon, mothbeans.'},
-    'Loam': {'description': 'A mixture of sand, silt, and clay that are combined to avoid the negative effects of each type.', 'characteristics': 'Fertile, easy to work with, good drainage, good water retention.', 'suitable_crops': 'Most crops, including maize, wheat, cotton, pulses, and vegetables.'},
-    'Black': {'description': 'Also known as regur soil, it is rich in humus and nutrients.', 'characteristics': 'High clay content, high moisture retention, becomes sticky when wet and cracks when dry.', 'suitable_crops': 'Cotton, sugarcane, soybean, wheat, and millets.'},
-    'Clay': {'description': 'Heavy soil that is high in nutrients but has poor drainage.', 'characteristics': 'Small particles, feels sticky, poor drainage, high water retention.', 'suitable_crops': 'Rice, jute, and crops that can tolerate waterlogging.'},
-    'Red': {'description': 'Formed by weathering of ancient crystalline and metamorphic rocks.', 'characteristics': 'Reddish color due to iron oxide, good drainage, often low in nutrients.', 'suitable_crops': 'Groundnut, millets, pulses, and tobacco.'},
-    'Silt': {'description': 'Composed of fine sand, clay, or other material carried by running water and deposited as a sediment.', 'characteristics': 'Smooth feel, good water retention, fertile.', 'suitable_crops': 'Wheat, rice, sugarcane, and jute.'},
-    'Chalky': {'description': 'Alkaline soil that is usually light and stony.', 'characteristics': 'Often overlays chalk or limestone, free-draining, can be low in nutrients.', 'suitable_crops': 'Cereals like barley, some vegetables like cabbage and spinach.'},
-    'Peaty': {'description': 'High in organic matter and moisture.', 'characteristics': 'Dark, rich, acidic, excellent water retention.', 'suitable_crops': 'Root crops, salad crops, and brassicas.'},
-    'Gravel': {'description': 'Composed of small rock fragments, very poor for agriculture.', 'characteristics': 'Extremely free-draining, low in nutrients, stony.', 'suitable_crops': 'Not suitable for most crops without significant amendment.'},
-    'Laterite': {'description': 'A soil and rock type rich in iron and aluminium, common in wet tropical regions.', 'characteristics': 'Porous, well-drained, often acidic and low in nutrients.', 'suitable_crops': 'Cashew, coconut, coffee, and tea.'},
-    'Alluvial': {'description': 'Deposited by rivers, very fertile and rich in humus.', 'characteristics': 'Varies in texture (sandy, silty, clayey), rich in nutrients.', 'suitable_crops': 'Rice, wheat, sugarcane, jute, and cotton.'},
-    'Coastal': {'description': 'Found in coastal regions, often sandy and saline.', 'characteristics': 'High sand content, good drainage, can have high salt content.', 'suitable_crops': 'Coconut, cashew, and other salt-tolerant crops.'}
-}
+# --- Memory Diagnostics ---
+# /admin/memory reports RSS, estimated model and cache sizes; a tracemalloc
+# session can be started there to snapshot and diff allocation sites. Tracing
+# slows the server, so it stays off until an admin starts it.
+MEMORY_SNAPSHOT_KEEP = int(os.getenv('MEMORY_SNAPSHOT_KEEP', '10'))
+MEMORY_TRACE_MAX_FRAMES = int(os.getenv('MEMORY_TRACE_MAX_FRAMES', '25'))
+MEMORY_SNAPSHOT_LABEL_PATTERN = re.compile(r'^[\w.-]{1,64}$')
+allocation_tracker = AllocationTracker(MEMORY_SNAPSHOT_KEEP)
+model_size_estimates = {}  # (name, version) -> estimated bytes; models are immutable once loaded
 
-INDIAN_STATES = {
-    # Northern States
-    'Jammu and Kashmir': {'lat': 34.0837, 'lon': 74.7973},
-    'Himachal Pradesh': {'lat': 31.1048, 'lon': 77.1734},
-    'Punjab': {'lat': 31.1471, 'lon': 75.3412},
-    'Haryana': {'lat': 29.0588, 'lon': 76.0856},
-    'Uttar Pradesh': {'lat': 26.8467, 'lon': 80.9462},
-    'Uttarakhand': {'lat': 30.0668, 'lon': 79.0193},
-    'Delhi': {'lat': 28.7041, 'lon': 77.1025},
-    
-    # Western States
-    'Rajasthan': {'lat': 27.0238, 'lon': 74.2179},
-    'Gujarat': {'lat': 22.2587, 'lon': 71.1924},
-    'Maharashtra': {'lat': 19.7515, 'lon': 75.7139},
-    'Goa': {'lat': 15.2993, 'lon': 74.1240},
-    
-    # Central States
-    'Madhya Pradesh': {'lat': 23.5937, 'lon': 78.9629},
-    'Chhattisgarh': {'lat': 21.2787, 'lon': 81.8661},
-    
-    # Eastern States
-    'Bihar': {'lat': 25.0961, 'lon': 85.3131},
-    'Jharkhand': {'lat': 23.6102, 'lon': 85.2799},
-    'West Bengal': {'lat': 22.9868, 'lon': 87.8550},
-    'Odisha': {'lat': 20.9517, 'lon': 85.0985},
-    
-    # Southern States
-    'Andhra Pradesh': {'lat': 15.9129, 'lon': 79.7400},
-    'Telangana': {'lat': 18.1124, 'lon': 79.0193},
-    'Karnataka': {'lat': 15.3173, 'lon': 75.7139},
-    'Kerala': {'lat': 10.8505, 'lon': 76.2711},
-    'Tamil Nadu': {'lat': 11.1271, 'lon': 78.6569},
-    
-    # Northeastern States
-    'Assam': {'lat': 26.2006, 'lon': 92.9376},
-    'Arunachal Pradesh': {'lat': 28.2180, 'lon': 94.7278},
-    'Manipur': {'lat': 24.6637, 'lon': 93.9063},
-    'Meghalaya': {'lat': 25.4670, 'lon': 91.3662},
-    'Mizoram': {'lat': 23.7307, 'lon': 92.7173},
-    'Nagaland': {'lat': 26.1584, 'lon': 94.5624},
-    'Tripura': {'lat': 23.9408, 'lon': 91.9882},
-    'Sikkim': {'lat': 27.5330, 'lon': 88.5122},
-    
-    # Union Territories
-    'Andaman and Nicobar Islands': {'lat': 11.7401, 'lon': 92.6586},
-    'Chandigarh': {'lat': 30.7333, 'lon': 76.7794},
-    'Dadra and Nagar Haveli and Daman and Diu': {'lat': 20.1809, 'lon': 73.0169},
-    'Lakshadweep': {'lat': 10.5667, 'lon': 72.6417},
-    'Puducherry': {'lat': 11.9416, 'lon': 79.8083},
-    'Ladakh': {'lat': 34.1526, 'lon': 77.5771}
+# --- Shadow Model Evaluation ---
+# A candidate model (file in the Models directory) scored off the request path
+# on a sampled fraction of /predict traffic before it is promoted.
+SHADOW_MODEL_FILE = os.getenv('SHADOW_MODEL_FILE')
+# The candidate's own scaler; defaults to <model stem>_scaler.pkl, or 'none' for a model trained on raw features
+SHADOW_SCALER_FILE = os.getenv('SHADOW_SCALER_FILE')
+SHADOW_SAMPLE_RATE = float(os.getenv('SHADOW_SAMPLE_RATE', '0.1'))
+SHADOW_QUEUE_SIZE = int(os.getenv('SHADOW_QUEUE_SIZE', '256'))
+shadow_evaluator = ShadowEvaluator(queue_size=SHADOW_QUEUE_SIZE, sample_rate=SHADOW_SAMPLE_RATE)
+
+# --- Weather Provider ---
+# Live weather is used when WEATHER_API_KEY is set; otherwise typical values.
+WEATHER_API_KEY = os.getenv('WEATHER_API_KEY')
+WEATHER_API_BASE_URL = os.getenv('WEATHER_API_BASE_URL', 'https://api.openweathermap.org/data/2.5')
+WEATHER_CACHE_TTL_S = float(os.getenv('WEATHER_CACHE_TTL_S', '600'))
+WEATHER_STALE_TTL_S = float(os.getenv('WEATHER_STALE_TTL_S', '3600'))
+WEATHER_TIMEOUT_S = float(os.getenv('WEATHER_TIMEOUT_S', '3'))
+weather_cache = WeatherCache(
+    OpenWeatherProvider(WEATHER_API_KEY, WEATHER_API_BASE_URL, timeout=WEATHER_TIMEOUT_S)
+    if WEATHER_API_KEY else StaticWeatherProvider(),
+    ttl=WEATHER_CACHE_TTL_S,
+    stale_ttl=WEATHER_STALE_TTL_S
+)
+
+# --- Soil Sample Index ---
+# Geolocated soil samples (CSV: lat, lon, N, P, K, ph[, soil_type]) used for
+# lat/lon recommendations; indexed once on first use.
+SOIL_SAMPLES_PATH = Path(os.getenv('SOIL_SAMPLES_PATH', str(MODELS_DIR / 'soil_samples.csv')))
+SOIL_SAMPLE_NEIGHBOURS = int(os.getenv('SOIL_SAMPLE_NEIGHBOURS', '8'))
+SOIL_SAMPLE_RADIUS_KM = float(os.getenv('SOIL_SAMPLE_RADIUS_KM', '25'))
+soil_index = None
+soil_index_loaded = False
+soil_index_lock = threading.Lock()
+
+# --- Soil Profile Store ---
+# Columnar store built by soil_store.py from soil health card data; per-state and
+# per-district aggregates are precomputed and memory-mapped.
+SOIL_STORE_PATH = Path(os.getenv('SOIL_STORE_PATH', str(MODELS_DIR / 'soil_store')))
+SOIL_PROFILE_STATISTIC = os.getenv('SOIL_PROFILE_STATISTIC', 'median')
+soil_store = None
+soil_store_loaded = False
+soil_store_lock = threading.Lock()
+
+# --- Crop Calendar ---
+# Optional CSV of monthly climate normals (state, month, temperature, humidity, rainfall)
+CLIMATE_NORMALS_PATH = Path(os.getenv('CLIMATE_NORMALS_PATH', str(MODELS_DIR / 'climate_normals.csv')))
+CROP_CALENDAR_TOP_K = int(os.getenv('CROP_CALENDAR_TOP_K', '5'))
+
+# --- Prediction Log ---
+# Set PREDICTION_LOG_PATH to record every recommendation to SQLite for audits
+# and retraining; writes happen on a background thread.
+PREDICTION_LOG_PATH = os.getenv('PREDICTION_LOG_PATH')
+prediction_logger = PredictionLogger(
+    PREDICTION_LOG_PATH,
+    queue_size=int(os.getenv('PREDICTION_LOG_QUEUE_SIZE', '10000')),
+    batch_size=int(os.getenv('PREDICTION_LOG_BATCH_SIZE', '200')),
+    flush_interval=float(os.getenv('PREDICTION_LOG_FLUSH_INTERVAL_S', '1.0')),
+    max_bytes=int(os.getenv('PREDICTION_LOG_MAX_MB', '50')) * 1024 * 1024,
+    keep_files=int(os.getenv('PREDICTION_LOG_KEEP_FILES', '5'))
+) if PREDICTION_LOG_PATH else None
+
+# --- Shared Prediction Cache ---
+# Set PREDICTION_CACHE_PATH to share predict_proba results between all worker
+# processes on a host through a local SQLite file, keyed on model version and
+# encoded features and trimmed to PREDICTION_CACHE_MAX_ENTRIES (LRU).
+PREDICTION_CACHE_PATH = os.getenv('PREDICTION_CACHE_PATH')
+try:
+    prediction_cache = SharedPredictionCache(
+        PREDICTION_CACHE_PATH,
+        max_entries=int(os.getenv('PREDICTION_CACHE_MAX_ENTRIES', '100000'))
+    ) if PREDICTION_CACHE_PATH else None
+except Exception as e:
+    print(f"Warning: Could not open prediction cache {PREDICTION_CACHE_PATH}: {e}")
+    prediction_cache = None
+
+# --- Request Coalescing ---
+# Identical scoring requests that arrive while one is being computed wait for
+# and share its predict_proba result instead of running the model again.
+REQUEST_COALESCING = os.getenv('REQUEST_COALESCING', '1') != '0'
+prediction_flight = SingleFlight()
+
+# --- Input Drift Monitoring ---
+# Live /predict inputs are binned against the training baseline written by
+# `python backend/drift.py <training.csv> Models/drift_baseline.json`.
+DRIFT_BASELINE_PATH = Path(os.getenv('DRIFT_BASELINE_PATH', MODELS_DIR / 'drift_baseline.json'))
+DRIFT_WINDOW_SIZE = int(os.getenv('DRIFT_WINDOW_SIZE', '5000'))
+try:
+    drift_monitor = DriftMonitor.from_file(DRIFT_BASELINE_PATH, DRIFT_WINDOW_SIZE) if DRIFT_BASELINE_PATH.exists() \
+        else DriftMonitor(window_size=DRIFT_WINDOW_SIZE)
+except Exception as e:
+    print(f"Warning: Could not load drift baseline {DRIFT_BASELINE_PATH}: {e}")
+    drift_monitor = DriftMonitor(window_size=DRIFT_WINDOW_SIZE)
+
+# --- Fertilizer Planning ---
+# CROP_INFO nutrient ranges parsed once into a crops x N/P/K matrix
+nutrient_planner = NutrientPlanner(CROP_INFO)
+MAX_FERTILIZER_READINGS = int(os.getenv('MAX_FERTILIZER_READINGS', '1000'))
+
+# --- Sensor Ingestion ---
+# Farm sensors post readings per field; each field keeps a ring buffer of the
+# last SENSOR_BUFFER_SIZE readings and is re-scored only when its windowed
+# features move past SENSOR_THRESHOLDS (e.g. "temperature=1.5,rainfall=10").
+# Recommendation changes are pushed to /sensors/stream subscribers.
+SENSOR_BUFFER_SIZE = int(os.getenv('SENSOR_BUFFER_SIZE', '2016'))
+SENSOR_WINDOW_HOURS = float(os.getenv('SENSOR_WINDOW_HOURS', '168'))
+SENSOR_THRESHOLDS = {
+    name.strip(): float(value)
+    for name, value in (item.split('=') for item in os.getenv('SENSOR_THRESHOLDS', '').split(',') if item)
+    if name.strip() in DEFAULT_THRESHOLDS
 }
+SENSOR_MAX_FIELDS = int(os.getenv('SENSOR_MAX_FIELDS', '1000'))
+MAX_SENSOR_READINGS = int(os.getenv('MAX_SENSOR_READINGS', '1000'))
+SENSOR_HEARTBEAT_S = float(os.getenv('SENSOR_HEARTBEAT_S', '15'))
+# Each SSE subscriber holds a server thread for as long as it stays connected
+SENSOR_MAX_SUBSCRIBERS = int(os.getenv('SENSOR_MAX_SUBSCRIBERS', '100'))
+# Readings stamped further in the future would push real readings out of the window
+SENSOR_MAX_CLOCK_SKEW_S = float(os.getenv('SENSOR_MAX_CLOCK_SKEW_S', '300'))
+sensor_hub = SensorHub(SENSOR_BUFFER_SIZE, SENSOR_WINDOW_HOURS * 3600, SENSOR_THRESHOLDS, SENSOR_MAX_FIELDS,
+                       max_subscribers=SENSOR_MAX_SUBSCRIBERS, max_clock_skew_s=SENSOR_MAX_CLOCK_SKEW_S)
+SENSOR_FIELD_ID_PATTERN = re.compile(r'^[\w.-]{1,64}$')
 
-# --- Soil Type Encoding ---
-def encode_soil_type(soil_type):
-    """Encode soil type to numerical value for model prediction."""
-    soil_type_mapping = {
-        'Sandy': 0, 'Loam': 1, 'Black': 2, 'Clay': 3, 'Red': 4, 
-        'Silt': 5, 'Chalky': 6, 'Peaty': 7, 'Gravel': 8, 
-        'Laterite': 9, 'Alluvial': 10, 'Coastal': 11
-    }
-    return soil_type_mapping.get(soil_type, 1)  # Default to Loam (1) if not found
+# --- Lookup Grid Inference ---
+# Optional approximate mode: when the model loads, its outputs are precomputed
+# over the quantized cells that the sample CSV (inputs with FEATURE_COLUMNS)
+# covers, and requests in those cells skip the model. The grid is only used if
+# its held-out agreement with predict_proba reaches LOOKUP_GRID_MIN_AGREEMENT;
+# compare resolutions with `python backend/lookup_grid.py samples.csv`.
+LOOKUP_GRID_ENABLED = os.getenv('LOOKUP_GRID', '0') == '1'
+LOOKUP_GRID_SAMPLES_PATH = Path(os.getenv('LOOKUP_GRID_SAMPLES_PATH', str(MODELS_DIR / 'lookup_grid_samples.csv')))
+LOOKUP_GRID_SCALE = float(os.getenv('LOOKUP_GRID_SCALE', '1.0'))
+LOOKUP_GRID_MIN_AGREEMENT = float(os.getenv('LOOKUP_GRID_MIN_AGREEMENT', '0.98'))
+lookup_grid = None
+lookup_grid_report = None
+
+# --- Fallback Scoring ---
+# Rule-based suitability over CROP_INFO crops: answers while the model is
+# unavailable and pads model answers with too few distinct crops.
+fallback_scorer = SuitabilityScorer(CROP_INFO, SOIL_INFO, SOIL_TYPES)
+fallback_constraints = ClassConstraints(fallback_scorer.crops, CROP_INFO, DEFAULT_CROP_DETAILS)
+FALLBACK_MODEL_VERSION = 'rules-fallback'
+
+# --- Prediction Pipeline Helpers ---
+def build_feature_frame(data):
+    """Build the single-row model input frame from request-style fields."""
+    import pandas as pd
+    return pd.DataFrame([{
+        'Nitrogen': float(data['N']),
+        'Phosphorus': float(data['P']),
+        'Potassium': float(data['K']),
+        'Temperature': float(data['temperature']),
+        'Humidity': float(data['humidity']),
+        'pH_Value': float(data['ph']),
+        'Rainfall': float(data['rainfall']),
+        'Soil_Type': encode_soil_type(data['soil_type']),
+        'Variety': 0  # Default variety value
+    }], columns=FEATURE_COLUMNS)
+
+def build_feature_batch(columns):
+    """Build a multi-row model input frame from equal-length arrays of request fields."""
+    import pandas as pd
+    return pd.DataFrame({
+        'Nitrogen': np.asarray(columns['N'], dtype=float),
+        'Phosphorus': np.asarray(columns['P'], dtype=float),
+        'Potassium': np.asarray(columns['K'], dtype=float),
+        'Temperature': np.asarray(columns['temperature'], dtype=float),
+        'Humidity': np.asarray(columns['humidity'], dtype=float),
+        'pH_Value': np.asarray(columns['ph'], dtype=float),
+        'Rainfall': np.asarray(columns['rainfall'], dtype=float),
+        'Soil_Type': [encode_soil_type(soil_type) for soil_type in columns['soil_type']],
+        'Variety': 0
+    }, columns=FEATURE_COLUMNS)
+
+def scale_features(input_data):
+    """Apply the training scaler to model inputs when one is available."""
+    if scaler:
+        return scaler.transform(input_data)
+    return input_data
+
+def crop_name_for_index(idx, served=None):
+    """Map a class index of the default model (or of a registry model) to a crop name."""
+    if served is not None:
+        return served.class_names[idx]
+    return crop_name_for_class(label_encoder.inverse_transform([idx])[0])
+
+def get_crop_details(crop_name):
+    """Get catalog details for a crop, falling back to generic details."""
+    return CROP_INFO.get(crop_name.lower()) or DEFAULT_CROP_DETAILS
 
 # --- Model Loading ---
 def load_crop_model():
     """Load the crop recommendation model."""
-    global model_loaded, crop_model, label_encoder, scaler
+    global model_loaded, crop_model, label_encoder, scaler, model_version
+    import joblib
+    import pandas as pd
+    import requests
     try:
         # Ensure Models directory exists
         os.makedirs("Models", exist_ok=True)
@@ -217,7 +364,7 @@ def load_crop_model():
                             print("Using default StandardScaler")
                     else:
                         print("Scaler not found, using default StandardScaler")
-                        print("Note: The training script should save the scaler. Consider updating train.py to save scaler.pkl")
+                        print("Note: Run backend/train.py to write scaler.pkl together with the model")
                         from sklearn.preprocessing import StandardScaler
                         scaler = StandardScaler()
                     
@@ -259,7 +406,11 @@ def load_crop_model():
             return False
             
         model_loaded = True
-        print("Model loading completed successfully!")
+        model_version = compute_model_version(model_path)
+        print(f"Model loading completed successfully! Version: {model_version}")
+        build_class_constraints()
+        build_crop_calendar()
+        build_lookup_grid()
         return True
         
     except Exception as e:
@@ -269,6 +420,385 @@ def load_crop_model():
         model_loaded = False
         return False
 
+def load_shadow_model(file_name, sample_rate=None, scaler_file=None):
+    """Load a candidate model and its own scaler from the Models directory as the shadow model.
+
+    The scaler defaults to <model stem>_scaler.pkl; 'none' scores raw features.
+    Fails when the scaler artifact is missing rather than reusing the primary's.
+    """
+    # Only bare file names are accepted so requests cannot load arbitrary paths
+    import joblib
+    shadow_path = MODELS_DIR / Path(file_name).name
+    if not shadow_path.exists():
+        print(f"Shadow model not found at {shadow_path}")
+        return False
+    scaler_file = scaler_file or f"{shadow_path.stem}_scaler.pkl"
+    shadow_scaler_path = None if scaler_file.lower() == 'none' else MODELS_DIR / Path(scaler_file).name
+    if shadow_scaler_path is not None and not shadow_scaler_path.exists():
+        print(f"Shadow scaler not found at {shadow_scaler_path}; pass the candidate's scaler file or 'none'")
+        return False
+    try:
+        shadow_model = joblib.load(shadow_path)
+        if not hasattr(shadow_model, 'predict_proba') or not hasattr(shadow_model, 'classes_'):
+            print(f"Warning: Shadow model {shadow_path.name} does not support predict_proba")
+            return False
+        shadow_scaler = joblib.load(shadow_scaler_path) if shadow_scaler_path is not None else None
+        shadow_evaluator.load(shadow_model, shadow_scaler, shadow_path.name, sample_rate)
+        print(f"Shadow model loaded from {shadow_path} (sample rate {shadow_evaluator.sample_rate})")
+        return True
+    except Exception as e:
+        print(f"Error loading shadow model: {e}")
+        return False
+
+def load_registry_model(model_id, spec):
+    """Build a registry model completely (model, scaler, class masks) before it is served."""
+    import joblib
+    # Only bare file names are accepted so the registry cannot point outside the Models directory
+    model_path = MODELS_DIR / Path(spec['file']).name
+    model = joblib.load(model_path)
+    if not hasattr(model, 'predict_proba') or not hasattr(model, 'classes_'):
+        raise ValueError(f"Model {model_path.name} does not support predict_proba")
+    # Borrowing the default model's scaler would make scores depend on load order
+    scaler_file = spec.get('scaler')
+    if not scaler_file:
+        raise ValueError(f"Model {model_id} has no scaler entry; name its scaler file or use 'none'")
+    model_scaler = None
+    if scaler_file.lower() != 'none':
+        model_scaler = joblib.load(MODELS_DIR / Path(scaler_file).name)
+    # Compressed pickles are much smaller on disk than in memory, so the loaded objects are measured
+    if spec.get('memory_mb'):
+        size_bytes = int(float(spec['memory_mb']) * 1024 * 1024)
+    else:
+        size_bytes = estimate_object_bytes((model, model_scaler))
+    class_names = [crop_name_for_class(class_label) for class_label in model.classes_]
+    return LoadedModel(
+        model_id, model, model_scaler, class_names,
+        ClassConstraints(class_names, CROP_INFO, DEFAULT_CROP_DETAILS),
+        compute_model_version(model_path), size_bytes
+    )
+
+def select_model(model_id=None, region=None, state=None):
+    """Registry model for a request, or None to use the default model.
+
+    Raises KeyError for an unknown model id or region. A routed model that
+    fails to load falls back to the default model; an explicitly requested
+    one re-raises.
+    """
+    routed_id = model_registry.resolve(model_id, region, state)
+    if routed_id is None:
+        return None
+    try:
+        return model_registry.get(routed_id, load_registry_model)
+    except Exception as e:
+        print(f"[ERROR] loading model {routed_id}: {e}")
+        if model_id:
+            raise
+        return None
+
+def build_lookup_grid():
+    """Precompute the loaded model over the observed grid cells, if approximate mode is on.
+
+    The grid is tied to the model version it was computed from; a grid from a
+    previous model is never served, and any reason for not building one is logged.
+    """
+    global lookup_grid, lookup_grid_report
+    previous, lookup_grid = lookup_grid, None
+    if not LOOKUP_GRID_ENABLED:
+        return
+
+    def skip(reason, report=None):
+        global lookup_grid_report
+        dropped = f" (dropped the grid built for model {previous.model_version})" if previous is not None else ''
+        print(f"Warning: {reason}; serving model {model_version} directly{dropped}")
+        lookup_grid_report = {'model_version': model_version, 'error': reason, **(report or {})}
+
+    if not LOOKUP_GRID_SAMPLES_PATH.exists():
+        skip(f"Lookup grid samples not found at {LOOKUP_GRID_SAMPLES_PATH}")
+        return
+    import pandas as pd
+    try:
+        frame = pd.read_csv(LOOKUP_GRID_SAMPLES_PATH)
+        if not pd.api.types.is_numeric_dtype(frame['Soil_Type']):
+            frame['Soil_Type'] = frame['Soil_Type'].map(encode_soil_type)
+        grid, report = LookupGrid.build_with_report(
+            frame[FEATURE_COLUMNS].to_numpy(dtype=np.float64),
+            lambda rows: crop_model.predict_proba(scale_features(pd.DataFrame(rows, columns=FEATURE_COLUMNS))),
+            LOOKUP_GRID_SCALE, model_version=model_version
+        )
+    except Exception as e:
+        skip(f"Could not build lookup grid: {e}")
+        return
+    print(f"Lookup grid report: {report}")
+    agreement = report.get('holdout', {}).get('served_top1_agreement', 0.0)
+    if agreement < LOOKUP_GRID_MIN_AGREEMENT:
+        skip(f"Lookup grid agreement {agreement:.4f} is below {LOOKUP_GRID_MIN_AGREEMENT}", report)
+        return
+    lookup_grid_report = {'model_version': model_version, **report}
+    lookup_grid = grid
+
+def build_class_constraints():
+    """Precompute season, water and crop-type masks over the loaded model's classes."""
+    global class_constraints
+    class_constraints = ClassConstraints(
+        [crop_name_for_class(class_label) for class_label in label_encoder.classes_],
+        CROP_INFO, DEFAULT_CROP_DETAILS
+    )
+
+def model_available():
+    """Whether the crop model can serve predictions right now."""
+    return model_loaded and crop_model is not None and label_encoder is not None and class_constraints is not None
+
+def parse_ranking_options(data, table=None):
+    """Read k, min_confidence and crop constraints from a request body.
+
+    Returns (k, min_confidence, allowed_mask, constraints) or raises ValueError.
+    """
+    table = table or class_constraints
+    n_classes = table.n_classes
+    k = int(data.get('top_k', 3))
+    if not 1 <= k <= n_classes:
+        raise ValueError(f'top_k must be between 1 and {n_classes}')
+    min_confidence = float(data.get('min_confidence', 0.0))
+    if not 0.0 <= min_confidence <= 1.0:
+        raise ValueError('min_confidence must be between 0 and 1')
+    exclude = data.get('exclude') or []
+    if isinstance(exclude, str):
+        exclude = [name.strip() for name in exclude.split(',') if name.strip()]
+    constraints = {
+        'season': data.get('season'),
+        'water_requirement': data.get('water_requirement'),
+        'crop_type': data.get('crop_type'),
+        'exclude': list(exclude)
+    }
+    allowed = table.mask(**constraints)
+    constraints = {name: value for name, value in constraints.items() if value}
+    if min_confidence > 0:
+        constraints['min_confidence'] = min_confidence
+    return k, min_confidence, allowed, constraints
+
+def fertilizer_plan_entries(plan, reading_index):
+    """JSON entries for one soil reading of a NutrientPlanner.plan result."""
+    entries = []
+    for crop_index, crop in enumerate(plan['crops']):
+        deficits = plan['deficits'][reading_index, crop_index]
+        per_hectare = not np.isnan(deficits).any()
+        entries.append({
+            'crop': crop,
+            'requirement_unit': nutrient_planner.units[nutrient_planner.crop_index[crop]],
+            'required': dict(zip(NUTRIENTS, plan['required'][crop_index].round(1).tolist())),
+            'deficit_kg_per_ha': dict(zip(NUTRIENTS, deficits.round(1).tolist())) if per_hectare else None,
+            'fertilizer_kg_per_ha': {
+                name: round(float(amounts[reading_index, crop_index]), 1)
+                for name, amounts in plan['fertilizers'].items()
+            } if per_hectare else None
+        })
+    return entries
+
+def build_crop_calendar():
+    """Materialize the state x month x soil type calendar for the loaded model."""
+    global crop_calendar
+    try:
+        normals, normals_source = load_climate_normals(CLIMATE_NORMALS_PATH, INDIAN_STATES)
+        class_seasons = [
+            get_crop_details(crop_name_for_class(class_label))['season']
+            for class_label in label_encoder.classes_
+        ]
+        crop_calendar = CropCalendar.build(
+            INDIAN_STATES.keys(), SOIL_TYPES, normals,
+            {state: estimate_soil_nutrients(state) for state in INDIAN_STATES},
+            lambda columns: crop_model.predict_proba(scale_features(build_feature_batch(columns))),
+            class_seasons, model_version, normals_source, top_k=CROP_CALENDAR_TOP_K
+        )
+        print(f"Crop calendar built: {crop_calendar.info()}")
+    except Exception as e:
+        print(f"Warning: Could not build crop calendar: {e}")
+        crop_calendar = None
+
+# --- Request Deadline Handling ---
+class DeadlineExceeded(Exception):
+    """Raised when a request is still being processed after its deadline."""
+
+    def __init__(self, stage):
+        super().__init__(f"Request deadline exceeded during {stage}")
+        self.stage = stage
+
+def parse_deadline_ms():
+    """Read the client-supplied deadline budget, falling back to the server default."""
+    raw_value = request.headers.get(DEADLINE_HEADER) or request.args.get(DEADLINE_QUERY_PARAM)
+    if raw_value is None:
+        return DEFAULT_DEADLINE_MS
+    deadline_ms = int(float(raw_value))
+    if deadline_ms < 0:
+        raise ValueError('deadline must not be negative')
+    return min(deadline_ms, MAX_DEADLINE_MS)
+
+@app.before_request
+def start_request_deadline():
+    """Record when the request started and attach an absolute monotonic deadline."""
+    g.request_started = g.stage_mark = time.monotonic()
+    g.server_timing = {}
+    try:
+        deadline_ms = parse_deadline_ms()
+    except (ValueError, OverflowError):
+        if request.endpoint in DEADLINE_ENDPOINTS:
+            return jsonify({'error': f'Invalid {DEADLINE_HEADER} value; expected milliseconds.'}), 400
+        deadline_ms = DEFAULT_DEADLINE_MS
+    g.deadline = time.monotonic() + deadline_ms / 1000.0
+
+def mark_stage(stage):
+    """Charge the time since the previous mark to a Server-Timing stage (repeat marks add up)."""
+    if 'stage_mark' not in g:
+        return
+    now = time.monotonic()
+    g.server_timing[stage] = g.server_timing.get(stage, 0.0) + (now - g.stage_mark)
+    g.stage_mark = now
+
+def check_deadline(stage):
+    """Close the current stage and abandon the request if its deadline has already passed."""
+    mark_stage(stage)
+    deadline = g.get('deadline')
+    if deadline is not None and time.monotonic() > deadline:
+        raise DeadlineExceeded(stage)
+
+def log_prediction(endpoint, inputs, recommendations, state=None, fallback=False, version=None):
+    """Hand a served recommendation to the prediction log, if enabled."""
+    if prediction_logger is None:
+        return
+    latency_ms = (time.monotonic() - g.request_started) * 1000 if 'request_started' in g else None
+    version = FALLBACK_MODEL_VERSION if fallback else version or model_version
+    prediction_logger.log(endpoint, inputs, recommendations, version, latency_ms, state)
+
+def coalescing_key(data, version=None):
+    """Normalized identity of a scoring request: model version, soil type and numeric inputs."""
+    numeric = tuple(round(float(data[field]), 6) for field in REQUIRED_FIELDS if field != 'soil_type')
+    return (version or model_version, data['soil_type']) + numeric
+
+def predict_probabilities(data, served=None):
+    """Score one request-style input with the default or a registry model.
+
+    Returns (input_frame, probabilities, shared). While an identical input is
+    already being scored, this waits for that computation (up to the request
+    deadline) and shares its result. Answers taken from the lookup grid set
+    g.approximate.
+    """
+    version = served.version if served else model_version
+
+    def compute():
+        input_data = build_feature_frame(data)
+        mark_stage('encode')
+        if prediction_cache is not None:
+            cached = prediction_cache.get(version, input_data.to_numpy()[0])
+            mark_stage('cache')
+            # Only reported when a cache was actually consulted
+            g.cache_status = 'miss' if cached is None else 'hit'
+            if cached is not None:
+                return input_data, cached, False
+        grid = lookup_grid
+        if served is None and grid is not None and grid.model_version == version:
+            probabilities = grid.lookup(input_data.to_numpy()[0])
+            mark_stage('lookup')
+            if probabilities is not None:
+                g.cache_status = 'grid'
+                return input_data, probabilities.astype(np.float64), True
+        # Apply scaling to match how the model was trained
+        scaled = served.scale(input_data) if served else scale_features(input_data)
+        mark_stage('scale')
+        started = time.perf_counter()
+        probabilities = (served.model if served else crop_model).predict_proba(scaled)[0]
+        model_registry.record_latency(served.model_id if served else DEFAULT_MODEL_ID, time.perf_counter() - started)
+        if prediction_cache is not None:
+            prediction_cache.put(version, input_data.to_numpy()[0], probabilities)
+        return input_data, probabilities, False
+
+    if not REQUEST_COALESCING:
+        (input_data, probabilities, approximate), shared = compute(), False
+    else:
+        deadline = g.get('deadline')
+        timeout = max(deadline - time.monotonic(), 0) if deadline is not None else None
+        try:
+            (input_data, probabilities, approximate), shared = prediction_flight.do(
+                coalescing_key(data, version), compute, timeout
+            )
+        except FutureTimeoutError:
+            raise DeadlineExceeded('coalesced_wait')
+        if shared:
+            g.cache_status = 'coalesced'
+    if approximate:
+        g.approximate = True
+    return input_data, probabilities, shared
+
+def require_admin():
+    """Return an error response unless the request carries the admin token."""
+    if not ADMIN_TOKEN:
+        return jsonify({'error': 'Admin endpoints are disabled; set ADMIN_TOKEN'}), 403
+    if not admin_token_valid(request.headers.get(ADMIN_TOKEN_HEADER), ADMIN_TOKEN):
+        return jsonify({'error': 'Invalid admin token'}), 401
+    return None
+
+def estimated_model_bytes(name, version, *objects):
+    """In-memory size estimate of a model (and its scaler), computed once per loaded version."""
+    key = (name, version)
+    if key not in model_size_estimates:
+        if len(model_size_estimates) > 64:
+            model_size_estimates.clear()
+        model_size_estimates[key] = estimate_object_bytes(objects)
+    return model_size_estimates[key]
+
+def memory_report():
+    """Process RSS, estimated model sizes and the size of every in-process cache and queue."""
+    models = {}
+    if crop_model is not None:
+        models[DEFAULT_MODEL_ID] = estimated_model_bytes(DEFAULT_MODEL_ID, model_version, crop_model, scaler)
+    for model_id, loaded in model_registry.resident_models():
+        models[model_id] = estimated_model_bytes(model_id, loaded.version, loaded.model, loaded.scaler)
+    shadow_model = shadow_evaluator.model
+    if shadow_model is not None:
+        models['shadow'] = estimated_model_bytes('shadow', id(shadow_model), shadow_model, shadow_evaluator.scaler)
+    sensor_fields, sensor_buffer_bytes = sensor_hub.memory_bytes()
+    caches = {
+        'weather_entries': weather_cache.entry_count(),
+        'weather_bytes': estimate_object_bytes(weather_cache.entries()),
+        'coalescing_in_flight': prediction_flight.snapshot().get('in_flight'),
+        'lookup_grid_bytes': lookup_grid.snapshot()['table_bytes'] if lookup_grid is not None else 0,
+        'crop_calendar_bytes': estimate_object_bytes(crop_calendar) if crop_calendar is not None else 0,
+        'sensor_fields': sensor_fields,
+        'sensor_buffer_bytes': sensor_buffer_bytes,
+        'drift_window_bytes': drift_monitor.report()['memory_bytes'],
+        'prediction_log_queue': prediction_logger.queue_size() if prediction_logger is not None else None,
+        'shadow_queue': shadow_evaluator.queue_size(),
+        'shared_prediction_cache_entries': prediction_cache.snapshot()['entries'] if prediction_cache is not None else None
+    }
+    return {
+        'pid': os.getpid(),
+        **process_memory(),
+        'models_estimated_bytes': models,
+        'registry_budget_bytes': model_registry.budget_bytes,
+        'caches': caches,
+        'gc_counts': list(gc.get_count()),
+        'threads': threading.active_count(),
+        'tracemalloc': allocation_tracker.status()
+    }
+
+@app.after_request
+def add_server_timing(response):
+    """Report per-stage durations as a Server-Timing header for endpoints that marked stages."""
+    timings = g.get('server_timing')
+    if not timings:
+        return response
+    mark_stage('serialize')
+    metrics = [f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in timings.items()]
+    if 'cache_status' in g:
+        metrics.append(f'cache;desc="{g.cache_status}"')
+    metrics.append(f"total;dur={(time.monotonic() - g.request_started) * 1000:.2f}")
+    response.headers['Server-Timing'] = ', '.join(metrics)
+    response.headers['Timing-Allow-Origin'] = FRONTEND_ORIGIN
+    return response
+
+@app.errorhandler(DeadlineExceeded)
+def handle_deadline_exceeded(error):
+    """Answer expired requests cheaply; the client has most likely gone away."""
+    return jsonify({'error': 'Request deadline exceeded', 'stage': error.stage}), 504
+
 # --- API Endpoints ---
 @app.route('/test', methods=['GET'])
 def test_endpoint():
@@ -276,7 +806,7 @@ def test_endpoint():
     return jsonify({
         'success': True,
         'message': 'Backend server is running!',
-        'timestamp': str(pd.Timestamp.now())
+        'timestamp': str(datetime.now())
     })
 
 @app.route('/health', methods=['GET'])
@@ -286,6 +816,7 @@ def get_health():
         'success': True,
         'model_loaded': model_loaded,
         'model_type': str(type(crop_model)) if crop_model else None,
+        'model_version': model_version,
         'supported_crops': len(label_encoder.classes_) if model_loaded and hasattr(label_encoder, 'classes_') else 0,
         'supported_soil_types': len(SOIL_TYPES)
     })
@@ -295,155 +826,172 @@ def predict_crop():
     """Predict the best crop based on input sensor data."""
     try:
         print(f"[DEBUG] Received prediction request: {request.json}")
-        
-        if not model_loaded or crop_model is None or label_encoder is None:
-            return jsonify({'error': 'Crop model not loaded.'}), 500
 
         data = request.json
-        required_fields = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall', 'soil_type']
-        for field in required_fields:
+        for field in REQUIRED_FIELDS:
             if field not in data:
                 return jsonify({'error': f'Missing required field: {field}'}), 400
 
         soil_type = data['soil_type']
         if soil_type not in SOIL_TYPES:
             return jsonify({'error': f'Unknown soil type: {soil_type}'}), 400
+        try:
+            served = select_model(data.get('model'), data.get('region'), data.get('state'))
+        except KeyError as e:
+            return jsonify({'error': e.args[0]}), 400
+        except Exception:
+            return jsonify({'error': f"Model {data.get('model')} could not be loaded"}), 503
 
-        input_data = pd.DataFrame([{
-            'Nitrogen': float(data['N']),
-            'Phosphorus': float(data['P']),
-            'Potassium': float(data['K']),
-            'Temperature': float(data['temperature']),
-            'Humidity': float(data['humidity']),
-            'pH_Value': float(data['ph']),
-            'Rainfall': float(data['rainfall']),
-            'Soil_Type': encode_soil_type(soil_type),
-            'Variety': 0  # Default variety value
-        }])
-
-        print(f"[DEBUG] Input data for prediction: {input_data.to_dict('records')}")
-        
-        # Apply scaling to match how the model was trained
-        if scaler:
-            input_data_scaled = scaler.transform(input_data)
-            print(f"[DEBUG] Input data scaled successfully. Shape: {input_data_scaled.shape}")
+        # Serve from the rule-based scorer while no model is available
+        fallback = served is None and not model_available()
+        ranking_table = fallback_constraints if fallback else served.constraints if served else class_constraints
+        try:
+            top_k, min_confidence, allowed, constraints = parse_ranking_options(data, ranking_table)
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid ranking options: {e}'}), 400
+        check_deadline('parse')
+
+        if fallback:
+            print("[DEBUG] Model unavailable; using rule-based fallback scorer")
+            probabilities = fallback_scorer.predict_proba(data)
         else:
-            input_data_scaled = input_data
-            print("[DEBUG] No scaler available, using unscaled data")
-        
-        # Get prediction probabilities
-        probabilities = crop_model.predict_proba(input_data_scaled)[0]
-        print(f"[DEBUG] Raw probabilities: {probabilities}")
+            # Get prediction probabilities, sharing the model call with identical in-flight requests
+            input_data, probabilities, shared = predict_probabilities(data, served)
+            print(f"[DEBUG] Input data for prediction: {input_data.to_dict('records')}")
+            print(f"[DEBUG] Raw probabilities: {probabilities} (shared: {shared})")
+            drift_monitor.update(input_data)
+            # The shadow candidate is compared against the default model only
+            if not shared and served is None:
+                shadow_evaluator.offer(input_data, probabilities, label_encoder.classes_)
+        check_deadline('predict')
         
-        # Get top 3 recommendations with highest probabilities
-        top_indices = np.argsort(probabilities)[-3:][::-1]
+        # Get the top-k allowed recommendations with highest probabilities
+        top_indices = ranking_table.rank(probabilities, allowed, top_k, min_confidence)
         print(f"[DEBUG] Top indices: {top_indices}")
         
-        # Ensure we have at least 3 different crops
+        # Ensure we have distinct crops
         unique_crops = set()
         recommendations = []
         
         for idx in top_indices:
-            if len(recommendations) >= 3:
+            if len(recommendations) >= top_k:
                 break
                 
-            # Get crop name from label encoder
-            crop_name = label_encoder.inverse_transform([idx])[0]
+            # Convert numeric crop index to actual crop name
+            crop_name_str = fallback_scorer.crops[idx] if fallback else crop_name_for_index(idx, served)
             prob = float(probabilities[idx])
             
-            print(f"[DEBUG] Processing index {idx}, crop_name: {crop_name}, probability: {prob}")
-            
-            # Convert numeric crop index to actual crop name
-            try:
-                crop_index = int(crop_name)
-                if 0 <= crop_index < len(CROP_LABELS):
-                    crop_name_str = CROP_LABELS[crop_index]
-                    print(f"[DEBUG] Mapped crop_{crop_index} to {crop_name_str}")
-                else:
-                    # If index is out of bounds, use modulo to get a valid index
-                    valid_index = crop_index % len(CROP_LABELS)
-                    crop_name_str = CROP_LABELS[valid_index]
-                    print(f"[DEBUG] Index {crop_index} out of bounds, using {valid_index} -> {crop_name_str}")
-            except (ValueError, TypeError):
-                # If it's not a number, use as-is
-                crop_name_str = str(crop_name)
-                print(f"[DEBUG] Using crop name as-is: {crop_name_str}")
+            print(f"[DEBUG] Processing index {idx}, crop_name: {crop_name_str}, probability: {prob}")
             
             # Only add if we haven't seen this crop before
             if crop_name_str not in unique_crops:
                 unique_crops.add(crop_name_str)
-                
-                # Get crop details
-                crop_details = CROP_INFO.get(crop_name_str.lower(), {})
-                if not crop_details:
-                    # Generate default details if not found
-                    crop_details = {
-                        'season': 'Varies',
-                        'duration': '90-150 days',
-                        'water_requirement': 'Medium',
-                        'soil_preference': 'Loam',
-                        'nutrient_req': 'Balanced NPK',
-                        'market_value': 'Medium',
-                        'yield_potential': 'Good',
-                        'fertilizers': 'NPK based',
-                        'pests_diseases': 'Common pests'
-                    }
-                
                 recommendations.append({
                     'crop': crop_name_str,
                     'confidence': prob,
-                    'details': crop_details
+                    'details': get_crop_details(crop_name_str),
+                    'fallback': fallback
                 })
                 
                 print(f"[DEBUG] Added recommendation: {crop_name_str} with confidence {prob}")
         
-        # If we don't have 3 recommendations, add some variety
-        while len(recommendations) < 3:
-            available_crops = [crop for crop in CROP_LABELS if crop not in unique_crops]
-            if available_crops:
-                random_crop = np.random.choice(available_crops)
-                unique_crops.add(random_crop)
-                
-                crop_details = CROP_INFO.get(random_crop.lower(), {})
-                if not crop_details:
-                    crop_details = {
-                        'season': 'Varies',
-                        'duration': '90-150 days',
-                        'water_requirement': 'Medium',
-                        'soil_preference': 'Loam',
-                        'nutrient_req': 'Balanced NPK',
-                        'market_value': 'Medium',
-                        'yield_potential': 'Good',
-                        'fertilizers': 'NPK based',
-                        'pests_diseases': 'Common pests'
-                    }
-                
+        # If we don't have 3 recommendations, pad with the rule-based scorer (not when the caller constrained the crops)
+        missing = min(top_k, 3) - len(recommendations)
+        if not constraints and missing > 0:
+            fallback_probabilities = fallback_scorer.predict_proba(data)
+            not_seen = fallback_constraints.mask(exclude=unique_crops)
+            for idx in fallback_constraints.rank(fallback_probabilities, not_seen, missing):
+                fallback_crop = fallback_scorer.crops[idx]
+                unique_crops.add(fallback_crop)
                 recommendations.append({
-                    'crop': random_crop,
-                    'confidence': 0.3 + np.random.random() * 0.2,  # Random confidence between 0.3-0.5
-                    'details': crop_details
+                    'crop': fallback_crop,
+                    'confidence': float(fallback_probabilities[idx]),
+                    'details': get_crop_details(fallback_crop),
+                    'fallback': True
                 })
-                print(f"[DEBUG] Added fallback recommendation: {random_crop}")
+                print(f"[DEBUG] Added fallback recommendation: {fallback_crop}")
         
+        if not recommendations:
+            # Only constraints (crop filters or min_confidence) can rule out every class
+            return jsonify({
+                'error': 'No crop meets the requested constraints; relax min_confidence or the crop filters',
+                'constraints': constraints
+            }), 422
         primary_recommendation = recommendations[0]
         soil_details = SOIL_INFO.get(soil_type, {})
+        check_deadline('assemble')
         
         print(f"[DEBUG] Final recommendations: {[r['crop'] for r in recommendations]}")
 
         response_data = {
             'success': True,
+            'fallback': fallback,
+            'model_id': served.model_id if served else DEFAULT_MODEL_ID,
+            # Probabilities came from the lookup grid rather than the model itself
+            'approximate': g.get('approximate', False),
             'primary_recommendation': primary_recommendation,
             'other_recommendations': recommendations[1:],
             'soil_info': soil_details
         }
+        if constraints:
+            response_data['constraints'] = constraints
+        if data.get('fertilizer_plan'):
+            # One array operation covers every recommended crop
+            planned = [r['crop'].lower() for r in recommendations if r['crop'].lower() in nutrient_planner.crop_index]
+            plan = nutrient_planner.plan([[float(data['N']), float(data['P']), float(data['K'])]], planned)
+            plan_by_crop = {entry['crop']: entry for entry in fertilizer_plan_entries(plan, 0)}
+            for recommendation in recommendations:
+                recommendation['fertilizer_plan'] = plan_by_crop.get(recommendation['crop'].lower())
+            mark_stage('plan')
         
         print(f"[DEBUG] Sending response: {response_data}")
+        log_prediction('/predict', {field: data[field] for field in REQUIRED_FIELDS}, recommendations,
+                       data.get('state'), fallback, served.version if served else None)
         return jsonify(response_data)
 
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         print(f"[ERROR] /predict: {e}")
         return jsonify({'error': 'An error occurred during prediction.'}), 500
 
+@app.route('/fertilizer-plan', methods=['POST'])
+def get_fertilizer_plan():
+    """Compute N/P/K deficits and fertilizer quantities for one or many soil readings"""
+    data = request.json or {}
+    readings = data.get('readings', [data])
+    crops = data.get('crops')
+    target = data.get('target', 'mid')
+    if not isinstance(readings, list) or not 1 <= len(readings) <= MAX_FERTILIZER_READINGS:
+        return jsonify({'error': f'readings must be a list of 1-{MAX_FERTILIZER_READINGS} soil readings'}), 400
+    try:
+        values = np.array([[float(reading[nutrient]) for nutrient in NUTRIENTS] for reading in readings])
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'Each reading needs numeric N, P and K'}), 400
+    # NaN or infinity would pass float() and end up in the JSON response
+    if not np.isfinite(values).all():
+        return jsonify({'error': 'N, P and K readings must be finite numbers'}), 400
+    if crops is not None:
+        if not isinstance(crops, list) or not all(isinstance(crop, str) for crop in crops):
+            return jsonify({'error': 'crops must be a list of crop names'}), 400
+        crops = [crop.lower() for crop in crops]
+        unknown = [crop for crop in crops if crop not in nutrient_planner.crop_index]
+        if unknown:
+            return jsonify({'error': f'Unknown crops: {unknown}'}), 400
+    try:
+        plan = nutrient_planner.plan(values, crops, target)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'success': True,
+        'target': target,
+        'plans': [
+            {'reading': dict(zip(NUTRIENTS, values[i].tolist())), 'crops': fertilizer_plan_entries(plan, i)}
+            for i in range(len(values))
+        ]
+    })
+
 @app.route('/soil-types', methods=['GET'])
 def get_soil_types():
     """Get all supported soil types with information"""
@@ -480,6 +1028,266 @@ def reload_model():
         'message': 'Model reloaded successfully' if success else 'Failed to reload model'
     })
 
+@app.route('/shadow-model', methods=['POST'])
+def set_shadow_model():
+    """Load a candidate model to score sampled /predict traffic in the background (admin only)"""
+    denied = require_admin()
+    if denied:
+        return denied
+    data = request.get_json(silent=True) or {}
+    file_name = data.get('file', SHADOW_MODEL_FILE)
+    if not file_name:
+        return jsonify({'error': 'Missing shadow model file name'}), 400
+    scaler_file = data.get('scaler', SHADOW_SCALER_FILE if file_name == SHADOW_MODEL_FILE else None)
+    if scaler_file is not None and not isinstance(scaler_file, str):
+        return jsonify({'error': "scaler must be a file name in the Models directory or 'none'"}), 400
+    sample_rate = data.get('sample_rate')
+    if sample_rate is not None:
+        try:
+            sample_rate = float(sample_rate)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'sample_rate must be a number between 0 and 1'}), 400
+        if not 0 <= sample_rate <= 1:
+            return jsonify({'error': 'sample_rate must be a number between 0 and 1'}), 400
+    success = load_shadow_model(file_name, sample_rate, scaler_file)
+    return jsonify({
+        'success': success,
+        'shadow_model': shadow_evaluator.name,
+        'sample_rate': shadow_evaluator.sample_rate,
+        'message': 'Shadow model loaded successfully' if success else 'Failed to load shadow model'
+    })
+
+@app.route('/shadow-model', methods=['DELETE'])
+def remove_shadow_model():
+    """Stop shadow evaluation (admin only)"""
+    denied = require_admin()
+    if denied:
+        return denied
+    shadow_evaluator.unload()
+    return jsonify({'success': True, 'message': 'Shadow model disabled'})
+
+@app.route('/shadow-stats', methods=['GET'])
+def get_shadow_stats():
+    """Get agreement, confidence delta and latency of the shadow model on sampled traffic"""
+    return jsonify({
+        'success': True,
+        'shadow': shadow_evaluator.stats()
+    })
+
+@app.route('/prediction-log-stats', methods=['GET'])
+def get_prediction_log_stats():
+    """Get prediction log queue overflow and flush latency metrics"""
+    if prediction_logger is None:
+        return jsonify({'success': True, 'enabled': False})
+    return jsonify({
+        'success': True,
+        'enabled': True,
+        'prediction_log': prediction_logger.snapshot()
+    })
+
+@app.route('/model-registry', methods=['GET'])
+def get_model_registry():
+    """Get registry routes, resident models, memory use and per-model load and latency counts"""
+    return jsonify({
+        'success': True,
+        'registry': model_registry.snapshot()
+    })
+
+@app.route('/lookup-grid', methods=['GET'])
+def get_lookup_grid():
+    """Get the approximate lookup grid's build report, size and hit rate"""
+    return jsonify({
+        'success': True,
+        'enabled': LOOKUP_GRID_ENABLED,
+        'active': lookup_grid is not None,
+        'min_agreement': LOOKUP_GRID_MIN_AGREEMENT,
+        'report': lookup_grid_report,
+        'grid': lookup_grid.snapshot() if lookup_grid is not None else None
+    })
+
+@app.route('/prediction-cache', methods=['GET'])
+def get_prediction_cache():
+    """Get shared prediction cache size and hit/miss counts for this and every other worker"""
+    if prediction_cache is None:
+        return jsonify({'success': True, 'enabled': False})
+    return jsonify({
+        'success': True,
+        'enabled': True,
+        'cache': prediction_cache.snapshot()
+    })
+
+@app.route('/coalescing-stats', methods=['GET'])
+def get_coalescing_stats():
+    """Get how many scoring requests shared an identical in-flight computation"""
+    return jsonify({
+        'success': True,
+        'enabled': REQUEST_COALESCING,
+        'coalescing': prediction_flight.snapshot()
+    })
+
+@app.route('/drift-report', methods=['GET'])
+def get_drift_report():
+    """Get live input histograms and their drift from the training baseline"""
+    return jsonify({
+        'success': True,
+        'drift': drift_monitor.report()
+    })
+
+@app.route('/analytics/top-crops', methods=['GET'])
+def get_top_crops_analytics():
+    """Get the most recommended crops per state per week from the prediction log rollups"""
+    if prediction_logger is None:
+        return jsonify({'error': 'Prediction log is not enabled'}), 404
+    try:
+        weeks = min(max(int(request.args.get('weeks', 4)), 1), 104)
+        limit = min(max(int(request.args.get('limit', 5)), 1), len(CROP_LABELS))
+    except ValueError:
+        return jsonify({'error': 'weeks and limit must be integers'}), 400
+    return jsonify({
+        'success': True,
+        'weeks': weeks,
+        'rollups': prediction_logger.top_crops_by_week(request.args.get('state'), weeks, limit)
+    })
+
+@app.route('/analytics/confidence', methods=['GET'])
+def get_confidence_analytics():
+    """Get the distribution of recommendation confidence per soil type from the rollups"""
+    if prediction_logger is None:
+        return jsonify({'error': 'Prediction log is not enabled'}), 404
+    return jsonify({
+        'success': True,
+        'distributions': prediction_logger.confidence_distribution(request.args.get('soil_type'))
+    })
+
+@app.route('/admin/profiles', methods=['GET'])
+def list_profiles():
+    """List stored request profiles (admin only)"""
+    denied = require_admin()
+    if denied:
+        return denied
+    return jsonify({
+        'success': True,
+        'profiler': request_profiler.snapshot(),
+        'profiles': request_profiler.list()
+    })
+
+@app.route('/admin/profiles/<name>', methods=['GET'])
+def get_profile(name):
+    """Download a stored pstats file, or a text summary with ?format=text (admin only)"""
+    denied = require_admin()
+    if denied:
+        return denied
+    path = request_profiler.path_for(name)
+    if path is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    if request.args.get('format') == 'text':
+        sort = request.args.get('sort', 'cumulative')
+        if sort not in ('cumulative', 'tottime', 'calls', 'ncalls'):
+            return jsonify({'error': 'sort must be cumulative, tottime, calls or ncalls'}), 400
+        try:
+            limit = min(max(int(request.args.get('limit', 40)), 1), 500)
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+        summary = request_profiler.summary(name, sort, limit)
+        if summary is None:
+            return jsonify({'error': 'Profile not found'}), 404
+        return summary, 200, {'Content-Type': 'text/plain; charset=utf-8'}
+    return send_file(path, mimetype='application/octet-stream', as_attachment=True, download_name=name)
+
+@app.route('/admin/memory', methods=['GET'])
+def get_memory():
+    """Get process RSS, estimated model and cache sizes and the tracemalloc session state (admin only)"""
+    denied = require_admin()
+    if denied:
+        return denied
+    return jsonify({'success': True, 'memory': memory_report()})
+
+@app.route('/admin/memory/tracemalloc/start', methods=['POST'])
+def start_tracemalloc():
+    """Start tracing allocations with `frames` stack frames each (admin only)"""
+    denied = require_admin()
+    if denied:
+        return denied
+    data = request.get_json(silent=True) or {}
+    try:
+        frames = int(data.get('frames', 1))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'frames must be an integer'}), 400
+    if not 1 <= frames <= MEMORY_TRACE_MAX_FRAMES:
+        return jsonify({'error': f'frames must be between 1 and {MEMORY_TRACE_MAX_FRAMES}'}), 400
+    started = allocation_tracker.start(frames)
+    return jsonify({
+        'success': True,
+        'started': started,
+        'message': 'Tracing started' if started else 'Tracing was already running',
+        'tracemalloc': allocation_tracker.status()
+    })
+
+@app.route('/admin/memory/tracemalloc/stop', methods=['POST'])
+def stop_tracemalloc():
+    """Stop tracing allocations and discard stored snapshots (admin only)"""
+    denied = require_admin()
+    if denied:
+        return denied
+    stopped = allocation_tracker.stop()
+    return jsonify({
+        'success': True,
+        'stopped': stopped,
+        'message': 'Tracing stopped' if stopped else 'Tracing was not running'
+    })
+
+@app.route('/admin/memory/snapshots', methods=['POST'])
+def take_memory_snapshot():
+    """Store a labelled tracemalloc snapshot to diff against later (admin only)"""
+    denied = require_admin()
+    if denied:
+        return denied
+    label = (request.get_json(silent=True) or {}).get('label')
+    if label is not None and not (isinstance(label, str) and MEMORY_SNAPSHOT_LABEL_PATTERN.match(label)):
+        return jsonify({'error': 'label must be 1-64 letters, digits, dots, dashes or underscores'}), 400
+    try:
+        label = allocation_tracker.take(label)
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 409
+    return jsonify({'success': True, 'label': label, 'tracemalloc': allocation_tracker.status()})
+
+@app.route('/admin/memory/snapshots', methods=['GET'])
+def list_memory_snapshots():
+    """List stored tracemalloc snapshots (admin only)"""
+    denied = require_admin()
+    if denied:
+        return denied
+    return jsonify({'success': True, 'tracemalloc': allocation_tracker.status()})
+
+@app.route('/admin/memory/snapshots/diff', methods=['GET'])
+def diff_memory_snapshots():
+    """Top allocation sites that grew between snapshot `from` and `to` (default: a new snapshot) (admin only)"""
+    denied = require_admin()
+    if denied:
+        return denied
+    older = request.args.get('from')
+    if not older:
+        return jsonify({'error': 'Missing snapshot label: from'}), 400
+    group_by = request.args.get('group_by', 'lineno')
+    if group_by not in GROUP_BY:
+        return jsonify({'error': f"group_by must be one of {', '.join(GROUP_BY)}"}), 400
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 200)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    if older not in allocation_tracker.snapshots:
+        return jsonify({'error': f'Snapshot not found: {older}'}), 404
+    newer = request.args.get('to')
+    try:
+        if not newer:
+            newer = allocation_tracker.take()
+        diff = allocation_tracker.diff(older, newer, limit, group_by)
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 409
+    except KeyError as e:
+        return jsonify({'error': f'Snapshot not found: {e.args[0]}'}), 404
+    return jsonify({'success': True, 'diff': diff})
+
 @app.route('/model-info', methods=['GET'])
 def get_model_info():
     """Get detailed information about the loaded model."""
@@ -490,6 +1298,7 @@ def get_model_info():
         model_info = {
             'model_type': str(type(crop_model)),
             'model_loaded': model_loaded,
+            'model_version': model_version,
             'has_classes': hasattr(crop_model, 'classes_'),
             'has_predict_proba': hasattr(crop_model, 'predict_proba'),
             'supported_crops': len(label_encoder.classes_) if label_encoder else 0,
@@ -507,18 +1316,195 @@ def get_model_info():
 
 # --- Regional Recommendation Helpers ---
 def get_weather_data(state_name):
-    # Placeholder: In a real app, this would call a weather API
-    # Using some typical values for demonstration
-    return {'temperature': 25, 'humidity': 70, 'rainfall': 100}
+    """Get cached weather for a state, falling back to typical values if upstream fails."""
+    coords = INDIAN_STATES[state_name]
+    try:
+        return weather_cache.get(state_name, coords['lat'], coords['lon'], timeout=WEATHER_TIMEOUT_S * 2)
+    except Exception as e:
+        print(f"Warning: Using default weather for {state_name}: {e}")
+        return dict(DEFAULT_WEATHER)
+
+def nearest_state(lat, lon):
+    """Find the state or union territory whose reference point is closest to a coordinate."""
+    names = list(INDIAN_STATES.keys())
+    points = np.radians([[INDIAN_STATES[name]['lat'], INDIAN_STATES[name]['lon']] for name in names])
+    lat_r, lon_r = np.radians(lat), np.radians(lon)
+    # Haversine distance to every reference point at once
+    a = (np.sin((points[:, 0] - lat_r) / 2) ** 2
+         + np.cos(lat_r) * np.cos(points[:, 0]) * np.sin((points[:, 1] - lon_r) / 2) ** 2)
+    distances_km = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+    return names[int(np.argmin(distances_km))]
+
+def get_soil_index():
+    """Build the soil sample index on first use; None when no sample dataset is present."""
+    global soil_index, soil_index_loaded
+    if soil_index_loaded:
+        return soil_index
+    with soil_index_lock:
+        if not soil_index_loaded:
+            if SOIL_SAMPLES_PATH.exists():
+                try:
+                    soil_index = SoilSampleIndex.from_csv(SOIL_SAMPLES_PATH)
+                    print(f"Soil sample index built: {soil_index.info()}")
+                except Exception as e:
+                    print(f"Warning: Could not build soil sample index: {e}")
+            else:
+                print(f"Soil samples not found at {SOIL_SAMPLES_PATH}, using state profiles")
+            soil_index_loaded = True
+    return soil_index
+
+def get_soil_store():
+    """Open the memory-mapped soil profile store on first use; None when it is not built."""
+    global soil_store, soil_store_loaded
+    if soil_store_loaded:
+        return soil_store
+    with soil_store_lock:
+        if not soil_store_loaded:
+            if (SOIL_STORE_PATH / 'meta.json').exists():
+                try:
+                    soil_store = SoilProfileStore(SOIL_STORE_PATH)
+                    print(f"Soil profile store opened: {soil_store.info()}")
+                except Exception as e:
+                    print(f"Warning: Could not open soil profile store: {e}")
+            else:
+                print(f"Soil profile store not found at {SOIL_STORE_PATH}, using built-in profiles")
+            soil_store_loaded = True
+    return soil_store
 
-def estimate_soil_nutrients(state_name):
-    # Placeholder: In a real app, this would use a soil database
+def estimate_soil_nutrients(state_name, district=None):
+    """Get N/P/K/pH for a state (or district) from the soil store, else built-in profiles."""
+    store = get_soil_store() if state_name else None
+    if store is not None:
+        profile = None
+        if district:
+            profile = store.district_profile(state_name, district, SOIL_PROFILE_STATISTIC)
+            source = 'district_aggregate'
+        if profile is None:
+            profile = store.state_profile(state_name, SOIL_PROFILE_STATISTIC)
+            source = 'state_aggregate'
+        if profile is not None:
+            return {**profile, 'source': source}
+
+    # Fallback when no soil data has been loaded for this state
     soil_profiles = {
         'Punjab': {'N': 90, 'P': 45, 'K': 40, 'ph': 7.2},
         'Maharashtra': {'N': 60, 'P': 30, 'K': 50, 'ph': 6.8},
         'default': {'N': 65, 'P': 35, 'K': 40, 'ph': 6.8}
     }
-    return soil_profiles.get(state_name, soil_profiles['default'])
+    return {**soil_profiles.get(state_name, soil_profiles['default']), 'source': 'builtin'}
+
+def predict_top_crops(prediction_data, top_k=3, served=None):
+    """Score request-style inputs and return the top-k crops.
+
+    Uses the given registry model or the default model, or the rule-based
+    scorer while neither is available; each recommendation records which one
+    produced it.
+    """
+    fallback = served is None and not model_available()
+    if fallback:
+        probabilities = fallback_scorer.predict_proba(prediction_data)
+    else:
+        _, probabilities, _ = predict_probabilities(prediction_data, served)
+    check_deadline('predict')
+    recommendations = top_recommendations(probabilities, top_k, fallback, served)
+    check_deadline('assemble')
+    return recommendations
+
+def top_recommendations(probabilities, top_k=3, fallback=False, served=None):
+    """Top-k recommendations from one probability row of a model or of the fallback scorer."""
+    top_indices = np.argsort(probabilities)[-top_k:][::-1]
+    
+    recommendations = []
+    for idx in top_indices:
+        crop_name_str = fallback_scorer.crops[idx] if fallback else crop_name_for_index(idx, served)
+        recommendations.append({
+            'crop': crop_name_str,
+            'confidence': float(probabilities[idx]),
+            'details': CROP_INFO.get(crop_name_str.lower(), {}),
+            'fallback': fallback
+        })
+    return recommendations
+
+@app.route('/weather/<state>', methods=['GET'])
+def get_state_weather(state):
+    """Get current weather for a state from the server-side weather cache"""
+    if state not in INDIAN_STATES:
+        return jsonify({'error': 'State not supported'}), 404
+    return jsonify({
+        'success': True,
+        'state': state,
+        'weather': get_weather_data(state)
+    })
+
+@app.route('/weather-stats', methods=['GET'])
+def get_weather_stats():
+    """Get weather cache hit rates and upstream call counts"""
+    return jsonify({
+        'success': True,
+        'weather_cache': weather_cache.snapshot()
+    })
+
+@app.route('/soil-profiles/<state>', methods=['GET'])
+def get_soil_profiles(state):
+    """Get precomputed soil nutrient statistics for a state and its districts"""
+    store = get_soil_store()
+    if store is None:
+        return jsonify({'error': 'Soil profile store not available'}), 404
+    description = store.describe_state(state)
+    if description is None:
+        return jsonify({'error': 'State not found in soil profile store'}), 404
+    return jsonify({
+        'success': True,
+        'statistics': STATISTICS,
+        **description
+    })
+
+@app.route('/crop-calendar/<state>', methods=['GET'])
+def get_crop_calendar(state):
+    """Get in-season crops to sow in a state, per month, from the materialized calendar"""
+    if state not in INDIAN_STATES:
+        return jsonify({'error': 'State not supported'}), 404
+    calendar = crop_calendar
+    if calendar is None:
+        return jsonify({'error': 'Crop calendar not available; model not loaded'}), 503
+
+    soil_type = request.args.get('soil_type', 'Loam')
+    if soil_type not in SOIL_TYPES:
+        return jsonify({'error': f'Unknown soil type: {soil_type}'}), 400
+    month_arg = request.args.get('month')
+    if month_arg == 'all':
+        months = list(range(1, 13))
+    else:
+        try:
+            months = [int(month_arg) if month_arg else int(time.strftime('%m'))]
+        except ValueError:
+            return jsonify({'error': 'month must be 1-12 or "all"'}), 400
+        if not 1 <= months[0] <= 12:
+            return jsonify({'error': 'month must be 1-12 or "all"'}), 400
+
+    calendar_months = []
+    for month in months:
+        recommendations = []
+        for class_index, probability in calendar.lookup(state, month, soil_type):
+            crop_name_str = crop_name_for_index(class_index)
+            recommendations.append({
+                'crop': crop_name_str,
+                'confidence': probability,
+                'details': get_crop_details(crop_name_str)
+            })
+        calendar_months.append({
+            'month': month,
+            'month_name': MONTH_NAMES[month - 1],
+            'recommendations': recommendations
+        })
+
+    return jsonify({
+        'success': True,
+        'state': state,
+        'soil_type': soil_type,
+        'model_version': calendar.model_version,
+        'months': calendar_months
+    })
 
 @app.route('/regional-recommendation/<state>', methods=['GET'])
 def get_regional_recommendation(state):
@@ -527,8 +1513,16 @@ def get_regional_recommendation(state):
         if state not in INDIAN_STATES:
             return jsonify({'error': 'State not supported'}), 404
 
+        district = request.args.get('district')
+        try:
+            served = select_model(request.args.get('model'), request.args.get('region'), state)
+        except KeyError as e:
+            return jsonify({'error': e.args[0]}), 400
+        except Exception:
+            return jsonify({'error': f"Model {request.args.get('model')} could not be loaded"}), 503
         weather_data = get_weather_data(state)
-        soil_data = estimate_soil_nutrients(state)
+        mark_stage('weather')
+        soil_data = estimate_soil_nutrients(state, district)
         
         prediction_data = {
             'N': soil_data['N'],
@@ -541,56 +1535,294 @@ def get_regional_recommendation(state):
             'soil_type': 'Loam'  # Default soil type for regional recommendations
         }
         
-        if not model_loaded or crop_model is None or label_encoder is None:
-            return jsonify({'error': 'Crop model not loaded'}), 500
-        
-        input_data = pd.DataFrame([{
-            'Nitrogen': float(prediction_data['N']),
-            'Phosphorus': float(prediction_data['P']),
-            'Potassium': float(prediction_data['K']),
-            'Temperature': float(prediction_data['temperature']),
-            'Humidity': float(prediction_data['humidity']),
-            'pH_Value': float(prediction_data['ph']),
-            'Rainfall': float(prediction_data['rainfall']),
-            'Soil_Type': encode_soil_type(prediction_data['soil_type']),
-            'Variety': 0  # Default variety value
-        }])
-        
-        probabilities = crop_model.predict_proba(input_data)[0]
-        top_indices = np.argsort(probabilities)[-3:][::-1]
+        check_deadline('parse')
         
-        recommendations = []
-        for idx in top_indices:
-            crop_name = label_encoder.inverse_transform([idx])[0]
-            prob = float(probabilities[idx])
-            # Convert numeric crop index to actual crop name
-            try:
-                crop_index = int(crop_name)
-                if crop_index < len(CROP_LABELS):
-                    crop_name_str = CROP_LABELS[crop_index]
-                else:
-                    crop_name_str = f"crop_{crop_index}"
-            except (ValueError, TypeError):
-                crop_name_str = str(crop_name)
-            
-            crop_details = CROP_INFO.get(crop_name_str.lower(), {})
-            recommendations.append({
-                'crop': crop_name_str,
-                'confidence': prob,
-                'details': crop_details
-            })
+        recommendations = predict_top_crops(prediction_data, served=served)
+        fallback = recommendations[0]['fallback']
+        log_prediction('/regional-recommendation', prediction_data, recommendations, state, fallback,
+                       served.version if served else None)
         
         return jsonify({
             'success': True,
+            'fallback': fallback,
+            'model_id': served.model_id if served else DEFAULT_MODEL_ID,
+            'approximate': g.get('approximate', False),
             'state': state,
+            'district': district,
+            'soil_source': soil_data['source'],
             'primary_recommendation': recommendations[0],
             'other_recommendations': recommendations[1:]
         })
 
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         print(f"[ERROR] /regional-recommendation: {e}")
         return jsonify({'error': 'An error occurred during regional recommendation.'}), 500
 
+@app.route('/advisory', methods=['POST'])
+def get_advisory():
+    """Regional and personalized recommendations with soil and crop details in one response"""
+    try:
+        data = request.json or {}
+        state = data.get('state') or None
+        if state is not None and state not in INDIAN_STATES:
+            return jsonify({'error': 'State not supported'}), 404
+        soil_type = data.get('soil_type') or 'Loam'
+        if soil_type not in SOIL_TYPES:
+            return jsonify({'error': f'Unknown soil type: {soil_type}'}), 400
+        try:
+            top_k = int(data.get('top_k', 3))
+            # Readings the user supplied replace the regional estimates
+            overrides = {
+                field: float(data[field]) for field in REQUIRED_FIELDS
+                if field != 'soil_type' and data.get(field) is not None
+            }
+        except (TypeError, ValueError):
+            return jsonify({'error': 'top_k and soil/weather readings must be numeric'}), 400
+        try:
+            served = select_model(data.get('model'), data.get('region'), state)
+        except KeyError as e:
+            return jsonify({'error': e.args[0]}), 400
+        except Exception:
+            return jsonify({'error': f"Model {data.get('model')} could not be loaded"}), 503
+        fallback = served is None and not model_available()
+        # Capped by the classes of the model that will answer
+        if served is not None:
+            n_classes = len(served.class_names)
+        elif fallback:
+            n_classes = len(fallback_scorer.crops)
+        else:
+            n_classes = len(crop_model.classes_)
+        if not 1 <= top_k <= n_classes:
+            return jsonify({'error': f'top_k must be between 1 and {n_classes}'}), 400
+
+        district = data.get('district')
+        weather_data = get_weather_data(state) if state else dict(DEFAULT_WEATHER)
+        mark_stage('weather')
+        soil_data = estimate_soil_nutrients(state, district)
+        regional_inputs = {
+            'N': soil_data['N'],
+            'P': soil_data['P'],
+            'K': soil_data['K'],
+            'temperature': weather_data['temperature'],
+            'humidity': weather_data['humidity'],
+            'ph': soil_data['ph'],
+            'rainfall': weather_data['rainfall'],
+            'soil_type': 'Loam'  # Same default as /regional-recommendation
+        }
+        personalized_inputs = {**regional_inputs, **overrides, 'soil_type': soil_type}
+        rows = [personalized_inputs, regional_inputs] if state else [personalized_inputs]
+        check_deadline('parse')
+
+        # Same cache, lookup grid and latency accounting as /predict
+        if fallback:
+            probabilities = [fallback_scorer.predict_proba(row) for row in rows]
+        else:
+            probabilities = [predict_probabilities(row, served)[1] for row in rows]
+        check_deadline('predict')
+        personalized = top_recommendations(probabilities[0], top_k, fallback, served)
+        regional = top_recommendations(probabilities[1], top_k, fallback, served) if state else None
+        check_deadline('assemble')
+
+        log_prediction('/advisory', personalized_inputs, personalized, state, fallback,
+                       served.version if served else None)
+        return jsonify({
+            'success': True,
+            'fallback': fallback,
+            'model_id': served.model_id if served else DEFAULT_MODEL_ID,
+            'approximate': g.get('approximate', False),
+            'state': state,
+            'district': district,
+            'soil_type': soil_type,
+            'soil_info': SOIL_INFO.get(soil_type, {}),
+            'soil_profile': soil_data,
+            'weather': weather_data,
+            'inputs': personalized_inputs,
+            'personalized': {
+                'primary_recommendation': personalized[0],
+                'other_recommendations': personalized[1:]
+            },
+            'regional': {
+                'primary_recommendation': regional[0],
+                'other_recommendations': regional[1:]
+            } if regional else None
+        })
+
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        print(f"[ERROR] /advisory: {e}")
+        return jsonify({'error': 'An error occurred during advisory.'}), 500
+
+@app.route('/sensors/<field_id>/readings', methods=['POST'])
+def ingest_sensor_readings(field_id):
+    """Add sensor readings for a field and re-score it only if its windowed features moved"""
+    try:
+        if not SENSOR_FIELD_ID_PATTERN.match(field_id):
+            return jsonify({'error': 'Invalid field id'}), 400
+        data = request.json or {}
+        readings = data.get('readings', [data])
+        if not isinstance(readings, list) or not 1 <= len(readings) <= MAX_SENSOR_READINGS:
+            return jsonify({'error': f'readings must be a list of 1-{MAX_SENSOR_READINGS} sensor readings'}), 400
+        soil_type = data.get('soil_type')
+        if soil_type is not None and soil_type not in SOIL_TYPES:
+            return jsonify({'error': f'Unknown soil type: {soil_type}'}), 400
+        state = data.get('state')
+        if state is not None and state not in INDIAN_STATES:
+            return jsonify({'error': 'State not supported'}), 404
+
+        previous = sensor_hub.describe(field_id)
+        state = state or (previous or {}).get('state')
+        # Soil nutrients are rarely sensed; the regional profile fills them in
+        defaults = estimate_soil_nutrients(state) if state else None
+        try:
+            features, missing, changed, rescore = sensor_hub.ingest(field_id, readings, soil_type, state, defaults)
+        except (AttributeError, TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid sensor readings: {e}'}), 400
+
+        try:
+            check_deadline('parse')
+            if rescore:
+                field_soil_type = soil_type or (previous or {}).get('soil_type') or 'Loam'
+                served = select_model(state=state)
+                recommendations = predict_top_crops({**features, 'soil_type': field_soil_type}, served=served)
+        except Exception:
+            # Let the next update re-score the field
+            if rescore:
+                sensor_hub.abandon_rescore(field_id)
+            raise
+
+        field_changed = False
+        if rescore:
+            field_changed = sensor_hub.publish(field_id, features, recommendations)
+            log_prediction('/sensors', {**features, 'soil_type': field_soil_type}, recommendations, state,
+                           recommendations[0]['fallback'], served.version if served else None)
+        current = sensor_hub.describe(field_id)
+
+        return jsonify({
+            'success': True,
+            'field_id': field_id,
+            'features': features,
+            'missing': missing,
+            'changed_features': changed,
+            'rescored': rescore,
+            # Whether this request's re-score came from the lookup grid
+            'approximate': g.get('approximate', False),
+            'recommendation_changed': field_changed,
+            'version': current['version'],
+            'recommendations': current['recommendations']
+        })
+
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        print(f"[ERROR] /sensors/{field_id}/readings: {e}")
+        return jsonify({'error': 'An error occurred during sensor ingestion.'}), 500
+
+@app.route('/sensors/<field_id>', methods=['GET'])
+def get_sensor_field(field_id):
+    """Get a field's windowed sensor features and current recommendation"""
+    description = sensor_hub.describe(field_id)
+    if description is None:
+        return jsonify({'error': 'Field not found'}), 404
+    return jsonify({'success': True, **description})
+
+@app.route('/sensors', methods=['GET'])
+def get_sensor_stats():
+    """Get sensor ingestion counts: readings, re-scores skipped and recommendation changes"""
+    return jsonify({'success': True, 'sensors': sensor_hub.snapshot()})
+
+@app.route('/sensors/stream', methods=['GET'])
+def stream_sensor_updates():
+    """Server-Sent Events stream of recommendation changes (all fields, or ?field=<id>)"""
+    field_id = request.args.get('field')
+    subscriber = sensor_hub.subscribe(field_id)
+    if subscriber is None:
+        return jsonify({'error': 'Too many open sensor streams; try again later'}), 503
+
+    def events():
+        try:
+            yield ': connected\n\n'
+            while True:
+                try:
+                    event = subscriber.get(timeout=SENSOR_HEARTBEAT_S)
+                except queue.Empty:
+                    # Comment lines keep proxies from closing an idle stream
+                    yield ': keepalive\n\n'
+                    continue
+                yield f"id: {event['field_id']}:{event['version']}\nevent: recommendation\ndata: {json.dumps(event)}\n\n"
+        finally:
+            sensor_hub.unsubscribe(subscriber)
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/location-recommendation', methods=['GET'])
+def get_location_recommendation():
+    """Get crop recommendation for a latitude/longitude from nearby soil samples"""
+    try:
+        try:
+            lat = float(request.args['lat'])
+            lon = float(request.args['lon'])
+            k = min(max(int(request.args.get('k', SOIL_SAMPLE_NEIGHBOURS)), 1), 50)
+            radius_km = float(request.args.get('radius_km', SOIL_SAMPLE_RADIUS_KM))
+        except (KeyError, ValueError):
+            return jsonify({'error': 'lat and lon are required numbers; k and radius_km must be numeric'}), 400
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            return jsonify({'error': 'lat/lon out of range'}), 400
+
+        state = nearest_state(lat, lon)
+        index = get_soil_index()
+        soil_data = index.aggregate(lat, lon, k, radius_km) if index else None
+        soil_source = 'soil_samples'
+        if soil_data is None:
+            soil_data = estimate_soil_nutrients(state)
+            soil_source = soil_data['source']
+
+        soil_type = request.args.get('soil_type') or soil_data.get('soil_type') or 'Loam'
+        if soil_type not in SOIL_TYPES:
+            if 'soil_type' in request.args:
+                return jsonify({'error': f'Unknown soil type: {soil_type}'}), 400
+            soil_type = 'Loam'
+
+        # Per-state weather keeps upstream calls bounded by the number of states
+        weather_data = get_weather_data(state)
+        prediction_data = {
+            'N': soil_data['N'],
+            'P': soil_data['P'],
+            'K': soil_data['K'],
+            'temperature': weather_data['temperature'],
+            'humidity': weather_data['humidity'],
+            'ph': soil_data['ph'],
+            'rainfall': weather_data['rainfall'],
+            'soil_type': soil_type
+        }
+        check_deadline('parse')
+
+        recommendations = predict_top_crops(prediction_data)
+        fallback = recommendations[0]['fallback']
+        log_prediction('/location-recommendation', prediction_data, recommendations, state, fallback)
+
+        return jsonify({
+            'success': True,
+            'fallback': fallback,
+            'approximate': g.get('approximate', False),
+            'location': {'lat': lat, 'lon': lon, 'nearest_state': state},
+            'soil_profile': soil_data,
+            'soil_source': soil_source,
+            'soil_type': soil_type,
+            'weather': weather_data,
+            'primary_recommendation': recommendations[0],
+            'other_recommendations': recommendations[1:]
+        })
+
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        print(f"[ERROR] /location-recommendation: {e}")
+        return jsonify({'error': 'An error occurred during location recommendation.'}), 500
+
 @app.route('/test-prediction', methods=['GET'])
 def test_prediction():
     """Test the model with sample data to verify it's working."""
@@ -616,25 +1848,15 @@ def test_prediction():
         
         results = []
         for test_case in test_cases:
-            input_data = pd.DataFrame([{
-                'Nitrogen': test_case['data']['N'],
-                'Phosphorus': test_case['data']['P'],
-                'Potassium': test_case['data']['K'],
-                'Temperature': test_case['data']['temperature'],
-                'Humidity': test_case['data']['humidity'],
-                'pH_Value': test_case['data']['ph'],
-                'Rainfall': test_case['data']['rainfall'],
-                'Soil_Type': encode_soil_type(test_case['data']['soil_type']),
-                'Variety': 0
-            }])
-            
+            check_deadline('parse')
+            input_data = build_feature_frame(test_case['data'])
+            check_deadline('encode')
             # Apply scaling to match how the model was trained
-            if scaler:
-                input_data_scaled = scaler.transform(input_data)
-            else:
-                input_data_scaled = input_data
+            input_data_scaled = scale_features(input_data)
+            check_deadline('scale')
             
             probabilities = crop_model.predict_proba(input_data_scaled)[0]
+            check_deadline('predict')
             top_indices = np.argsort(probabilities)[-3:][::-1]
             
             test_result = {
@@ -645,6 +1867,7 @@ def test_prediction():
                 'top_crops': [CROP_LABELS[i] if 0 <= i < len(CROP_LABELS) else f"crop_{i}" for i in top_indices]
             }
             results.append(test_result)
+        check_deadline('assemble')
         
         return jsonify({
             'success': True,
@@ -652,6 +1875,8 @@ def test_prediction():
             'test_results': results
         })
         
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         print(f"[ERROR] /test-prediction: {e}")
         return jsonify({'error': f'Error testing prediction: {str(e)}'}), 500
@@ -664,6 +1889,12 @@ if __name__ == '__main__':
     host = os.environ.get('HOST', '0.0.0.0')
     print(f"Binding to http://{host}:{port}")
     
+    # Debug: Print the paths to verify they exist
+    print(f"BACKEND_DIR: {BACKEND_DIR}")
+    print(f"MODELS_DIR: {MODELS_DIR}")
+    print(f"CROP_MODEL_PATH: {CROP_MODEL_PATH}")
+    print(f"CROP_MODEL_PATH exists: {CROP_MODEL_PATH.exists()}")
+    
     # Load model synchronously first
     try:
         print("Loading model...")
@@ -673,6 +1904,13 @@ if __name__ == '__main__':
         print(f"Warning: Model loading failed: {e}")
         print("Server will start without model - some endpoints may not work")
     
+    if SHADOW_MODEL_FILE:
+        load_shadow_model(SHADOW_MODEL_FILE, scaler_file=SHADOW_SCALER_FILE)
+    
+    # Build the soil sample index and open the soil store before taking traffic
+    get_soil_index()
+    get_soil_store()
+    
     try:
         # Run the Flask app (Render requires 0.0.0.0 and PORT)
         print("Starting Flask server...")
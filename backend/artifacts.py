@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""Model artifact locations and fingerprints.
+
+Shared by the server and the offline CLIs (training, compaction, comparison,
+lookup grid and drift baseline) so the CLIs never have to import the app.
+"""
+import hashlib
+import os
+from pathlib import Path
+
+# --- Model & Data Paths ---
+# Models are in the Models directory
+BACKEND_DIR = Path(__file__).parent
+MODELS_DIR = BACKEND_DIR.parent / 'Models'
+# Set CROP_MODEL_FILE to serve another artifact, e.g. one written by compact_model.py
+CROP_MODEL_PATH = MODELS_DIR / os.getenv('CROP_MODEL_FILE', 'crop_model.pkl')
+
+
+def compute_model_version(model_path):
+    """Short fingerprint of a model artifact from its name, size and modification time."""
+    stat = model_path.stat()
+    return hashlib.sha1(f"{model_path.name}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()[:12]
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Static crop, soil and state catalogs and the model input schema.
+
+Kept free of heavy imports so CLIs and the catalog endpoints can use them
+without loading pandas or scikit-learn.
+"""
+
+# --- Crop & Soil Information ---
+CROP_INFO = {
+    'rice': {'season': 'Kharif', 'duration': '120-150 days', 'water_requirement': 'High', 'soil_preference': 'Clay, Loam', 'nutrient_req': 'N: 80-120, P: 40-60, K: 40-60 kg/ha', 'market_value': 'Medium', 'yield_potential': '4-6 tons/ha', 'fertilizers': 'Urea, DAP, MOP', 'pests_diseases': 'Stem borer, Brown planthopper, Blast'},
+    'maize': {'season': 'Kharif/Rabi', 'duration': '90-120 days', 'water_requirement': 'Medium', 'soil_preference': 'Loam, Sandy Loam', 'nutrient_req': 'N: 120-150, P: 60-80, K: 40-60 kg/ha', 'market_value': 'Medium', 'yield_potential': '5-8 tons/ha', 'fertilizers': 'Urea, DAP, MOP', 'pests_diseases': 'Fall armyworm, Stem borer, Rust'},
+    'jute': {'season': 'Kharif', 'duration': '120-150 days', 'water_requirement': 'High', 'soil_preference': 'Alluvial, Loam', 'nutrient_req': 'N: 40-60, P: 20-30, K: 20-30 kg/ha', 'market_value': 'Medium', 'yield_potential': '2-3 tons/ha (fiber)', 'fertilizers': 'Urea, SSP', 'pests_diseases': 'Jute semilooper, Yellow mite'},
+    'cotton': {'season': 'Kharif', 'duration': '150-180 days', 'water_requirement': 'Medium-High', 'soil_preference': 'Black soil, Alluvial', 'nutrient_req': 'N: 120-180, P: 60-90, K: 60-90 kg/ha', 'market_value': 'High', 'yield_potential': '2-4 tons/ha', 'fertilizers': 'Urea, DAP, MOP', 'pests_diseases': 'Bollworm, Whitefly, Leaf curl virus'},
+    'coconut': {'season': 'Perennial', 'duration': '7-10 years to mature', 'water_requirement': 'High', 'soil_preference': 'Sandy Loam, Laterite', 'nutrient_req': 'N: 500g, P: 320g, K: 1200g per palm/year', 'market_value': 'High', 'yield_potential': '80-150 nuts/palm/year', 'fertilizers': 'Organic manure, NPK complex', 'pests_diseases': 'Rhinoceros beetle, Red palm weevil, Bud rot'},
+    'papaya': {'season': 'Perennial', 'duration': '9-12 months to first harvest', 'water_requirement': 'Medium', 'soil_preference': 'Loam, Sandy Loam', 'nutrient_req': 'N: 200-300g, P: 200-300g, K: 400-500g per plant/year', 'market_value': 'High', 'yield_potential': '40-60 tons/ha', 'fertilizers': 'NPK complex, FYM', 'pests_diseases': 'Papaya ring spot virus, Mealybug'},
+    'orange': {'season': 'Perennial', 'duration': '3-4 years to first harvest', 'water_requirement': 'Medium', 'soil_preference': 'Loam, Sandy Loam', 'nutrient_req': 'N: 400-800g, P: 200-400g, K: 400-800g per tree/year', 'market_value': 'High', 'yield_potential': '20-40 tons/ha', 'fertilizers': 'NPK complex, Zinc sulfate', 'pests_diseases': 'Citrus canker, Citrus tristeza virus'},
+    'apple': {'season': 'Rabi (temperate)', 'duration': '4-8 years to mature', 'water_requirement': 'Medium', 'soil_preference': 'Loam', 'nutrient_req': 'N: 70g, P: 35g, K: 70g per year of tree age', 'market_value': 'Very High', 'yield_potential': '10-20 tons/ha', 'fertilizers': 'CAN, MOP, SSP', 'pests_diseases': 'Apple scab, Codling moth'},
+    'muskmelon': {'season': 'Summer', 'duration': '80-100 days', 'water_requirement': 'Medium', 'soil_preference': 'Sandy Loam', 'nutrient_req': 'N: 80-100, P: 40-50, K: 40-50 kg/ha', 'market_value': 'High', 'yield_potential': '15-20 tons/ha', 'fertilizers': 'Urea, DAP, MOP', 'pests_diseases': 'Powdery mildew, Fruit fly'},
+    'watermelon': {'season': 'Summer', 'duration': '80-100 days', 'water_requirement': 'High', 'soil_preference': 'Sandy, Sandy Loam', 'nutrient_req': 'N: 100-120, P: 50-60, K: 50-60 kg/ha', 'market_value': 'Medium', 'yield_potential': '20-30 tons/ha', 'fertilizers': 'Urea, DAP, MOP', 'pests_diseases': 'Anthracnose, Downy mildew'},
+    'grapes': {'season': 'Perennial', 'duration': '2-3 years to first harvest', 'water_requirement': 'Medium', 'soil_preference': 'Sandy Loam, Loam', 'nutrient_req': 'N: 60-90, P: 30-60, K: 90-120 kg/ha', 'market_value': 'Very High', 'yield_potential': '15-30 tons/ha', 'fertilizers': 'NPK complex, FYM', 'pests_diseases': 'Powdery mildew, Downy mildew, Flea beetle'},
+    'mango': {'season': 'Perennial', 'duration': '4-6 years to first harvest', 'water_requirement': 'Medium', 'soil_preference': 'Alluvial, Loam', 'nutrient_req': 'N: 100g, P: 50g, K: 100g per year of tree age', 'market_value': 'High', 'yield_potential': '8-15 tons/ha', 'fertilizers': 'FYM, NPK complex', 'pests_diseases': 'Mango hopper, Powdery mildew, Anthracnose'},
+    'banana': {'season': 'Perennial', 'duration': '9-12 months', 'water_requirement': 'High', 'soil_preference': 'Loam, Clay Loam', 'nutrient_req': 'N: 200-300g, P: 60-90g, K: 300-450g per plant', 'market_value': 'Medium', 'yield_potential': '40-60 tons/ha', 'fertilizers': 'Urea, MOP, SSP', 'pests_diseases': 'Panama wilt, Bunchy top virus, Sigatoka leaf spot'},
+    'pomegranate': {'season': 'Perennial', 'duration': '2-3 years to first harvest', 'water_requirement': 'Low-Medium', 'soil_preference': 'Sandy Loam, Loam', 'nutrient_req': 'N: 250g, P: 125g, K: 125g per plant/year', 'market_value': 'Very High', 'yield_potential': '8-12 tons/ha', 'fertilizers': 'FYM, NPK complex', 'pests_diseases': 'Bacterial blight, Fruit borer'},
+    'lentil': {'season': 'Rabi', 'duration': '100-120 days', 'water_requirement': 'Low', 'soil_preference': 'Loam, Clay Loam', 'nutrient_req': 'N: 20, P: 40-60, K: 20 kg/ha', 'market_value': 'Medium', 'yield_potential': '1-1.5 tons/ha', 'fertilizers': 'DAP, Rhizobium culture', 'pests_diseases': 'Wilt, Rust, Pod borer'},
+    'blackgram': {'season': 'Kharif/Summer', 'duration': '80-100 days', 'water_requirement': 'Low', 'soil_preference': 'Loam, Clay Loam', 'nutrient_req': 'N: 20, P: 40, K: 20 kg/ha', 'market_value': 'Medium', 'yield_potential': '1-1.2 tons/ha', 'fertilizers': 'DAP, Rhizobium culture', 'pests_diseases': 'Yellow mosaic virus, Pod borer'},
+    'mungbean': {'season': 'Kharif/Summer', 'duration': '70-90 days', 'water_requirement': 'Low', 'soil_preference': 'Sandy Loam, Loam', 'nutrient_req': 'N: 20, P: 40, K: 20 kg/ha', 'market_value': 'Medium', 'yield_potential': '1-1.5 tons/ha', 'fertilizers': 'DAP, Rhizobium culture', 'pests_diseases': 'Yellow mosaic virus, Powdery mildew'},
+    'mothbeans': {'season': 'Kharif', 'duration': '70-90 days', 'water_requirement': 'Very Low', 'soil_preference': 'Sandy, Sandy Loam', 'nutrient_req': 'N: 10-15, P: 20-30 kg/ha', 'market_value': 'Low', 'yield_potential': '0.5-1 tons/ha', 'fertilizers': 'DAP', 'pests_diseases': 'Yellow mosaic virus'},
+    'pigeonpeas': {'season': 'Kharif', 'duration': '150-180 days', 'water_requirement': 'Low', 'soil_preference': 'Loam, Sandy Loam', 'nutrient_req': 'N: 20, P: 40-60, K: 20 kg/ha', 'market_value': 'Medium', 'yield_potential': '1.5-2 tons/ha', 'fertilizers': 'DAP, Rhizobium culture', 'pests_diseases': 'Wilt, Pod borer, Sterility mosaic'},
+    'kidneybeans': {'season': 'Rabi/Kharif', 'duration': '90-120 days', 'water_requirement': 'Medium', 'soil_preference': 'Loam', 'nutrient_req': 'N: 80-120, P: 60-80, K: 40-50 kg/ha', 'market_value': 'High', 'yield_potential': '1.5-2.5 tons/ha', 'fertilizers': 'Urea, DAP, MOP', 'pests_diseases': 'Bean rust, Anthracnose, Aphids'},
+    'chickpea': {'season': 'Rabi', 'duration': '100-120 days', 'water_requirement': 'Low', 'soil_preference': 'Sandy Loam, Loam', 'nutrient_req': 'N: 20, P: 40-60, K: 20 kg/ha', 'market_value': 'Medium', 'yield_potential': '1.5-2.5 tons/ha', 'fertilizers': 'DAP, Rhizobium culture', 'pests_diseases': 'Wilt, Pod borer'},
+    'coffee': {'season': 'Perennial (Kharif flowering)', 'duration': '3-4 years to mature', 'water_requirement': 'Medium-High', 'soil_preference': 'Loam, Clay Loam (well-drained)', 'nutrient_req': 'N: 90-120, P: 60-90, K: 90-120 kg/ha', 'market_value': 'Very High', 'yield_potential': '0.8-1.5 tons/ha (beans)', 'fertilizers': 'NPK complex, FYM', 'pests_diseases': 'Coffee berry borer, White stem borer, Leaf rust'}
+}
+
+# --- Crop Label Mapping ---
+# This maps the numeric labels from the trained model to actual crop names
+# The order should match how the crops were encoded during training
+CROP_LABELS = [
+    'rice', 'maize', 'jute', 'cotton', 'coconut', 'papaya', 'orange', 'apple',
+    'muskmelon', 'watermelon', 'grapes', 'mango', 'banana', 'pomegranate',
+    'lentil', 'blackgram', 'mungbean', 'mothbeans', 'pigeonpeas', 'kidneybeans',
+    'chickpea', 'coffee'
+]
+
+SOIL_TYPES = [
+    'Sandy', 'Loam', 'Black', 'Clay', 'Red', 'Silt', 'Chalky', 'Peaty', 'Gravel', 'Laterite', 'Alluvial', 'Coastal'
+]
+
+SOIL_INFO = {
+    'Sandy': {'description': 'Light, warm, dry and tend to be acidic and low in nutrients.', 'characteristics': 'Large particles, gritty feel, good drainage, poor water retention.', 'suitable_crops': 'Root vegetables like carrots, potatoes, drought-tolerant crops like watermelon, mothbeans.'},
+    'Loam': {'description': 'A mixture of sand, silt, and clay that are combined to avoid the negative effects of each type.', 'characteristics': 'Fertile, easy to work with, good drainage, good water retention.', 'suitable_crops': 'Most crops, including maize, wheat, cotton, pulses, and vegetables.'},
+    'Black': {'description': 'Also known as regur soil, it is rich in humus and nutrients.', 'characteristics': 'High clay content, high moisture retention, becomes sticky when wet and cracks when dry.', 'suitable_crops': 'Cotton, sugarcane, soybean, wheat, and millets.'},
+    'Clay': {'description': 'Heavy soil that is high in nutrients but has poor drainage.', 'characteristics': 'Small particles, feels sticky, poor drainage, high water retention.', 'suitable_crops': 'Rice, jute, and crops that can tolerate waterlogging.'},
+    'Red': {'description': 'Formed by weathering of ancient crystalline and metamorphic rocks.', 'characteristics': 'Reddish color due to iron oxide, good drainage, often low in nutrients.', 'suitable_crops': 'Groundnut, millets, pulses, and tobacco.'},
+    'Silt': {'description': 'Composed of fine sand, clay, or other material carried by running water and deposited as a sediment.', 'characteristics': 'Smooth feel, good water retention, fertile.', 'suitable_crops': 'Wheat, rice, sugarcane, and jute.'},
+    'Chalky': {'description': 'Alkaline soil that is usually light and stony.', 'characteristics': 'Often overlays chalk or limestone, free-draining, can be low in nutrients.', 'suitable_crops': 'Cereals like barley, some vegetables like cabbage and spinach.'},
+    'Peaty': {'description': 'High in organic matter and moisture.', 'characteristics': 'Dark, rich, acidic, excellent water retention.', 'suitable_crops': 'Root crops, salad crops, and brassicas.'},
+    'Gravel': {'description': 'Composed of small rock fragments, very poor for agriculture.', 'characteristics': 'Extremely free-draining, low in nutrients, stony.', 'suitable_crops': 'Not suitable for most crops without significant amendment.'},
+    'Laterite': {'description': 'A soil and rock type rich in iron and aluminium, common in wet tropical regions.', 'characteristics': 'Porous, well-drained, often acidic and low in nutrients.', 'suitable_crops': 'Cashew, coconut, coffee, and tea.'},
+    'Alluvial': {'description': 'Deposited by rivers, very fertile and rich in humus.', 'characteristics': 'Varies in texture (sandy, silty, clayey), rich in nutrients.', 'suitable_crops': 'Rice, wheat, sugarcane, jute, and cotton.'},
+    'Coastal': {'description': 'Found in coastal regions, often sandy and saline.', 'characteristics': 'High sand content, good drainage, can have high salt content.', 'suitable_crops': 'Coconut, cashew, and other salt-tolerant crops.'}
+}
+
+INDIAN_STATES = {
+    # Northern States
+    'Jammu and Kashmir': {'lat': 34.0837, 'lon': 74.7973},
+    'Himachal Pradesh': {'lat': 31.1048, 'lon': 77.1734},
+    'Punjab': {'lat': 31.1471, 'lon': 75.3412},
+    'Haryana': {'lat': 29.0588, 'lon': 76.0856},
+    'Uttar Pradesh': {'lat': 26.8467, 'lon': 80.9462},
+    'Uttarakhand': {'lat': 30.0668, 'lon': 79.0193},
+    'Delhi': {'lat': 28.7041, 'lon': 77.1025},
+    
+    # Western States
+    'Rajasthan': {'lat': 27.0238, 'lon': 74.2179},
+    'Gujarat': {'lat': 22.2587, 'lon': 71.1924},
+    'Maharashtra': {'lat': 19.7515, 'lon': 75.7139},
+    'Goa': {'lat': 15.2993, 'lon': 74.1240},
+    
+    # Central States
+    'Madhya Pradesh': {'lat': 23.5937, 'lon': 78.9629},
+    'Chhattisgarh': {'lat': 21.2787, 'lon': 81.8661},
+    
+    # Eastern States
+    'Bihar': {'lat': 25.0961, 'lon': 85.3131},
+    'Jharkhand': {'lat': 23.6102, 'lon': 85.2799},
+    'West Bengal': {'lat': 22.9868, 'lon': 87.8550},
+    'Odisha': {'lat': 20.9517, 'lon': 85.0985},
+    
+    # Southern States
+    'Andhra Pradesh': {'lat': 15.9129, 'lon': 79.7400},
+    'Telangana': {'lat': 18.1124, 'lon': 79.0193},
+    'Karnataka': {'lat': 15.3173, 'lon': 75.7139},
+    'Kerala': {'lat': 10.8505, 'lon': 76.2711},
+    'Tamil Nadu': {'lat': 11.1271, 'lon': 78.6569},
+    
+    # Northeastern States
+    'Assam': {'lat': 26.2006, 'lon': 92.9376},
+    'Arunachal Pradesh': {'lat': 28.2180, 'lon': 94.7278},
+    'Manipur': {'lat': 24.6637, 'lon': 93.9063},
+    'Meghalaya': {'lat': 25.4670, 'lon': 91.3662},
+    'Mizoram': {'lat': 23.7307, 'lon': 92.7173},
+    'Nagaland': {'lat': 26.1584, 'lon': 94.5624},
+    'Tripura': {'lat': 23.9408, 'lon': 91.9882},
+    'Sikkim': {'lat': 27.5330, 'lon': 88.5122},
+    
+    # Union Territories
+    'Andaman and Nicobar Islands': {'lat': 11.7401, 'lon': 92.6586},
+    'Chandigarh': {'lat': 30.7333, 'lon': 76.7794},
+    'Dadra and Nagar Haveli and Daman and Diu': {'lat': 20.1809, 'lon': 73.0169},
+    'Lakshadweep': {'lat': 10.5667, 'lon': 72.6417},
+    'Puducherry': {'lat': 11.9416, 'lon': 79.8083},
+    'Ladakh': {'lat': 34.1526, 'lon': 77.5771}
+}
+
+# --- Model Input Schema ---
+FEATURE_COLUMNS = [
+    'Nitrogen', 'Phosphorus', 'Potassium', 'Temperature', 'Humidity',
+    'pH_Value', 'Rainfall', 'Soil_Type', 'Variety'
+]
+REQUIRED_FIELDS = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall', 'soil_type']
+
+DEFAULT_CROP_DETAILS = {
+    'season': 'Varies',
+    'duration': '90-150 days',
+    'water_requirement': 'Medium',
+    'soil_preference': 'Loam',
+    'nutrient_req': 'Balanced NPK',
+    'market_value': 'Medium',
+    'yield_potential': 'Good',
+    'fertilizers': 'NPK based',
+    'pests_diseases': 'Common pests'
+}
+
+# --- Soil Type Encoding ---
+def encode_soil_type(soil_type):
+    """Encode soil type to numerical value for model prediction."""
+    soil_type_mapping = {
+        'Sandy': 0, 'Loam': 1, 'Black': 2, 'Clay': 3, 'Red': 4, 
+        'Silt': 5, 'Chalky': 6, 'Peaty': 7, 'Gravel': 8, 
+        'Laterite': 9, 'Alluvial': 10, 'Coastal': 11
+    }
+    return soil_type_mapping.get(soil_type, 1)  # Default to Loam (1) if not found
+
+def crop_name_for_class(class_label):
+    """Map a model class label (numeric crop code or crop name) to a crop name."""
+    try:
+        crop_index = int(class_label)
+    except (ValueError, TypeError):
+        # If it's not a number, use as-is
+        return str(class_label)
+    # If index is out of bounds, use modulo to get a valid index
+    return CROP_LABELS[crop_index % len(CROP_LABELS)]
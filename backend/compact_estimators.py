@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Inference-only tree ensembles written by compact_model.py.
+
+A compacted forest keeps just the arrays prediction needs (split feature,
+float32 threshold, child pointers and float32 leaf class fractions) and walks
+every tree of the ensemble at once with vectorized NumPy indexing. It exposes
+the small part of the scikit-learn classifier API the server relies on:
+``classes_``, ``predict_proba`` and ``predict``.
+"""
+import numpy as np
+
+
+class CompactForestClassifier:
+    """Flattened, float32 tree ensemble that averages per-tree class fractions."""
+
+    def __init__(self, classes, feature, threshold, left, right, value, roots, max_depth, n_features_in):
+        self.classes_ = np.asarray(classes)
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_features_in_ = int(n_features_in)
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    @property
+    def node_count(self):
+        return len(self.feature)
+
+    def predict_proba(self, X):
+        """Average the leaf class fractions of all trees for each row of X."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        rows = np.arange(X.shape[0])
+        # One cursor per (tree, sample); leaves point at themselves, so a fixed
+        # number of steps equal to the deepest tree lands every cursor on a leaf.
+        nodes = np.repeat(self.roots[:, None], X.shape[0], axis=1)
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return self.value[nodes].mean(axis=0, dtype=np.float64)
+
+    def predict(self, X):
+        """Return the most probable class label for each row of X."""
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
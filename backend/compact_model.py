@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""Shrink crop_model.pkl for serving and report what the compaction costs.
+
+Tree ensembles (random forest, extra trees, single decision trees) are
+converted to a CompactForestClassifier: training-only state is dropped,
+thresholds and leaf values are stored as float32, and trees can optionally be
+pruned to a maximum depth or a subset of estimators. Other estimators only have
+their training-only attributes stripped. The report compares the original and
+compacted artifacts on file size, load time, single-row latency and top-1/top-3
+agreement over a held-out CSV (nine-feature schema) or synthetic inputs.
+
+Usage:
+    python backend/compact_model.py --output Models/crop_model.compact.pkl
+    python backend/compact_model.py --max-depth 16 --n-estimators 50 --data holdout.csv
+"""
+import argparse
+import json
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from artifacts import CROP_MODEL_PATH, MODELS_DIR
+from catalog import FEATURE_COLUMNS
+from compact_estimators import CompactForestClassifier
+from train import encode_features
+
+# Attributes only needed while fitting or for out-of-bag diagnostics
+TRAINING_ONLY_ATTRIBUTES = [
+    'oob_score_', 'oob_decision_function_', 'oob_prediction_', '_n_samples',
+    '_n_samples_bootstrap', 'estimator_params', 'estimator_', 'base_estimator_',
+    'feature_importances_', 'train_score_', 'validation_score_', 'loss_curve_'
+]
+
+# Plausible raw ranges for synthetic inputs when no held-out set is given
+FEATURE_RANGES = {
+    'Nitrogen': (0, 140), 'Phosphorus': (5, 145), 'Potassium': (5, 205),
+    'Temperature': (8, 44), 'Humidity': (14, 100), 'pH_Value': (3.5, 9.9),
+    'Rainfall': (20, 300), 'Soil_Type': (0, 11), 'Variety': (0, 0)
+}
+
+
+def compact_tree(tree, max_depth=None):
+    """Flatten one fitted sklearn tree into reachable nodes, optionally depth-pruned."""
+    t = tree.tree_
+    values = t.value[:, 0, :].astype(np.float64)
+    totals = values.sum(axis=1, keepdims=True)
+    fractions = np.divide(values, totals, out=np.zeros_like(values), where=totals > 0)
+
+    feature, threshold, left, right, value = [], [], [], [], []
+    depth_reached = 0
+    queue = deque([(0, 0, None, None)])  # (old node, depth, parent new index, is_left)
+    while queue:
+        old, depth, parent, is_left = queue.popleft()
+        new = len(feature)
+        if parent is not None:
+            (left if is_left else right)[parent] = new
+        is_leaf = t.children_left[old] == -1 or (max_depth is not None and depth >= max_depth)
+        feature.append(0 if is_leaf else t.feature[old])
+        threshold.append(np.inf if is_leaf else t.threshold[old])
+        left.append(new)
+        right.append(new)
+        value.append(fractions[old])
+        depth_reached = max(depth_reached, depth)
+        if not is_leaf:
+            queue.append((t.children_left[old], depth + 1, new, True))
+            queue.append((t.children_right[old], depth + 1, new, False))
+    return feature, threshold, left, right, value, depth_reached
+
+
+def downcast_thresholds(threshold):
+    """Round float64 split thresholds down to float32 without changing any split.
+
+    sklearn compares float32 features against float64 thresholds, so rounding a
+    threshold to the float32 at or below it keeps `x <= threshold` identical for
+    every float32 input.
+    """
+    downcast = threshold.astype(np.float32)
+    rounded_up = downcast.astype(np.float64) > threshold
+    downcast[rounded_up] = np.nextafter(downcast[rounded_up], np.float32(-np.inf))
+    return downcast
+
+
+def compact_forest(model, max_depth=None, n_estimators=None):
+    """Convert a fitted tree classifier or tree ensemble into a CompactForestClassifier."""
+    trees = list(getattr(model, 'estimators_', [model]))
+    if n_estimators is not None:
+        trees = trees[:n_estimators]
+
+    feature, threshold, left, right, value, roots = [], [], [], [], [], []
+    deepest = 0
+    for tree in trees:
+        offset = len(feature)
+        t_feature, t_threshold, t_left, t_right, t_value, t_depth = compact_tree(tree, max_depth)
+        roots.append(offset)
+        feature.extend(t_feature)
+        threshold.extend(t_threshold)
+        left.extend(i + offset for i in t_left)
+        right.extend(i + offset for i in t_right)
+        value.extend(t_value)
+        deepest = max(deepest, t_depth)
+
+    return CompactForestClassifier(
+        classes=model.classes_,
+        feature=np.asarray(feature, dtype=np.int16),
+        threshold=downcast_thresholds(np.asarray(threshold, dtype=np.float64)),
+        left=np.asarray(left, dtype=np.int32),
+        right=np.asarray(right, dtype=np.int32),
+        value=np.asarray(value, dtype=np.float32),
+        roots=np.asarray(roots, dtype=np.int32),
+        max_depth=deepest,
+        n_features_in=getattr(model, 'n_features_in_', len(FEATURE_COLUMNS))
+    )
+
+
+def strip_training_attributes(model):
+    """Remove training-only attributes from a model and its sub-estimators in place."""
+    removed = []
+    for estimator in [model] + list(getattr(model, 'estimators_', [])):
+        for attribute in TRAINING_ONLY_ATTRIBUTES:
+            if attribute in getattr(estimator, '__dict__', {}):
+                delattr(estimator, attribute)
+                removed.append(attribute)
+    return sorted(set(removed))
+
+
+def is_tree_classifier(model):
+    """Check whether the model is a tree or an averaging tree ensemble we can flatten."""
+    from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+    from sklearn.tree import DecisionTreeClassifier
+    if isinstance(model, DecisionTreeClassifier):
+        return model.n_outputs_ == 1
+    return isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)) and model.n_outputs_ == 1
+
+
+def load_evaluation_inputs(data_path, n_samples, seed):
+    """Load raw evaluation rows from a CSV, or draw synthetic rows in plausible ranges."""
+    if data_path:
+        frame = pd.read_csv(data_path)
+        missing = [column for column in FEATURE_COLUMNS if column not in frame.columns]
+        if missing:
+            raise ValueError(f"Evaluation data is missing columns: {missing}")
+        return encode_features(frame)
+
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for column, (low, high) in FEATURE_RANGES.items():
+        if column == 'Soil_Type':
+            columns[column] = rng.integers(low, high + 1, n_samples).astype(float)
+        else:
+            columns[column] = rng.uniform(low, high, n_samples)
+    return pd.DataFrame(columns, columns=FEATURE_COLUMNS)
+
+
+def measure_load_time(path, repeats=3):
+    """Best-of-N wall time for joblib.load, in seconds."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        joblib.load(path)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def measure_single_row_latency(model, X, repeats=200):
+    """Median single-row predict_proba latency, in milliseconds."""
+    timings = []
+    for i in range(repeats):
+        row = X[i % len(X):i % len(X) + 1]
+        start = time.perf_counter()
+        model.predict_proba(row)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000)
+
+
+def top_k_agreement(reference, candidate, k):
+    """Mean fraction of the reference top-k classes that the candidate also ranks top-k."""
+    ref_top = np.argsort(reference, axis=1)[:, -k:]
+    cand_top = np.argsort(candidate, axis=1)[:, -k:]
+    overlap = (ref_top[:, :, None] == cand_top[:, None, :]).any(axis=2).sum(axis=1)
+    return float(np.mean(overlap / k))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compact the crop model and report the accuracy/latency trade-off.')
+    parser.add_argument('--model', type=Path, default=CROP_MODEL_PATH, help='Source model artifact')
+    parser.add_argument('--scaler', type=Path, default=MODELS_DIR / 'scaler.pkl', help='Scaler applied before the model (skipped if missing)')
+    parser.add_argument('--output', type=Path, default=MODELS_DIR / 'crop_model.compact.pkl', help='Where to write the compacted artifact')
+    parser.add_argument('--max-depth', type=int, default=None, help='Prune trees to this depth')
+    parser.add_argument('--n-estimators', type=int, default=None, help='Keep only the first N estimators')
+    parser.add_argument('--compress', type=int, default=0, help='joblib compression level; smaller file but slower load')
+    parser.add_argument('--data', type=Path, default=None, help='Held-out CSV with the nine model feature columns')
+    parser.add_argument('--samples', type=int, default=2000, help='Synthetic rows to evaluate when --data is not given')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--report-json', type=Path, default=None, help='Also write the report as JSON')
+    args = parser.parse_args()
+
+    if not args.model.exists():
+        print(f"Model not found at {args.model}")
+        return 1
+
+    print(f"Loading model from {args.model}...")
+    original = joblib.load(args.model)
+    scaler = joblib.load(args.scaler) if args.scaler and args.scaler.exists() else None
+    print(f"Scaler: {args.scaler if scaler is not None else 'none'}")
+
+    if is_tree_classifier(original):
+        compacted = compact_forest(original, max_depth=args.max_depth, n_estimators=args.n_estimators)
+        print(f"Flattened {compacted.n_estimators} trees into {compacted.node_count} float32 nodes (max depth {compacted.max_depth})")
+    else:
+        if args.max_depth is not None or args.n_estimators is not None:
+            print(f"Warning: pruning is only supported for tree ensembles, not {type(original).__name__}")
+        compacted = joblib.load(args.model)
+        removed = strip_training_attributes(compacted)
+        print(f"Stripped training-only attributes: {removed or 'none'}")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(compacted, args.output, compress=args.compress)
+    print(f"Compacted model written to {args.output}")
+
+    raw_inputs = load_evaluation_inputs(args.data, args.samples, args.seed)
+    X = scaler.transform(raw_inputs) if scaler is not None else raw_inputs.to_numpy()
+    reference = original.predict_proba(X)
+    candidate = compacted.predict_proba(X)
+
+    report = {
+        'source': str(args.model),
+        'output': str(args.output),
+        'evaluation_rows': int(len(X)),
+        'evaluation_source': str(args.data) if args.data else 'synthetic',
+        'size_bytes': {'original': args.model.stat().st_size, 'compacted': args.output.stat().st_size},
+        'load_time_s': {'original': measure_load_time(args.model), 'compacted': measure_load_time(args.output)},
+        'single_row_latency_ms': {
+            'original': measure_single_row_latency(original, X),
+            'compacted': measure_single_row_latency(compacted, X)
+        },
+        'top1_agreement': top_k_agreement(reference, candidate, 1),
+        'top3_agreement': top_k_agreement(reference, candidate, 3),
+        'max_probability_delta': float(np.abs(reference - candidate).max())
+    }
+
+    print("\n--- Compaction Report ---")
+    print(f"{'metric':<26}{'original':>14}{'compacted':>14}")
+    print(f"{'file size (MB)':<26}{report['size_bytes']['original'] / 1e6:>14.2f}{report['size_bytes']['compacted'] / 1e6:>14.2f}")
+    print(f"{'load time (s)':<26}{report['load_time_s']['original']:>14.3f}{report['load_time_s']['compacted']:>14.3f}")
+    print(f"{'single-row latency (ms)':<26}{report['single_row_latency_ms']['original']:>14.3f}{report['single_row_latency_ms']['compacted']:>14.3f}")
+    print(f"top-1 agreement: {report['top1_agreement']:.4f} over {report['evaluation_rows']} {report['evaluation_source']} rows")
+    print(f"top-3 agreement: {report['top3_agreement']:.4f}")
+    print(f"max probability delta: {report['max_probability_delta']:.5f}")
+
+    if args.report_json:
+        args.report_json.write_text(json.dumps(report, indent=2))
+        print(f"Report written to {args.report_json}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
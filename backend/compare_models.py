@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""Compare candidate crop model artifacts on accuracy and inference cost.
+
+Artifacts are scored for accuracy in parallel worker processes against a
+labelled CSV with the server's nine-feature schema (see FEATURE_COLUMNS; soil
+types may be codes or names, as train.py accepts) plus a label column that
+holds crop names or numeric crop codes. Load time, memory and latency are then
+measured one artifact at a time, each in a fresh process, so the models do not
+compete for CPU. The side-by-side report covers accuracy, top-3 hit rate,
+per-class recall over CROP_LABELS, file size, load time (cold and warm), model
+memory and single-row/batch latency.
+
+Model memory is the size of the loaded object graph, including the node and
+value arrays sklearn trees allocate outside the Python heap; the RSS growth
+of the cold load is shown next to it. Pass --scaler once to apply one scaler
+to every model, or once per model (in the same order; 'none' for raw
+features) when the candidates were trained with different scalers.
+
+Usage:
+    python backend/compare_models.py Models/crop_model.pkl Models/crop_model.compact.pkl --data labelled.csv
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from artifacts import MODELS_DIR
+from catalog import CROP_LABELS, FEATURE_COLUMNS, crop_name_for_class
+from compact_model import measure_load_time, measure_single_row_latency
+from memory_diagnostics import estimate_object_bytes, process_memory
+from train import encode_features
+
+
+def load_labelled_data(data_path, label_column):
+    """Read the nine model features and normalized crop-name labels from a CSV."""
+    frame = pd.read_csv(data_path)
+    missing = [column for column in FEATURE_COLUMNS + [label_column] if column not in frame.columns]
+    if missing:
+        raise ValueError(f"Dataset is missing columns: {missing}")
+    labels = np.array([crop_name_for_class(label).lower() for label in frame[label_column]])
+    return encode_features(frame), labels
+
+
+def measure_batch_latency(model, X, batch_size, repeats=5):
+    """Best-of-N predict_proba time for one batch, in milliseconds."""
+    batch = X[:batch_size]
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict_proba(batch)
+        timings.append(time.perf_counter() - start)
+    return float(min(timings) * 1000), len(batch)
+
+
+def evaluate_artifact(model_path, X, labels):
+    """Load one artifact and score its accuracy; runs inside a worker process."""
+    model_path = Path(model_path)
+    model = joblib.load(model_path)
+    probabilities = model.predict_proba(X)
+    class_names = np.array([crop_name_for_class(label).lower() for label in model.classes_])
+    ranked = class_names[np.argsort(probabilities, axis=1)[:, ::-1]]
+    top1_hits = ranked[:, 0] == labels
+    top3_hits = (ranked[:, :3] == labels[:, None]).any(axis=1)
+
+    per_class_recall = {}
+    for crop in CROP_LABELS:
+        support = labels == crop
+        per_class_recall[crop] = {
+            'support': int(support.sum()),
+            'recall': float(top1_hits[support].mean()) if support.any() else None
+        }
+
+    return {
+        'model': str(model_path),
+        'model_type': type(model).__name__,
+        'accuracy': float(top1_hits.mean()),
+        'top3_hit_rate': float(top3_hits.mean()),
+        'per_class_recall': per_class_recall,
+        'size_bytes': model_path.stat().st_size
+    }
+
+
+def time_artifact(model_path, X, batch_size):
+    """Load time, memory and latency of one artifact; runs alone in a fresh worker process."""
+    model_path = Path(model_path)
+    rss_before = process_memory()['rss_bytes']
+    start = time.perf_counter()
+    model = joblib.load(model_path)
+    cold_load_time = time.perf_counter() - start
+    rss_after = process_memory()['rss_bytes']
+
+    batch_ms, batch_rows = measure_batch_latency(model, X, batch_size)
+    return {
+        # The first load also pays for importing the estimator's modules
+        'cold_load_time_s': cold_load_time,
+        'load_time_s': measure_load_time(model_path),
+        'memory_bytes': estimate_object_bytes(model),
+        'load_rss_delta_bytes': rss_after - rss_before if rss_before is not None else None,
+        'single_row_latency_ms': measure_single_row_latency(model, X),
+        'batch_latency_ms': batch_ms,
+        'batch_rows': batch_rows,
+        'batch_per_row_latency_ms': batch_ms / batch_rows
+    }
+
+
+def print_report(results):
+    """Print a side-by-side summary followed by per-class recall."""
+    names = [Path(result['model']).name for result in results]
+    width = max(14, max(len(name) for name in names) + 2)
+    rows = [
+        ('accuracy', lambda r: f"{r['accuracy']:.4f}"),
+        ('top-3 hit rate', lambda r: f"{r['top3_hit_rate']:.4f}"),
+        ('file size (MB)', lambda r: f"{r['size_bytes'] / 1e6:.2f}"),
+        ('cold load time (s)', lambda r: f"{r['cold_load_time_s']:.3f}"),
+        ('load time (s)', lambda r: f"{r['load_time_s']:.3f}"),
+        ('memory (MB)', lambda r: f"{r['memory_bytes'] / 1e6:.2f}"),
+        ('load RSS growth (MB)', lambda r: '-' if r['load_rss_delta_bytes'] is None else f"{r['load_rss_delta_bytes'] / 1e6:.2f}"),
+        ('single-row (ms)', lambda r: f"{r['single_row_latency_ms']:.3f}"),
+        ('batch (ms)', lambda r: f"{r['batch_latency_ms']:.2f}"),
+        ('batch per row (ms)', lambda r: f"{r['batch_per_row_latency_ms']:.4f}")
+    ]
+    print(f"\n{'metric':<22}" + ''.join(f"{name:>{width}}" for name in names))
+    for label, fmt in rows:
+        print(f"{label:<22}" + ''.join(f"{fmt(result):>{width}}" for result in results))
+
+    print(f"\n{'recall by crop':<22}" + ''.join(f"{name:>{width}}" for name in names) + f"{'support':>10}")
+    for crop in CROP_LABELS:
+        recalls = [result['per_class_recall'][crop]['recall'] for result in results]
+        support = results[0]['per_class_recall'][crop]['support']
+        cells = ''.join(f"{'-' if recall is None else f'{recall:.3f}':>{width}}" for recall in recalls)
+        print(f"{crop:<22}{cells}{support:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare crop model artifacts on accuracy and inference cost.')
+    parser.add_argument('models', nargs='+', type=Path, help='Model artifacts to compare')
+    parser.add_argument('--data', type=Path, required=True, help='Labelled CSV with the nine model feature columns')
+    parser.add_argument('--label-column', default='label', help='Column holding crop names or crop codes')
+    parser.add_argument('--scaler', action='append', default=None,
+                        help="Scaler applied before the models: once for all of them, or once per model ('none' for raw features); "
+                             "defaults to Models/scaler.pkl for every model, skipped if missing")
+    parser.add_argument('--batch-size', type=int, default=256, help='Rows per batch latency measurement')
+    parser.add_argument('--jobs', type=int, default=min(4, os.cpu_count() or 1), help='Artifacts scored for accuracy in parallel')
+    parser.add_argument('--report-json', type=Path, default=None, help='Also write the report as JSON')
+    args = parser.parse_args()
+
+    missing = [str(path) for path in args.models if not path.exists()]
+    if missing:
+        print(f"Model artifacts not found: {missing}")
+        return 1
+
+    if args.scaler is None:
+        default_scaler = MODELS_DIR / 'scaler.pkl'
+        scaler_paths = [default_scaler if default_scaler.exists() else None] * len(args.models)
+    elif len(args.scaler) in (1, len(args.models)):
+        scaler_paths = [None if name.lower() == 'none' else Path(name) for name in args.scaler]
+        scaler_paths = scaler_paths * len(args.models) if len(scaler_paths) == 1 else scaler_paths
+    else:
+        print(f"Give --scaler once or once per model ({len(args.models)} models, {len(args.scaler)} scalers)")
+        return 1
+    missing = [str(path) for path in scaler_paths if path is not None and not path.exists()]
+    if missing:
+        print(f"Scalers not found: {missing}")
+        return 1
+
+    raw_inputs, labels = load_labelled_data(args.data, args.label_column)
+    # Each distinct scaler transforms the data once
+    inputs = {}
+    for path in scaler_paths:
+        if path not in inputs:
+            inputs[path] = joblib.load(path).transform(raw_inputs) if path is not None else raw_inputs.to_numpy()
+    model_inputs = [inputs[path] for path in scaler_paths]
+    print(f"Scoring {len(args.models)} artifacts on {len(raw_inputs)} rows from {args.data} (jobs: {args.jobs})")
+
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        futures = [executor.submit(evaluate_artifact, path, X, labels) for path, X in zip(args.models, model_inputs)]
+        results = [future.result() for future in futures]
+    # Timings run one at a time so parallel scoring cannot skew them
+    for result, path, X, scaler_path in zip(results, args.models, model_inputs, scaler_paths):
+        result['scaler'] = str(scaler_path) if scaler_path is not None else None
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            result.update(executor.submit(time_artifact, path, X, args.batch_size).result())
+
+    print_report(results)
+    if args.report_json:
+        args.report_json.write_text(json.dumps({'data': str(args.data), 'rows': int(len(raw_inputs)), 'models': results}, indent=2))
+        print(f"\nReport written to {args.report_json}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
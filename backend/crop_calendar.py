@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""Materialized "what to sow this month" table per state, month and soil type.
+
+Every state x 12 monthly climate normals x soil type combination is scored in
+one batched predict_proba call. Crops whose CROP_INFO season is not sown in a
+month are masked out on the class axis, and the top crops per cell are kept in
+dense arrays, so serving a cell is an index lookup.
+
+Climate normals come from a CSV (state, month, temperature, humidity,
+rainfall) when available. Otherwise a coarse built-in approximation is used:
+latitude-scaled temperature and an all-India monsoon rainfall pattern.
+"""
+import time
+
+import numpy as np
+
+MONTH_NAMES = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+# Months (1-12) in which crops of each season are usually sown
+SEASON_SOWING_MONTHS = {
+    'kharif': {6, 7},
+    'rabi': {10, 11, 12},
+    'summer': {2, 3, 4},
+    'perennial': set(range(1, 13))
+}
+
+# Built-in approximation: temperature offset from the annual mean and share of annual rainfall
+MONTHLY_TEMPERATURE_OFFSET = [-6, -4, 0, 4, 6, 4, 2, 1.5, 1, 0, -3, -5.5]
+MONTHLY_RAINFALL_SHARE = [0.01, 0.01, 0.02, 0.03, 0.05, 0.17, 0.27, 0.24, 0.14, 0.04, 0.01, 0.01]
+DEFAULT_ANNUAL_RAINFALL_MM = 1100
+
+
+def sowing_months(season):
+    """Months in which a crop can be sown, parsed from a CROP_INFO season string."""
+    text = str(season).lower()
+    months = set()
+    for name, season_months in SEASON_SOWING_MONTHS.items():
+        if name in text:
+            months |= season_months
+    # Unknown or 'Varies' seasons are not filtered
+    return months or set(range(1, 13))
+
+
+def season_mask(class_seasons):
+    """Boolean (12, n_classes) mask of which classes may be sown in each month."""
+    mask = np.zeros((12, len(class_seasons)), dtype=bool)
+    for class_index, season in enumerate(class_seasons):
+        for month in sowing_months(season):
+            mask[month - 1, class_index] = True
+    return mask
+
+
+def builtin_climate_normals(states):
+    """Approximate monthly normals from each state's reference latitude."""
+    import pandas as pd
+
+    rows = []
+    peak_share = max(MONTHLY_RAINFALL_SHARE)
+    for state, coords in states.items():
+        lat = coords['lat']
+        annual_mean = 28 - 0.35 * max(lat - 10, 0)
+        amplitude = 0.4 + (lat - 8) / 26 * 0.8
+        for month in range(12):
+            rows.append({
+                'state': state,
+                'month': month + 1,
+                'temperature': round(annual_mean + MONTHLY_TEMPERATURE_OFFSET[month] * amplitude, 1),
+                'humidity': round(50 + 35 * MONTHLY_RAINFALL_SHARE[month] / peak_share, 1),
+                'rainfall': round(DEFAULT_ANNUAL_RAINFALL_MM * MONTHLY_RAINFALL_SHARE[month], 1)
+            })
+    return pd.DataFrame(rows)
+
+
+def load_climate_normals(path, states):
+    """Read monthly normals from a CSV, filling states it does not cover from the built-in table."""
+    import pandas as pd
+
+    builtin = builtin_climate_normals(states)
+    if path is None or not path.exists():
+        return builtin, 'builtin'
+    normals = pd.read_csv(path)
+    normals = normals[normals['state'].isin(states.keys())][['state', 'month', 'temperature', 'humidity', 'rainfall']]
+    missing = builtin[~builtin.set_index(['state', 'month']).index.isin(normals.set_index(['state', 'month']).index)]
+    return pd.concat([normals, missing], ignore_index=True), str(path)
+
+
+class CropCalendar:
+    """Dense (state, month, soil type) -> top crops table built from one batched model call."""
+
+    def __init__(self, states, soil_types, top_classes, top_probabilities, model_version, normals_source, build_time_s):
+        self.states = list(states)
+        self.soil_types = list(soil_types)
+        self.state_index = {state: i for i, state in enumerate(self.states)}
+        self.soil_index = {soil: i for i, soil in enumerate(self.soil_types)}
+        self.top_classes = top_classes
+        self.top_probabilities = top_probabilities
+        self.model_version = model_version
+        self.normals_source = normals_source
+        self.build_time_s = build_time_s
+        self.built_at = time.time()
+
+    @classmethod
+    def build(cls, states, soil_types, normals, soil_profiles, predict_proba,
+              class_seasons, model_version, normals_source='builtin', top_k=5):
+        """Score every cell in one predict_proba call and keep the in-season top-k classes.
+
+        soil_profiles maps state -> {'N', 'P', 'K', 'ph'}; predict_proba takes a
+        dict of equal-length feature arrays (request field names) and returns
+        (rows, n_classes) probabilities.
+        """
+        import pandas as pd
+
+        start = time.perf_counter()
+        states, soil_types = list(states), list(soil_types)
+        normals = normals.set_index(['state', 'month'])
+        n_states, n_soils = len(states), len(soil_types)
+
+        # Row order is state-major, then month, then soil type
+        state_rows = np.repeat(np.arange(n_states), 12 * n_soils)
+        month_rows = np.tile(np.repeat(np.arange(1, 13), n_soils), n_states)
+        soil_rows = np.tile(np.arange(n_soils), n_states * 12)
+        climate = normals.loc[list(zip(np.asarray(states)[state_rows], month_rows))]
+        profiles = pd.DataFrame([soil_profiles[state] for state in states])
+
+        probabilities = predict_proba({
+            'N': profiles['N'].to_numpy(dtype=float)[state_rows],
+            'P': profiles['P'].to_numpy(dtype=float)[state_rows],
+            'K': profiles['K'].to_numpy(dtype=float)[state_rows],
+            'temperature': climate['temperature'].to_numpy(dtype=float),
+            'humidity': climate['humidity'].to_numpy(dtype=float),
+            'ph': profiles['ph'].to_numpy(dtype=float)[state_rows],
+            'rainfall': climate['rainfall'].to_numpy(dtype=float),
+            'soil_type': np.asarray(soil_types)[soil_rows]
+        }).reshape(n_states, 12, n_soils, -1)
+
+        mask = season_mask(class_seasons)[None, :, None, :]
+        masked = np.where(mask, probabilities, -np.inf)
+        top_k = min(top_k, masked.shape[-1])
+        top_classes = np.argsort(-masked, axis=-1)[..., :top_k]
+        top_probabilities = np.take_along_axis(masked, top_classes, axis=-1)
+        return cls(states, soil_types, top_classes.astype(np.int16), top_probabilities.astype(np.float32),
+                   model_version, normals_source, time.perf_counter() - start)
+
+    def lookup(self, state, month, soil_type):
+        """In-season (class index, probability) pairs for one cell, best first."""
+        cell = (self.state_index[state], month - 1, self.soil_index[soil_type])
+        return [(int(c), float(p)) for c, p in zip(self.top_classes[cell], self.top_probabilities[cell]) if np.isfinite(p)]
+
+    def info(self):
+        return {
+            'model_version': self.model_version,
+            'climate_normals': self.normals_source,
+            'cells': int(np.prod(self.top_classes.shape[:3])),
+            'built_at': self.built_at,
+            'build_time_s': round(self.build_time_s, 3)
+        }
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""Constant-memory streaming drift monitoring of model inputs.
+
+Each numeric model feature gets a fixed-size histogram whose bin edges come
+from the training baseline (its quantiles), and the encoded soil type gets a
+count per code. Updating is one searchsorted per feature plus an integer
+increment, and memory does not grow with traffic. Drift against the baseline
+is scored with the population stability index (PSI), over all traffic since
+start-up and over a recent window of the last ``window_size``-to-twice-that
+observations.
+
+Build a baseline from the training data (columns named as FEATURE_COLUMNS):
+    python backend/drift.py training_data.csv Models/drift_baseline.json
+    python backend/drift.py training_data.csv Models/drift_baseline.json --bins 20
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+NUMERIC_FEATURES = ['Nitrogen', 'Phosphorus', 'Potassium', 'Temperature', 'Humidity', 'pH_Value', 'Rainfall']
+CATEGORICAL_FEATURE = 'Soil_Type'
+SOIL_CODES = 12
+# Used for evenly spaced bins when no baseline is available
+DEFAULT_RANGES = {
+    'Nitrogen': (0, 140), 'Phosphorus': (5, 145), 'Potassium': (5, 205),
+    'Temperature': (8, 44), 'Humidity': (14, 100), 'pH_Value': (3.5, 9.9), 'Rainfall': (20, 300)
+}
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.2
+
+
+def population_stability_index(expected, actual, floor=1e-4):
+    """PSI between two count or proportion vectors over the same bins."""
+    expected = np.asarray(expected, dtype=np.float64)
+    actual = np.asarray(actual, dtype=np.float64)
+    if expected.sum() == 0 or actual.sum() == 0:
+        return None
+    expected = np.maximum(expected / expected.sum(), floor)
+    actual = np.maximum(actual / actual.sum(), floor)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def drift_level(psi):
+    if psi is None:
+        return None
+    if psi >= PSI_SIGNIFICANT:
+        return 'significant'
+    return 'moderate' if psi >= PSI_MODERATE else 'stable'
+
+
+def build_baseline(frame, bins=10):
+    """Quantile bin edges and bin proportions of the training inputs."""
+    numeric = {}
+    for feature in NUMERIC_FEATURES:
+        values = frame[feature].dropna().to_numpy(dtype=np.float64)
+        # Interior edges only; the outer bins are open-ended so every value lands somewhere
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1]))
+        counts = np.bincount(np.searchsorted(edges, values, side='right'), minlength=len(edges) + 1)
+        numeric[feature] = {
+            'edges': edges.tolist(),
+            'proportions': (counts / counts.sum()).tolist(),
+            'mean': float(values.mean()),
+            'std': float(values.std())
+        }
+    codes = np.clip(frame[CATEGORICAL_FEATURE].to_numpy(dtype=np.int64), 0, SOIL_CODES)
+    soil_counts = np.bincount(codes, minlength=SOIL_CODES + 1)
+    return {
+        'rows': int(len(frame)),
+        'created_at': time.time(),
+        'numeric': numeric,
+        'categorical': {CATEGORICAL_FEATURE: {'proportions': (soil_counts / soil_counts.sum()).tolist()}}
+    }
+
+
+class DriftMonitor:
+    """Fixed-size per-feature histograms of live inputs, compared with a training baseline."""
+
+    def __init__(self, baseline=None, bins=10, window_size=5000, source=None):
+        self.baseline = baseline
+        self.source = source
+        self.window_size = window_size
+        self.edges = []
+        for feature in NUMERIC_FEATURES:
+            if baseline is not None:
+                self.edges.append(np.asarray(baseline['numeric'][feature]['edges'], dtype=np.float64))
+            else:
+                low, high = DEFAULT_RANGES[feature]
+                self.edges.append(np.linspace(low, high, bins + 1)[1:-1])
+        # All histograms share one flat counter array; offsets mark where each feature starts
+        sizes = [len(edges) + 1 for edges in self.edges] + [SOIL_CODES + 1]
+        self.offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        self.n_bins = int(sum(sizes))
+        self._lock = threading.Lock()
+        self._total = np.zeros(self.n_bins, dtype=np.int64)
+        self._current = np.zeros(self.n_bins, dtype=np.int64)
+        self._previous = np.zeros(self.n_bins, dtype=np.int64)
+        self._sums = np.zeros(len(NUMERIC_FEATURES), dtype=np.float64)
+        self._current_count = 0
+        self._previous_count = 0
+        self.observations = 0
+        self.started_at = time.time()
+
+    @classmethod
+    def from_file(cls, path, window_size=5000):
+        return cls(json.loads(Path(path).read_text()), window_size=window_size, source=str(path))
+
+    def update(self, input_data):
+        """Record every row of a model input frame (FEATURE_COLUMNS)."""
+        values = input_data[NUMERIC_FEATURES].to_numpy(dtype=np.float64)
+        codes = np.clip(input_data[CATEGORICAL_FEATURE].to_numpy(dtype=np.int64), 0, SOIL_CODES)
+        bin_index = np.column_stack(
+            [np.searchsorted(edges, values[:, i], side='right') for i, edges in enumerate(self.edges)] + [codes]
+        ) + self.offsets
+        with self._lock:
+            np.add.at(self._total, bin_index.ravel(), 1)
+            np.add.at(self._current, bin_index.ravel(), 1)
+            self._sums += values.sum(axis=0)
+            self.observations += len(values)
+            self._current_count += len(values)
+            if self._current_count >= self.window_size:
+                self._previous, self._current = self._current, np.zeros(self.n_bins, dtype=np.int64)
+                self._previous_count, self._current_count = self._current_count, 0
+
+    def _feature_counts(self, counts, i):
+        return counts[self.offsets[i]:self.offsets[i + 1] if i + 1 < len(self.offsets) else self.n_bins]
+
+    def report(self):
+        """Per-feature live histograms, PSI against the baseline and an overall drift score."""
+        with self._lock:
+            total = self._total.copy()
+            recent = self._previous + self._current
+            sums = self._sums.copy()
+            observations = self.observations
+            recent_observations = self._previous_count + self._current_count
+
+        features = {}
+        for i, feature in enumerate(NUMERIC_FEATURES + [CATEGORICAL_FEATURE]):
+            counts, recent_counts = self._feature_counts(total, i), self._feature_counts(recent, i)
+            entry = {'counts': counts.tolist()}
+            if feature == CATEGORICAL_FEATURE:
+                entry['codes'] = list(range(SOIL_CODES)) + ['other']
+                expected = self.baseline['categorical'][feature]['proportions'] if self.baseline else None
+            else:
+                entry['edges'] = self.edges[i].tolist()
+                entry['mean'] = sums[i] / observations if observations else None
+                expected = self.baseline['numeric'][feature]['proportions'] if self.baseline else None
+                if self.baseline:
+                    entry['baseline_mean'] = self.baseline['numeric'][feature]['mean']
+            if expected is not None:
+                entry['psi'] = population_stability_index(expected, counts)
+                entry['recent_psi'] = population_stability_index(expected, recent_counts)
+                entry['level'] = drift_level(entry['recent_psi'])
+            features[feature] = entry
+
+        scores = [entry['recent_psi'] for entry in features.values() if entry.get('recent_psi') is not None]
+        drift_score = max(scores) if scores else None
+        return {
+            'baseline': self.source,
+            'baseline_rows': self.baseline['rows'] if self.baseline else None,
+            'observations': observations,
+            'window_size': self.window_size,
+            'recent_observations': recent_observations,
+            'drift_score': drift_score,
+            'drift_level': drift_level(drift_score),
+            'drifted_features': [name for name, entry in features.items() if (entry.get('recent_psi') or 0) >= PSI_SIGNIFICANT],
+            'features': features,
+            'memory_bytes': int(total.nbytes * 3 + sums.nbytes)
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the input drift baseline from training data.')
+    parser.add_argument('data', type=Path, help='Training CSV with the model feature columns')
+    parser.add_argument('output', type=Path, help='Baseline JSON to write')
+    parser.add_argument('--bins', type=int, default=10, help='Quantile bins per numeric feature')
+    args = parser.parse_args()
+
+    import pandas as pd
+    frame = pd.read_csv(args.data)
+    missing = [column for column in NUMERIC_FEATURES + [CATEGORICAL_FEATURE] if column not in frame.columns]
+    if missing:
+        print(f"Training data is missing columns: {missing}")
+        return 1
+    if not pd.api.types.is_numeric_dtype(frame[CATEGORICAL_FEATURE]):
+        from catalog import encode_soil_type
+        frame[CATEGORICAL_FEATURE] = frame[CATEGORICAL_FEATURE].map(encode_soil_type)
+
+    baseline = build_baseline(frame, args.bins)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(baseline))
+    print(f"Drift baseline written to {args.output} from {baseline['rows']} rows")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
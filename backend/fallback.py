@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Deterministic rule-based crop suitability scorer.
+
+Used when the model is not loaded (degraded-mode serving) and to pad model
+answers with fewer distinct crops than requested. CROP_INFO and SOIL_INFO
+text is turned once into numeric tables: a preferred range per crop for
+temperature (from the season), humidity and rainfall (from the water
+requirement), N/P/K (from the per-hectare nutrient requirement) and pH, and
+a crop x soil type match matrix. Scoring a reading is a handful of array
+operations over all crops and always gives the same answer for the same
+input.
+"""
+import re
+
+import numpy as np
+
+from fertilizer import NutrientPlanner
+
+FEATURES = ['temperature', 'humidity', 'rainfall', 'ph', 'N', 'P', 'K']
+# Relative importance of each feature and of the soil match
+FEATURE_WEIGHTS = np.array([2.0, 1.0, 2.0, 1.0, 0.5, 0.5, 0.5])
+SOIL_WEIGHT = 1.5
+# How far outside its preferred range a value may fall before it scores zero
+FEATURE_MARGINS = np.array([6.0, 15.0, 60.0, 1.0, np.nan, np.nan, np.nan])
+
+SEASON_TEMPERATURE = {
+    'temperate': (5, 22), 'rabi': (12, 25), 'kharif': (24, 34), 'summer': (24, 36), 'perennial': (20, 32)
+}
+DEFAULT_TEMPERATURE = (15, 35)
+WATER_HUMIDITY = {
+    'very low': (20, 50), 'low': (30, 65), 'low-medium': (40, 70),
+    'medium': (50, 80), 'medium-high': (60, 85), 'high': (70, 95)
+}
+WATER_RAINFALL = {
+    'very low': (20, 60), 'low': (40, 100), 'low-medium': (60, 130),
+    'medium': (80, 180), 'medium-high': (120, 230), 'high': (150, 300)
+}
+PH_RANGE = (5.5, 7.5)
+SOIL_MATCH, SOIL_MISMATCH = 1.0, 0.4
+
+
+def season_temperature(season):
+    """Preferred temperature range from a CROP_INFO season string."""
+    text = str(season).lower()
+    # A temperate crop keeps its cool range whatever season it is listed under
+    if 'temperate' in text:
+        return SEASON_TEMPERATURE['temperate']
+    ranges = [bounds for name, bounds in SEASON_TEMPERATURE.items() if name in text]
+    if not ranges:
+        return DEFAULT_TEMPERATURE
+    return min(low for low, _ in ranges), max(high for _, high in ranges)
+
+
+class SuitabilityScorer:
+    """Vectorized agronomic suitability of every CROP_INFO crop for one or many readings."""
+
+    def __init__(self, crop_info, soil_info, soil_types):
+        self.crops = list(crop_info)
+        self.soil_index = {soil: i for i, soil in enumerate(soil_types)}
+        n_crops = len(self.crops)
+        self.low = np.zeros((n_crops, len(FEATURES)))
+        self.high = np.zeros((n_crops, len(FEATURES)))
+        for i, crop in enumerate(self.crops):
+            details = crop_info[crop]
+            water = str(details.get('water_requirement', 'medium')).lower()
+            self.low[i, 0], self.high[i, 0] = season_temperature(details.get('season'))
+            self.low[i, 1], self.high[i, 1] = WATER_HUMIDITY.get(water, WATER_HUMIDITY['medium'])
+            self.low[i, 2], self.high[i, 2] = WATER_RAINFALL.get(water, WATER_RAINFALL['medium'])
+            self.low[i, 3], self.high[i, 3] = PH_RANGE
+
+        # Per-hectare nutrient requirements double as the preferred soil N/P/K band;
+        # crops listed per plant (and nutrients a crop does not list) get no term
+        planner = NutrientPlanner(crop_info)
+        nutrient_low = np.where(planner.per_hectare[:, None], planner.low, np.nan)
+        nutrient_high = np.where(planner.per_hectare[:, None], planner.high, np.nan)
+        self.low[:, 4:], self.high[:, 4:] = nutrient_low * 0.5, nutrient_high * 1.5
+        self.margins = np.tile(FEATURE_MARGINS, (n_crops, 1))
+        self.margins[:, 4:] = np.maximum(nutrient_high * 0.5, 10.0)
+
+        self.soil_match = np.full((n_crops, len(soil_types)), SOIL_MISMATCH)
+        for i, crop in enumerate(self.crops):
+            preference = str(crop_info[crop].get('soil_preference', '')).lower()
+            for soil, j in self.soil_index.items():
+                suitable = str(soil_info.get(soil, {}).get('suitable_crops', '')).lower()
+                if re.search(rf"\b{soil.lower()}\b", preference) or re.search(rf"\b{crop}\b", suitable):
+                    self.soil_match[i, j] = SOIL_MATCH
+
+    def scores(self, readings, soil_types):
+        """(R, crops) suitability in [0, 1] for readings of FEATURES and their soil type names."""
+        values = np.atleast_2d(np.asarray(readings, dtype=np.float64))[:, None, :]
+        distance = np.maximum(self.low - values, 0.0) + np.maximum(values - self.high, 0.0)
+        membership = np.clip(1.0 - distance / self.margins, 0.0, 1.0)
+        weights = np.where(np.isnan(membership), 0.0, FEATURE_WEIGHTS)
+        soil = self.soil_match[:, [self.soil_index.get(soil_type, self.soil_index.get('Loam', 0)) for soil_type in soil_types]].T
+        total = np.nansum(membership * weights, axis=-1) + soil * SOIL_WEIGHT
+        return total / (weights.sum(axis=-1) + SOIL_WEIGHT)
+
+    def predict_proba(self, data):
+        """Scores for one request-style reading, normalized to sum to one like model probabilities."""
+        reading = [float(data[feature]) for feature in FEATURES]
+        scores = self.scores([reading], [data['soil_type']])[0]
+        return scores / scores.sum() if scores.sum() > 0 else np.full(len(self.crops), 1.0 / len(self.crops))
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Fertilizer-gap planning from the CROP_INFO nutrient requirement ranges.
+
+``CROP_INFO[crop]['nutrient_req']`` strings such as
+"N: 80-120, P: 40-60, K: 40-60 kg/ha" are parsed once into (crops, N/P/K)
+low/high matrices. Deficits for any number of soil readings against any set
+of crops are then one broadcast subtraction, and fertilizer product
+quantities follow from their nutrient fractions.
+
+As is usual for Indian fertilizer recommendations, P and K are read as P2O5
+and K2O, and soil readings are taken as available kg/ha on the same basis.
+Requirements given per plant or per tree (perennials) cannot be compared with
+a per-hectare soil reading, so their deficits are reported as unavailable.
+"""
+import re
+
+import numpy as np
+
+NUTRIENTS = ['N', 'P', 'K']
+TARGETS = ['min', 'mid', 'max']
+# Nutrient fraction of each straight fertilizer (N, P2O5, K2O)
+UREA_N = 0.46
+DAP_N = 0.18
+DAP_P = 0.46
+MOP_K = 0.60
+
+NUTRIENT_PATTERN = re.compile(r'\b([NPK])\s*:\s*(\d+(?:\.\d+)?)(?:\s*-\s*(\d+(?:\.\d+)?))?\s*(g\b)?')
+
+
+def parse_nutrient_requirement(text):
+    """Parse a nutrient_req string into (low[3], high[3], unit); missing nutrients are NaN."""
+    low = np.full(len(NUTRIENTS), np.nan)
+    high = np.full(len(NUTRIENTS), np.nan)
+    text = str(text)
+    per_plant = False
+    for nutrient, low_value, high_value, grams in NUTRIENT_PATTERN.findall(text):
+        index = NUTRIENTS.index(nutrient)
+        low[index] = float(low_value)
+        high[index] = float(high_value or low_value)
+        per_plant |= bool(grams)
+    if np.isnan(low).all():
+        return low, high, None
+    if per_plant:
+        return low, high, 'g/plant'
+    return low, high, 'kg/ha' if 'kg/ha' in text else None
+
+
+class NutrientPlanner:
+    """Crops x N/P/K requirement matrices with vectorized deficit and fertilizer calculations."""
+
+    def __init__(self, crop_info):
+        self.crops = list(crop_info)
+        self.crop_index = {crop: i for i, crop in enumerate(self.crops)}
+        parsed = [parse_nutrient_requirement(details.get('nutrient_req', '')) for details in crop_info.values()]
+        self.low = np.array([low for low, _, _ in parsed])
+        self.high = np.array([high for _, high, _ in parsed])
+        self.units = [unit for _, _, unit in parsed]
+        self.per_hectare = np.array([unit == 'kg/ha' for unit in self.units])
+
+    def requirement(self, target='mid'):
+        """(crops, 3) target requirement; a nutrient a crop does not list counts as zero."""
+        if target == 'min':
+            required = self.low
+        elif target == 'max':
+            required = self.high
+        else:
+            required = (self.low + self.high) / 2
+        return np.nan_to_num(required, nan=0.0)
+
+    def plan(self, readings, crops=None, target='mid'):
+        """Deficits and fertilizer quantities for every (reading, crop) pair.
+
+        readings is an (R, 3) array of soil N/P/K; returns arrays shaped
+        (R, C, 3) for deficits and (R, C) per fertilizer, NaN where a crop's
+        requirement is not per hectare.
+        """
+        if target not in TARGETS:
+            raise ValueError(f"Unknown target: {target}; expected one of {TARGETS}")
+        crop_rows = np.arange(len(self.crops)) if crops is None else np.array([self.crop_index[c] for c in crops], dtype=int)
+        readings = np.atleast_2d(np.asarray(readings, dtype=np.float64))
+        if not np.isfinite(readings).all():
+            raise ValueError('Soil readings must be finite numbers')
+        required = self.requirement(target)[crop_rows]
+        deficits = np.maximum(required[None, :, :] - readings[:, None, :], 0.0)
+        deficits[:, ~self.per_hectare[crop_rows], :] = np.nan
+
+        dap = deficits[..., 1] / DAP_P
+        urea = np.maximum(deficits[..., 0] - dap * DAP_N, 0.0) / UREA_N
+        mop = deficits[..., 2] / MOP_K
+        return {
+            'crops': [self.crops[i] for i in crop_rows],
+            'required': required,
+            'deficits': deficits,
+            'fertilizers': {'urea': urea, 'dap': dap, 'mop': mop}
+        }
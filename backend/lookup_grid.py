@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Approximate inference from a sparse lookup grid of precomputed model outputs.
+
+Each model feature is quantized to a fixed step (soil type and variety stay
+exact), and the model is evaluated once at the centre of every grid cell that
+a sample of observed inputs (training data or exported traffic) falls into.
+Only those cells are stored, so memory follows the observed region rather
+than the full nine-dimensional grid. A request in a stored cell is answered
+by a dict lookup; anything outside is left to the real model.
+
+Building holds out part of the sample to measure coverage and agreement with
+the exact predict_proba, so the resolution can be chosen from the report:
+    python backend/lookup_grid.py samples.csv
+    python backend/lookup_grid.py samples.csv --scales 0.5,1,2,4 --model Models/crop_model.pkl
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from catalog import FEATURE_COLUMNS
+
+# Cell size per FEATURE_COLUMNS entry at scale 1.0
+DEFAULT_STEPS = {
+    'Nitrogen': 5.0, 'Phosphorus': 5.0, 'Potassium': 5.0, 'Temperature': 1.0, 'Humidity': 2.5,
+    'pH_Value': 0.1, 'Rainfall': 10.0, 'Soil_Type': 1.0, 'Variety': 1.0
+}
+EXACT_FEATURES = ['Soil_Type', 'Variety']
+
+
+def grid_steps(scale=1.0):
+    """Per-feature steps with the numeric ones multiplied by scale."""
+    return np.array([
+        DEFAULT_STEPS[name] if name in EXACT_FEATURES else DEFAULT_STEPS[name] * scale for name in FEATURE_COLUMNS
+    ])
+
+
+def agreement_report(approximate, exact, covered):
+    """Coverage and agreement of grid answers with the exact probabilities for the same rows."""
+    report = {'rows': int(len(exact)), 'coverage': float(covered.mean()) if len(exact) else 0.0}
+    if covered.any():
+        approx, truth = approximate[covered], exact[covered]
+        top1 = approx.argmax(axis=1) == truth.argmax(axis=1)
+        top3 = (np.argsort(-approx, axis=1)[:, :3] == truth.argmax(axis=1)[:, None]).any(axis=1)
+        delta = np.abs(approx - truth)
+        report.update({
+            'top1_agreement': float(top1.mean()),
+            'top3_contains_exact_top1': float(top3.mean()),
+            'mean_abs_delta': float(delta.mean()),
+            'max_abs_delta': float(delta.max()),
+            # Rows outside the grid are served by the model, so they always agree
+            'served_top1_agreement': float(1.0 - (1.0 - top1).sum() / len(exact))
+        })
+    return report
+
+
+class LookupGrid:
+    """Sparse table of model probabilities keyed by quantized feature cells."""
+
+    def __init__(self, steps, cells, table, scale=1.0, model_version=None):
+        self.steps = np.asarray(steps, dtype=np.float64)
+        self.scale = scale
+        self.model_version = model_version  # Version of the model the table was computed from
+        self.index = {tuple(cell): row for row, cell in enumerate(cells.tolist())}
+        self.table = table
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    @classmethod
+    def build(cls, samples, predict_proba, scale=1.0, model_version=None):
+        """Evaluate predict_proba (raw feature rows in, probabilities out) at every observed cell centre."""
+        steps = grid_steps(scale)
+        cells = np.unique(np.rint(np.asarray(samples, dtype=np.float64) / steps).astype(np.int64), axis=0)
+        table = np.asarray(predict_proba(cells * steps), dtype=np.float32)
+        return cls(steps, cells, table, scale, model_version)
+
+    @classmethod
+    def build_with_report(cls, samples, predict_proba, scale=1.0, holdout=0.2, seed=0, model_version=None):
+        """Measure agreement on held-out samples, then build the serving grid from all samples.
+
+        Returns (grid, report).
+        """
+        samples = np.asarray(samples, dtype=np.float64)
+        start = time.perf_counter()
+        order = np.random.default_rng(seed).permutation(len(samples))
+        n_holdout = int(len(samples) * holdout)
+        held_out, fitted = samples[order[:n_holdout]], samples[order[n_holdout:]]
+        report = {'scale': scale}
+        if n_holdout:
+            trial = cls.build(fitted, predict_proba, scale)
+            approximate, covered = trial.lookup_batch(held_out)
+            report['holdout'] = agreement_report(approximate, np.asarray(predict_proba(held_out)), covered)
+        grid = cls.build(samples, predict_proba, scale, model_version)
+        report.update({
+            'samples': int(len(samples)),
+            'cells': len(grid.index),
+            'table_bytes': int(grid.table.nbytes),
+            'build_s': round(time.perf_counter() - start, 3)
+        })
+        return grid, report
+
+    def cell(self, row):
+        return tuple(np.rint(np.asarray(row, dtype=np.float64) / self.steps).astype(np.int64).tolist())
+
+    def lookup(self, row):
+        """Stored probabilities for one raw feature row, or None outside the grid."""
+        position = self.index.get(self.cell(row))
+        with self._lock:
+            self.stats['hits' if position is not None else 'misses'] += 1
+        return None if position is None else self.table[position]
+
+    def lookup_batch(self, rows):
+        """(probabilities, covered) for many rows; uncovered rows are zero."""
+        cells = np.rint(np.asarray(rows, dtype=np.float64) / self.steps).astype(np.int64).tolist()
+        positions = np.array([self.index.get(tuple(cell), -1) for cell in cells])
+        covered = positions >= 0
+        probabilities = np.zeros((len(cells), self.table.shape[1]), dtype=np.float32)
+        probabilities[covered] = self.table[positions[covered]]
+        return probabilities, covered
+
+    def snapshot(self):
+        with self._lock:
+            served = self.stats['hits'] + self.stats['misses']
+            return {
+                'scale': self.scale,
+                'model_version': self.model_version,
+                'steps': dict(zip(FEATURE_COLUMNS, self.steps.tolist())),
+                'cells': len(self.index),
+                'table_bytes': int(self.table.nbytes),
+                'hit_rate': self.stats['hits'] / served if served else None,
+                **self.stats
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report lookup grid coverage and accuracy at several resolutions.')
+    parser.add_argument('samples', type=Path, help='CSV of observed inputs with the model feature columns')
+    parser.add_argument('--scales', default='0.5,1,2', help='Comma-separated step multipliers to compare')
+    parser.add_argument('--model', type=Path, default=None, help='Model artifact (default: the served model)')
+    parser.add_argument('--scaler', type=Path, default=None, help='Scaler artifact (default: Models/scaler.pkl)')
+    parser.add_argument('--holdout', type=float, default=0.2, help='Fraction of samples held out for the report')
+    parser.add_argument('--json', type=Path, help='Also write the reports to this JSON file')
+    args = parser.parse_args()
+
+    import joblib
+    import pandas as pd
+    from artifacts import CROP_MODEL_PATH, MODELS_DIR
+    from catalog import encode_soil_type
+    frame = pd.read_csv(args.samples)
+    missing = [column for column in FEATURE_COLUMNS if column not in frame.columns]
+    if missing:
+        print(f"Samples are missing columns: {missing}")
+        return 1
+    if not pd.api.types.is_numeric_dtype(frame['Soil_Type']):
+        frame['Soil_Type'] = frame['Soil_Type'].map(encode_soil_type)
+    model = joblib.load(args.model or CROP_MODEL_PATH)
+    scaler_path = args.scaler or MODELS_DIR / 'scaler.pkl'
+    scaler = joblib.load(scaler_path) if scaler_path.exists() else None
+
+    def predict_proba(rows):
+        rows = pd.DataFrame(rows, columns=FEATURE_COLUMNS)
+        return model.predict_proba(scaler.transform(rows) if scaler is not None else rows)
+
+    samples = frame[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    reports = []
+    print(f"{'scale':>6}{'cells':>10}{'table MB':>10}{'coverage':>10}{'top-1 agree':>13}{'served agree':>14}{'max |dp|':>10}{'build s':>9}")
+    for scale in [float(value) for value in args.scales.split(',') if value]:
+        _, report = LookupGrid.build_with_report(samples, predict_proba, scale, args.holdout)
+        reports.append(report)
+        holdout = report.get('holdout', {})
+        print(f"{scale:>6g}{report['cells']:>10}{report['table_bytes'] / 1e6:>10.2f}{holdout.get('coverage', 0):>10.3f}"
+              f"{holdout.get('top1_agreement', float('nan')):>13.4f}{holdout.get('served_top1_agreement', float('nan')):>14.4f}"
+              f"{holdout.get('max_abs_delta', float('nan')):>10.3f}{report['build_s']:>9.2f}")
+    if args.json:
+        args.json.write_text(json.dumps(reports, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
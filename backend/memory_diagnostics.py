@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""Process memory diagnostics: RSS, object size estimates and tracemalloc snapshot diffs.
+
+``estimate_object_bytes`` walks an object graph (containers, instance state
+and NumPy buffers) to approximate how much memory a model or cache holds.
+``AllocationTracker`` starts and stops a tracemalloc session and keeps a
+bounded set of labelled snapshots, so the top allocation sites between any
+two points in time can be listed while the server keeps running. Tracing
+slows allocation-heavy code noticeably, so it is only on between an explicit
+start and stop.
+"""
+import gc
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+import types
+from collections import OrderedDict
+
+import numpy as np
+
+# Walking stops at these; they are shared with the rest of the process
+OPAQUE_TYPES = (types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType, type)
+IGNORED_TRACE_FILES = (tracemalloc.__file__, '<frozen importlib._bootstrap>', '<frozen importlib._bootstrap_external>', '<unknown>')
+GROUP_BY = ('lineno', 'filename', 'traceback')
+
+
+def process_memory():
+    """Current and peak resident set size of this process in bytes (current is Linux-only)."""
+    current = None
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    current = int(line.split()[1]) * 1024
+                    break
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = peak if sys.platform == 'darwin' else peak * 1024
+    return {'rss_bytes': current, 'peak_rss_bytes': peak}
+
+
+def estimate_object_bytes(obj, max_depth=16):
+    """Approximate memory held by obj and everything it references (NumPy buffers by nbytes)."""
+    seen = set()
+    visited = []  # Keeps temporary state objects alive so their ids are not reused
+    total = 0
+    stack = [(obj, 0)]
+    while stack:
+        current, depth = stack.pop()
+        if id(current) in seen or isinstance(current, OPAQUE_TYPES) or depth > max_depth:
+            continue
+        seen.add(id(current))
+        visited.append(current)
+        if isinstance(current, np.ndarray):
+            # Views share their base array's buffer; other arrays own (or wrap) theirs
+            if isinstance(current.base, np.ndarray):
+                total += sys.getsizeof(current)
+                stack.append((current.base, depth + 1))
+            else:
+                total += current.nbytes + sys.getsizeof(np.empty(0))
+            continue
+        total += sys.getsizeof(current)
+        if isinstance(current, (str, bytes, bytearray, int, float, bool)) or current is None:
+            continue
+        if isinstance(current, dict):
+            children = list(current.keys()) + list(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            children = list(current)
+        elif hasattr(current, '__dict__'):
+            children = list(vars(current).values())
+        else:
+            # Extension types such as sklearn's Tree expose their arrays through __getstate__
+            try:
+                state = current.__getstate__()
+            except Exception:
+                state = None
+            children = [state] if isinstance(state, (dict, list, tuple)) else []
+        stack.extend((child, depth + 1) for child in children)
+    return total
+
+
+class AllocationTracker:
+    """tracemalloc session control with labelled snapshots and diffs."""
+
+    def __init__(self, keep=10):
+        self.keep = keep
+        self.snapshots = OrderedDict()  # label -> (taken_at, Snapshot)
+        self.started_at = None
+        self._lock = threading.Lock()
+        self._counter = 0
+
+    def start(self, frames=1):
+        """Start tracing with this many stack frames per allocation; False if already tracing."""
+        if tracemalloc.is_tracing():
+            return False
+        tracemalloc.start(frames)
+        self.started_at = time.time()
+        return True
+
+    def stop(self):
+        """Stop tracing and drop stored snapshots; False if not tracing."""
+        if not tracemalloc.is_tracing():
+            return False
+        tracemalloc.stop()
+        with self._lock:
+            self.snapshots.clear()
+        self.started_at = None
+        return True
+
+    def take(self, label=None):
+        """Take and store a snapshot, evicting the oldest beyond keep; returns its label.
+
+        Raises RuntimeError when tracing is off.
+        """
+        if not tracemalloc.is_tracing():
+            raise RuntimeError('tracemalloc is not tracing; start a session first')
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, filename) for filename in IGNORED_TRACE_FILES]
+        )
+        with self._lock:
+            self._counter += 1
+            label = label or f"snapshot-{self._counter}"
+            self.snapshots.pop(label, None)
+            self.snapshots[label] = (time.time(), snapshot)
+            while len(self.snapshots) > self.keep:
+                self.snapshots.popitem(last=False)
+        return label
+
+    def diff(self, older, newer, limit=20, group_by='lineno'):
+        """Top allocation sites by size growth from snapshot older to newer.
+
+        Raises KeyError for an unknown label and ValueError for a bad group_by.
+        """
+        if group_by not in GROUP_BY:
+            raise ValueError(f"group_by must be one of {list(GROUP_BY)}")
+        with self._lock:
+            older_at, older_snapshot = self.snapshots[older]
+            newer_at, newer_snapshot = self.snapshots[newer]
+        stats = newer_snapshot.compare_to(older_snapshot, group_by)
+        return {
+            'from': older,
+            'to': newer,
+            'elapsed_s': round(newer_at - older_at, 3),
+            'total_size_diff_bytes': sum(stat.size_diff for stat in stats),
+            'top': [{
+                'location': [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+                'size_diff_bytes': stat.size_diff,
+                'size_bytes': stat.size,
+                'count_diff': stat.count_diff,
+                'count': stat.count
+            } for stat in stats[:limit]]
+        }
+
+    def status(self):
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        with self._lock:
+            snapshots = [{'label': label, 'taken_at': taken_at} for label, (taken_at, _) in self.snapshots.items()]
+        return {
+            'tracing': tracing,
+            'frames': tracemalloc.get_traceback_limit() if tracing else None,
+            'started_at': self.started_at,
+            'traced_bytes': current,
+            'traced_peak_bytes': peak,
+            'tracemalloc_overhead_bytes': tracemalloc.get_tracemalloc_memory() if tracing else 0,
+            'snapshots': snapshots
+        }
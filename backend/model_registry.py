@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""Registry of region-specific crop models with lazy, memory-budgeted loading.
+
+Models are described in a JSON file (by default ``Models/model_registry.json``)::
+
+    {
+      "regions": {"north-east-hills": ["Assam", "Meghalaya", "Sikkim"]},
+      "models": {
+        "ne-hills": {"file": "crop_model_ne.pkl", "scaler": "scaler_ne.pkl",
+                     "regions": ["north-east-hills"]},
+        "deccan-dryland": {"file": "crop_model_deccan.pkl", "scaler": "none",
+                           "states": ["Karnataka", "Telangana"], "memory_mb": 120}
+      }
+    }
+
+Every model names the scaler it was trained with, or "none" for a model
+trained on raw features; models never borrow the default model's scaler.
+
+A request picks a model by explicit id, by region or by state; anything not
+routed is served by the app's default model. A model is loaded on first use
+and published only once it is completely built, so a request either gets a
+ready model or waits for one. Resident models are kept in LRU order and the
+least recently used are evicted when the memory budget would be exceeded.
+Requests already holding an evicted model finish with it; its memory is
+released when they drop the reference.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MODEL_ID = 'default'
+
+
+class LoadedModel:
+    """A fully built model with its scaler, class names and ranking constraints."""
+
+    def __init__(self, model_id, model, scaler, class_names, constraints, version, size_bytes):
+        self.model_id = model_id
+        self.model = model
+        self.scaler = scaler
+        self.class_names = class_names
+        self.constraints = constraints
+        self.version = version
+        self.size_bytes = size_bytes
+
+    def scale(self, input_data):
+        return self.scaler.transform(input_data) if self.scaler else input_data
+
+
+class ModelRegistry:
+    """Routes requests to models and keeps the resident ones within a byte budget."""
+
+    def __init__(self, models=None, regions=None, budget_bytes=512 * 1024 * 1024, source=None):
+        self.specs = dict(models or {})
+        self.regions = {name: list(states) for name, states in (regions or {}).items()}
+        self.budget_bytes = budget_bytes
+        self.source = source
+        self.region_routes = {}
+        self.state_routes = {}
+        for model_id, spec in self.specs.items():
+            for region in spec.get('regions', []):
+                if region not in self.regions:
+                    raise ValueError(f"Model {model_id} routes unknown region: {region}")
+                self.region_routes[region] = model_id
+                for state in self.regions[region]:
+                    self.state_routes.setdefault(state, model_id)
+        # Explicit state routes win over region membership
+        for model_id, spec in self.specs.items():
+            for state in spec.get('states', []):
+                self.state_routes[state] = model_id
+
+        self._resident = OrderedDict()  # model_id -> LoadedModel, least recently used first
+        self._load_locks = {model_id: threading.Lock() for model_id in self.specs}
+        self._lock = threading.Lock()
+        self.stats = {}
+
+    @classmethod
+    def from_file(cls, path, budget_bytes):
+        with open(path) as f:
+            config = json.load(f)
+        return cls(config.get('models'), config.get('regions'), budget_bytes, source=str(path))
+
+    def resolve(self, model_id=None, region=None, state=None):
+        """Model id for a request, or None for the default model.
+
+        Raises KeyError for an unknown explicit model id or region.
+        """
+        if model_id and model_id != DEFAULT_MODEL_ID:
+            if model_id not in self.specs:
+                raise KeyError(f"Unknown model: {model_id}")
+            return model_id
+        if model_id == DEFAULT_MODEL_ID:
+            return None
+        if region:
+            if region not in self.regions:
+                raise KeyError(f"Unknown region: {region}")
+            if region in self.region_routes:
+                return self.region_routes[region]
+        return self.state_routes.get(state)
+
+    def _entry(self, model_id):
+        return self.stats.setdefault(model_id, {
+            'loads': 0, 'load_failures': 0, 'evictions': 0, 'hits': 0,
+            'last_load_ms': None, 'requests': 0, 'total_latency_ms': 0.0, 'max_latency_ms': 0.0
+        })
+
+    def get(self, model_id, load):
+        """Resident model for model_id, loading it with ``load(model_id, spec)`` on a miss.
+
+        Concurrent requests for a cold model share one load. ``load`` must return
+        a LoadedModel; its exceptions propagate to every waiting caller in turn.
+        """
+        with self._lock:
+            loaded = self._resident.get(model_id)
+            if loaded is not None:
+                self._resident.move_to_end(model_id)
+                self._entry(model_id)['hits'] += 1
+                return loaded
+
+        with self._load_locks[model_id]:
+            # Another request may have finished loading it while we waited
+            with self._lock:
+                loaded = self._resident.get(model_id)
+                if loaded is not None:
+                    self._resident.move_to_end(model_id)
+                    self._entry(model_id)['hits'] += 1
+                    return loaded
+
+            start = time.perf_counter()
+            try:
+                loaded = load(model_id, self.specs[model_id])
+            except Exception:
+                with self._lock:
+                    self._entry(model_id)['load_failures'] += 1
+                raise
+            load_ms = (time.perf_counter() - start) * 1000
+
+            with self._lock:
+                self._make_room(loaded.size_bytes)
+                self._resident[model_id] = loaded
+                entry = self._entry(model_id)
+                entry['loads'] += 1
+                entry['last_load_ms'] = round(load_ms, 1)
+            print(f"[DEBUG] Loaded model {model_id} ({loaded.size_bytes / 1e6:.1f}MB) in {load_ms:.0f}ms")
+            return loaded
+
+    def _make_room(self, size_bytes):
+        """Evict least recently used models until size_bytes fits in the budget (lock held)."""
+        if size_bytes > self.budget_bytes:
+            print(f"Warning: model of {size_bytes / 1e6:.1f}MB exceeds the whole model memory budget")
+        while self._resident and self.resident_bytes() + size_bytes > self.budget_bytes:
+            evicted_id, evicted = self._resident.popitem(last=False)
+            self._entry(evicted_id)['evictions'] += 1
+            print(f"[DEBUG] Evicted model {evicted_id} ({evicted.size_bytes / 1e6:.1f}MB)")
+
+    def resident_bytes(self):
+        return sum(loaded.size_bytes for loaded in self._resident.values())
+
+    def resident_models(self):
+        """(model_id, LoadedModel) pairs currently in memory, least recently used first."""
+        with self._lock:
+            return list(self._resident.items())
+
+    def record_latency(self, model_id, seconds):
+        """Count one scored request against a model (DEFAULT_MODEL_ID for the app's default)."""
+        with self._lock:
+            entry = self._entry(model_id)
+            entry['requests'] += 1
+            entry['total_latency_ms'] += seconds * 1000
+            entry['max_latency_ms'] = max(entry['max_latency_ms'], seconds * 1000)
+
+    def snapshot(self):
+        with self._lock:
+            models = {}
+            for model_id in [DEFAULT_MODEL_ID] + list(self.specs):
+                entry = dict(self._entry(model_id))
+                loaded = self._resident.get(model_id)
+                entry['mean_latency_ms'] = round(entry['total_latency_ms'] / entry['requests'], 3) if entry['requests'] else None
+                entry['total_latency_ms'] = round(entry['total_latency_ms'], 3)
+                entry['max_latency_ms'] = round(entry['max_latency_ms'], 3)
+                if model_id != DEFAULT_MODEL_ID:
+                    spec = self.specs[model_id]
+                    entry.update({
+                        'file': spec.get('file'),
+                        'regions': spec.get('regions', []),
+                        'states': sorted(state for state, routed in self.state_routes.items() if routed == model_id),
+                        'resident': loaded is not None,
+                        'size_bytes': loaded.size_bytes if loaded else None,
+                        'version': loaded.version if loaded else None
+                    })
+                models[model_id] = entry
+            return {
+                'source': self.source,
+                'budget_bytes': self.budget_bytes,
+                'resident_bytes': self.resident_bytes(),
+                'resident': list(self._resident),
+                'regions': self.regions,
+                'models': models
+            }
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""Prediction cache shared by every worker process on a host.
+
+predict_proba results are stored in a local SQLite database in WAL mode,
+keyed on a hash of the model version and the encoded feature vector, so a
+result computed by one worker is a hit for all the others. Every few writes
+the table is trimmed back to ``max_entries`` by evicting the least recently
+used rows (so it overshoots by at most a tenth); last-access times are
+refreshed at most once per ``touch_interval`` so hits stay reads.
+
+Every worker counts its own hits and misses and periodically publishes them
+to a ``workers`` table, so any worker can report per-worker metrics. Cache
+failures (for instance a write that times out on the database lock) count as
+misses and never fail a request.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    key BLOB PRIMARY KEY,
+    model_version TEXT,
+    probabilities BLOB NOT NULL,
+    created REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS predictions_last_access ON predictions (last_access);
+CREATE TABLE IF NOT EXISTS workers (
+    pid INTEGER PRIMARY KEY,
+    hits INTEGER NOT NULL,
+    misses INTEGER NOT NULL,
+    writes INTEGER NOT NULL,
+    evictions INTEGER NOT NULL,
+    errors INTEGER NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+
+def cache_key(model_version, features):
+    """Stable key for a model version and an encoded feature vector (rounded like request coalescing)."""
+    vector = np.round(np.asarray(features, dtype=np.float64), 6)
+    return hashlib.blake2b(f"{model_version}:".encode() + vector.tobytes(), digest_size=16).digest()
+
+
+class SharedPredictionCache:
+    """SQLite-backed probability cache with LRU eviction and per-worker metrics."""
+
+    def __init__(self, path, max_entries=100000, touch_interval=60.0, busy_timeout_s=0.05, evict_every=100):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self.busy_timeout_s = busy_timeout_s
+        self.evict_every = max(1, min(evict_every, max_entries // 10))
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        self._pid = os.getpid()
+        self.stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0, 'errors': 0}
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self):
+        """Per-thread connection, reopened in a forked worker instead of sharing the parent's."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            if self._pid != os.getpid():
+                with self._lock:
+                    self._pid = os.getpid()
+                    self.stats = {name: 0 for name in self.stats}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout_s, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            # Losing recent entries in a crash only costs recomputation
+            conn.execute('PRAGMA synchronous=OFF')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.stats[name] += amount
+            operations = self.stats['hits'] + self.stats['misses']
+        if operations % 100 == 0:
+            self.publish_stats()
+
+    def get(self, model_version, features):
+        """Cached probabilities or None."""
+        key = cache_key(model_version, features)
+        try:
+            conn = self._connection()
+            row = conn.execute('SELECT probabilities, last_access FROM predictions WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self._count('misses')
+                return None
+            now = time.time()
+            if now - row[1] > self.touch_interval:
+                conn.execute('UPDATE predictions SET last_access = ? WHERE key = ?', (now, key))
+        except sqlite3.Error as e:
+            print(f"[ERROR] prediction cache read: {e}")
+            self._count('errors')
+            self._count('misses')
+            return None
+        self._count('hits')
+        return np.frombuffer(row[0], dtype=np.float64).copy()
+
+    def put(self, model_version, features, probabilities):
+        """Store probabilities; evicts least recently used rows every evict_every writes."""
+        now = time.time()
+        try:
+            conn = self._connection()
+            conn.execute(
+                'INSERT OR REPLACE INTO predictions (key, model_version, probabilities, created, last_access) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (cache_key(model_version, features), model_version,
+                 np.asarray(probabilities, dtype=np.float64).tobytes(), now, now)
+            )
+            with self._lock:
+                self.stats['writes'] += 1
+                self._writes_since_evict += 1
+                evict = self._writes_since_evict >= self.evict_every
+                if evict:
+                    self._writes_since_evict = 0
+            if evict:
+                self.evict()
+        except sqlite3.Error as e:
+            print(f"[ERROR] prediction cache write: {e}")
+            self._count('errors')
+
+    def evict(self):
+        """Trim the table to max_entries, oldest last access first."""
+        conn = self._connection()
+        excess = conn.execute('SELECT COUNT(*) FROM predictions').fetchone()[0] - self.max_entries
+        if excess > 0:
+            conn.execute(
+                'DELETE FROM predictions WHERE key IN '
+                '(SELECT key FROM predictions ORDER BY last_access LIMIT ?)', (excess,)
+            )
+            with self._lock:
+                self.stats['evictions'] += excess
+
+    def publish_stats(self):
+        """Write this worker's counters to the shared workers table."""
+        with self._lock:
+            stats = dict(self.stats)
+        try:
+            self._connection().execute(
+                'INSERT OR REPLACE INTO workers (pid, hits, misses, writes, evictions, errors, updated) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (os.getpid(), stats['hits'], stats['misses'], stats['writes'], stats['evictions'], stats['errors'], time.time())
+            )
+        except sqlite3.Error as e:
+            print(f"[ERROR] prediction cache stats: {e}")
+
+    def snapshot(self):
+        """This worker's counters plus entries and the last published counters of every worker."""
+        self.publish_stats()
+        conn = self._connection()
+        entries = conn.execute('SELECT COUNT(*) FROM predictions').fetchone()[0]
+        columns = ['pid', 'hits', 'misses', 'writes', 'evictions', 'errors', 'updated']
+        workers = [dict(zip(columns, row)) for row in conn.execute(f"SELECT {', '.join(columns)} FROM workers ORDER BY pid")]
+        for worker in workers:
+            lookups = worker['hits'] + worker['misses']
+            worker['hit_rate'] = worker['hits'] / lookups if lookups else None
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats['hits'] + stats['misses']
+        return {
+            'path': str(self.path),
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'pid': os.getpid(),
+            'hit_rate': stats['hits'] / lookups if lookups else None,
+            **stats,
+            'workers': workers
+        }
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""Asynchronous prediction log backed by a local SQLite database.
+
+Request handlers hand records to ``PredictionLogger.log``, which only does a
+non-blocking put on a bounded in-memory queue; when the queue is full the
+record is dropped and counted. A background writer drains the queue and
+writes batches in single transactions to SQLite in WAL mode, rotating the
+database file once it grows past a size limit. If the writer cannot open the
+database, logging is disabled and further records are dropped and counted.
+
+The same transaction folds each batch into rollup tables (top crops per state
+per ISO week, primary-confidence histogram per soil type) kept in a separate
+``<name>.rollups.db`` file that is never rotated, so dashboard queries read a
+small pre-aggregated table whatever the amount of logged history.
+"""
+import json
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    endpoint TEXT NOT NULL,
+    model_version TEXT,
+    latency_ms REAL,
+    state TEXT,
+    soil_type TEXT,
+    primary_crop TEXT,
+    primary_confidence REAL,
+    inputs TEXT,
+    top_k TEXT
+);
+"""
+
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollups.crop_state_week (
+    state TEXT NOT NULL,
+    week TEXT NOT NULL,
+    crop TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    confidence_sum REAL NOT NULL,
+    PRIMARY KEY (state, week, crop)
+);
+CREATE TABLE IF NOT EXISTS rollups.confidence_soil (
+    soil_type TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    confidence_sum REAL NOT NULL,
+    PRIMARY KEY (soil_type, bucket)
+);
+"""
+
+CONFIDENCE_BUCKETS = 10
+UNKNOWN_STATE = 'Unknown'
+
+
+def iso_week(ts):
+    """ISO year-week key such as '2025-W07' for a UNIX timestamp (UTC)."""
+    return time.strftime('%G-W%V', time.gmtime(ts))
+
+
+class PredictionLogger:
+    """Bounded queue plus a background writer that batches inserts into SQLite."""
+
+    def __init__(self, path, queue_size=10000, batch_size=200, flush_interval=1.0,
+                 max_bytes=50 * 1024 * 1024, keep_files=5):
+        self.path = Path(path)
+        self.rollups_path = self.path.with_suffix(f".rollups{self.path.suffix}")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.keep_files = keep_files
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self.stats = {'enqueued': 0, 'dropped': 0, 'written': 0, 'batches': 0, 'errors': 0, 'rotations': 0,
+                      'last_flush_ms': None, 'max_flush_ms': 0.0, 'total_flush_ms': 0.0}
+        self.error = None  # Set when the writer cannot open the database; logging is then disabled
+        self._worker = threading.Thread(target=self._run, name='prediction-log-writer', daemon=True)
+        self._worker.start()
+
+    def log(self, endpoint, inputs, recommendations, model_version=None, latency_ms=None, state=None):
+        """Queue one prediction record without blocking; returns False if it was dropped."""
+        if self.error is not None:
+            with self._lock:
+                self.stats['dropped'] += 1
+            return False
+        record = {
+            'ts': time.time(),
+            'endpoint': endpoint,
+            'model_version': model_version,
+            'latency_ms': latency_ms,
+            'state': state,
+            'soil_type': inputs.get('soil_type'),
+            'inputs': inputs,
+            'top_k': [{'crop': r['crop'], 'confidence': r['confidence']} for r in recommendations]
+        }
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.stats['dropped'] += 1
+            return False
+        with self._lock:
+            self.stats['enqueued'] += 1
+        return True
+
+    def _connect(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('ATTACH DATABASE ? AS rollups', (str(self.rollups_path),))
+        conn.execute('PRAGMA rollups.journal_mode=WAL')
+        conn.executescript(SCHEMA + ROLLUP_SCHEMA)
+        return conn
+
+    def _next_batch(self):
+        """Block for the first record, then gather more until the batch fills or the interval ends."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _disable(self, error):
+        """Stop logging after the writer failed to open the database and drop what was queued."""
+        print(f"[ERROR] prediction log disabled, cannot open {self.path}: {error}")
+        self.error = str(error)
+        dropped = 0
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+            dropped += 1
+        with self._lock:
+            self.stats['dropped'] += dropped
+
+    def _run(self):
+        try:
+            conn = self._connect()
+        except Exception as e:
+            self._disable(e)
+            return
+        while True:
+            batch = self._next_batch()
+            start = time.perf_counter()
+            try:
+                with conn:
+                    self.write_batch(conn, batch)
+                flush_ms = (time.perf_counter() - start) * 1000
+                with self._lock:
+                    self.stats['written'] += len(batch)
+                    self.stats['batches'] += 1
+                    self.stats['last_flush_ms'] = flush_ms
+                    self.stats['max_flush_ms'] = max(self.stats['max_flush_ms'], flush_ms)
+                    self.stats['total_flush_ms'] += flush_ms
+            except Exception as e:
+                print(f"[ERROR] prediction log write: {e}")
+                with self._lock:
+                    self.stats['errors'] += 1
+            if self._database_bytes() > self.max_bytes:
+                try:
+                    conn = self._rotate(conn)
+                except Exception as e:
+                    self._disable(e)
+                    return
+
+    def _database_bytes(self):
+        """Size of the database including rows still in the write-ahead log."""
+        wal = Path(f"{self.path}-wal")
+        return sum(path.stat().st_size for path in (self.path, wal) if path.exists())
+
+    def write_batch(self, conn, batch):
+        """Insert one batch of records; called inside a transaction."""
+        conn.executemany(
+            'INSERT INTO predictions (ts, endpoint, model_version, latency_ms, state, soil_type, '
+            'primary_crop, primary_confidence, inputs, top_k) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            [(
+                record['ts'], record['endpoint'], record['model_version'], record['latency_ms'],
+                record['state'], record['soil_type'],
+                record['top_k'][0]['crop'] if record['top_k'] else None,
+                record['top_k'][0]['confidence'] if record['top_k'] else None,
+                json.dumps(record['inputs']), json.dumps(record['top_k'])
+            ) for record in batch]
+        )
+        self.update_rollups(conn, batch)
+
+    def update_rollups(self, conn, batch):
+        """Fold one batch into the rollup tables with upserts; cost depends only on batch size."""
+        crop_counts = Counter()
+        crop_confidence = defaultdict(float)
+        bucket_counts = Counter()
+        bucket_confidence = defaultdict(float)
+        for record in batch:
+            if not record['top_k']:
+                continue
+            crop, confidence = record['top_k'][0]['crop'], float(record['top_k'][0]['confidence'])
+            week_key = (record['state'] or UNKNOWN_STATE, iso_week(record['ts']), crop)
+            crop_counts[week_key] += 1
+            crop_confidence[week_key] += confidence
+            bucket_key = (record['soil_type'] or 'Unknown', min(int(confidence * CONFIDENCE_BUCKETS), CONFIDENCE_BUCKETS - 1))
+            bucket_counts[bucket_key] += 1
+            bucket_confidence[bucket_key] += confidence
+
+        conn.executemany(
+            'INSERT INTO rollups.crop_state_week (state, week, crop, count, confidence_sum) VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT (state, week, crop) DO UPDATE SET count = count + excluded.count, '
+            'confidence_sum = confidence_sum + excluded.confidence_sum',
+            [(*key, count, crop_confidence[key]) for key, count in crop_counts.items()]
+        )
+        conn.executemany(
+            'INSERT INTO rollups.confidence_soil (soil_type, bucket, count, confidence_sum) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT (soil_type, bucket) DO UPDATE SET count = count + excluded.count, '
+            'confidence_sum = confidence_sum + excluded.confidence_sum',
+            [(*key, count, bucket_confidence[key]) for key, count in bucket_counts.items()]
+        )
+
+    def _read_rollups(self, query, params):
+        """Run a read-only query against the rollup database."""
+        if not self.rollups_path.exists():
+            return []
+        conn = sqlite3.connect(f"file:{self.rollups_path}?mode=ro", uri=True)
+        try:
+            return conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+
+    def top_crops_by_week(self, state=None, weeks=4, limit=5):
+        """Most recommended primary crops per state per ISO week over the last N weeks."""
+        since = iso_week(time.time() - (weeks - 1) * 7 * 86400)
+        query = ('SELECT state, week, crop, count, confidence_sum FROM crop_state_week WHERE week >= ?'
+                 + (' AND state = ?' if state else '') + ' ORDER BY week DESC, state, count DESC, crop')
+        grouped = defaultdict(list)
+        for row_state, week, crop, count, confidence_sum in self._read_rollups(query, (since, state) if state else (since,)):
+            crops = grouped[(week, row_state)]
+            if len(crops) < limit:
+                crops.append({'crop': crop, 'count': count, 'mean_confidence': confidence_sum / count})
+        return [{'week': week, 'state': row_state, 'top_crops': crops} for (week, row_state), crops in grouped.items()]
+
+    def confidence_distribution(self, soil_type=None):
+        """Histogram of primary-recommendation confidence per soil type."""
+        query = ('SELECT soil_type, bucket, count, confidence_sum FROM confidence_soil'
+                 + (' WHERE soil_type = ?' if soil_type else '') + ' ORDER BY soil_type, bucket')
+        distribution = {}
+        for row_soil, bucket, count, confidence_sum in self._read_rollups(query, (soil_type,) if soil_type else ()):
+            entry = distribution.setdefault(row_soil, {
+                'soil_type': row_soil, 'count': 0, 'confidence_sum': 0.0, 'histogram': [0] * CONFIDENCE_BUCKETS
+            })
+            entry['histogram'][bucket] = count
+            entry['count'] += count
+            entry['confidence_sum'] += confidence_sum
+        results = []
+        for entry in distribution.values():
+            confidence_sum = entry.pop('confidence_sum')
+            entry['mean_confidence'] = confidence_sum / entry['count'] if entry['count'] else None
+            entry['bucket_edges'] = [i / CONFIDENCE_BUCKETS for i in range(CONFIDENCE_BUCKETS + 1)]
+            results.append(entry)
+        return results
+
+    def _rotate(self, conn):
+        """Move the full database aside, prune old files and start a fresh one."""
+        try:
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            conn.close()
+            stamp = f"{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}"
+            rotated = self.path.with_name(f"{self.path.stem}-{stamp}{self.path.suffix}")
+            self.path.rename(rotated)
+            for suffix in ('-wal', '-shm'):
+                Path(f"{self.path}{suffix}").unlink(missing_ok=True)
+            old_files = sorted(self.path.parent.glob(f"{self.path.stem}-*{self.path.suffix}"))
+            for old_file in old_files[:-self.keep_files] if self.keep_files else old_files:
+                old_file.unlink(missing_ok=True)
+            with self._lock:
+                self.stats['rotations'] += 1
+            print(f"Prediction log rotated to {rotated}")
+        except Exception as e:
+            print(f"[ERROR] prediction log rotation: {e}")
+        return self._connect()
+
+    def queue_size(self):
+        """Records waiting for the writer thread."""
+        return self._queue.qsize()
+
+    def snapshot(self):
+        """Queue depth, overflow and flush latency metrics."""
+        with self._lock:
+            stats = dict(self.stats)
+        batches = stats.pop('batches')
+        total_flush_ms = stats.pop('total_flush_ms')
+        return {
+            'path': str(self.path),
+            'error': self.error,
+            'queue_depth': self._queue.qsize(),
+            'queue_capacity': self._queue.maxsize,
+            'batches': batches,
+            'mean_flush_ms': total_flush_ms / batches if batches else None,
+            **stats
+        }
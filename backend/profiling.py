@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Opt-in per-request profiling with a bounded on-disk ring of pstats files.
+
+``RequestProfiler`` wraps the WSGI app. A request is profiled with cProfile
+(covering Flask dispatch, the model call and response serialization) when it
+carries ``X-Profile: 1`` together with a valid admin token, or when it is
+picked by the sampling rate for one of the sampled path prefixes. Other
+requests go straight through. Each profile is written with
+``Profile.dump_stats`` and only the newest ``keep`` files are kept.
+
+Only one request is profiled at a time (a process can run a single cProfile
+session on Python 3.12+); selected requests that arrive meanwhile are served
+unprofiled and counted as busy. Streaming responses (no Content-Length, such
+as the SSE stream) are profiled until their headers are sent and then passed
+through untouched, since draining them would never finish.
+"""
+import cProfile
+import hmac
+import io
+import pstats
+import random
+import re
+import threading
+import time
+from pathlib import Path
+
+PROFILE_HEADER = 'X-Profile'
+ADMIN_TOKEN_HEADER = 'X-Admin-Token'
+PROFILE_ID_HEADER = 'X-Profile-Id'
+PROFILE_NAME_PATTERN = re.compile(r'^[\w.-]+\.pstats$')
+
+
+def admin_token_valid(supplied, expected):
+    """Constant-time comparison; admin access is disabled when no token is configured."""
+    return bool(expected) and supplied is not None and hmac.compare_digest(supplied, expected)
+
+
+class RequestProfiler:
+    """WSGI middleware that profiles selected requests into a ring of pstats files."""
+
+    def __init__(self, wsgi_app, directory, admin_token=None, sample_rate=0.0, path_prefixes=(), keep=50):
+        self.wsgi_app = wsgi_app
+        self.directory = Path(directory)
+        self.admin_token = admin_token
+        self.sample_rate = sample_rate
+        self.path_prefixes = tuple(path_prefixes)
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._active = threading.Lock()  # Held while a request is being profiled
+        self.stats = {'profiled': 0, 'sampled': 0, 'requested': 0, 'rejected': 0, 'busy': 0, 'streamed': 0, 'errors': 0}
+
+    def _should_profile(self, environ):
+        """Return 'requested', 'sampled' or None; a bad token on X-Profile is counted and ignored."""
+        if environ.get('HTTP_X_PROFILE') == '1':
+            if admin_token_valid(environ.get('HTTP_X_ADMIN_TOKEN'), self.admin_token):
+                return 'requested'
+            with self._lock:
+                self.stats['rejected'] += 1
+        if self.sample_rate > 0 and environ.get('PATH_INFO', '').startswith(self.path_prefixes) \
+                and random.random() < self.sample_rate:
+            return 'sampled'
+        return None
+
+    def __call__(self, environ, start_response):
+        reason = self._should_profile(environ) if (self.admin_token or self.sample_rate > 0) else None
+        if reason is None:
+            return self.wsgi_app(environ, start_response)
+        if not self._active.acquire(blocking=False):
+            with self._lock:
+                self.stats['busy'] += 1
+            return self.wsgi_app(environ, start_response)
+        try:
+            return self._profile(environ, start_response, reason)
+        finally:
+            self._active.release()
+
+    def _profile(self, environ, start_response, reason):
+        """Run one request under cProfile and save the result (caller holds the active lock)."""
+        slug = re.sub(r'[^\w-]+', '_', environ.get('PATH_INFO', '/').strip('/')) or 'root'
+        now_ns = time.time_ns()
+        stamp = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now_ns // 1_000_000_000))}-{now_ns // 1000 % 1_000_000:06d}"
+        name = f"{stamp}-{environ.get('REQUEST_METHOD', 'GET')}-{slug[:60]}.pstats"
+
+        sent_headers = []
+
+        def start_with_id(status, headers, exc_info=None):
+            sent_headers.extend(headers)
+            return start_response(status, headers + [(PROFILE_ID_HEADER, name)], exc_info)
+
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            result = self.wsgi_app(environ, start_with_id)
+            if not any(header.lower() == 'content-length' for header, _ in sent_headers):
+                # A stream may never end; keep what was profiled up to the headers
+                with self._lock:
+                    self.stats['streamed'] += 1
+                return result
+            # Drain the body inside the profiler so serialization is included
+            try:
+                return list(result)
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+        finally:
+            profiler.disable()
+            self._save(profiler, name, reason, time.perf_counter() - start)
+
+    def _save(self, profiler, name, reason, duration_s):
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(self.directory / name)
+            with self._lock:
+                self.stats['profiled'] += 1
+                self.stats[reason] += 1
+                for old in self.list()[self.keep:]:
+                    (self.directory / old['name']).unlink(missing_ok=True)
+            print(f"[DEBUG] Profiled request ({reason}, {duration_s * 1000:.1f}ms) -> {name}")
+        except Exception as e:
+            print(f"[ERROR] saving profile {name}: {e}")
+            with self._lock:
+                self.stats['errors'] += 1
+
+    def list(self):
+        """Stored profiles, newest first."""
+        if not self.directory.exists():
+            return []
+        files = sorted(self.directory.glob('*.pstats'), key=lambda path: path.name, reverse=True)
+        return [{'name': path.name, 'bytes': path.stat().st_size, 'created': path.stat().st_mtime} for path in files]
+
+    def path_for(self, name):
+        """Path of a stored profile, or None if the name is invalid or unknown."""
+        if not PROFILE_NAME_PATTERN.match(name):
+            return None
+        path = self.directory / name
+        return path if path.exists() else None
+
+    def summary(self, name, sort='cumulative', limit=40):
+        """Text report of one profile, as printed by pstats; None if it does not exist (any more)."""
+        path = self.path_for(name)
+        if path is None:
+            return None
+        output = io.StringIO()
+        try:
+            pstats.Stats(str(path), stream=output).sort_stats(sort).print_stats(limit)
+        except FileNotFoundError:
+            # Pruned from the ring since path_for checked it
+            return None
+        return output.getvalue()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'directory': str(self.directory),
+                'sample_rate': self.sample_rate,
+                'path_prefixes': list(self.path_prefixes),
+                'keep': self.keep,
+                'on_demand': bool(self.admin_token),
+                **self.stats
+            }
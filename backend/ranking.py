@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Constraint-aware ranking of model classes.
+
+Boolean masks over the model's class axis (season, water requirement level,
+perennial vs annual) are derived from CROP_INFO once per loaded model. A
+request's constraints are combined into one mask and applied to the
+probability vector with numpy, so filtering and re-ranking never loops over
+crops in Python.
+"""
+import numpy as np
+
+SEASONS = ['kharif', 'rabi', 'summer', 'perennial']
+CROP_TYPES = ['annual', 'perennial']
+# Ordinal water requirement levels; a farmer's availability admits every crop at or below it
+WATER_LEVELS = {'very low': 0, 'low': 1, 'low-medium': 1.5, 'medium': 2, 'medium-high': 2.5, 'high': 3}
+
+
+class ClassConstraints:
+    """Per-class attributes from CROP_INFO as arrays aligned with the model's classes."""
+
+    def __init__(self, class_names, crop_info, default_details):
+        self.class_names = [str(name) for name in class_names]
+        self.n_classes = len(self.class_names)
+        details = [crop_info.get(name.lower(), default_details) for name in self.class_names]
+        seasons = [str(detail.get('season', '')).lower() for detail in details]
+        # Crops without a recognised season ('Varies') are allowed in every season
+        unrestricted = np.array([not any(season in text for season in SEASONS) for text in seasons])
+        self.season_masks = {
+            season: np.array([season in text for text in seasons]) | unrestricted for season in SEASONS
+        }
+        perennial = np.array(['perennial' in text for text in seasons])
+        self.crop_type_masks = {'perennial': perennial, 'annual': ~perennial}
+        default_level = WATER_LEVELS[str(default_details.get('water_requirement', 'medium')).lower()]
+        self.water_levels = np.array([
+            WATER_LEVELS.get(str(detail.get('water_requirement', '')).lower(), default_level) for detail in details
+        ])
+        self.class_index = {}
+        for index, name in enumerate(self.class_names):
+            self.class_index.setdefault(name.lower(), []).append(index)
+
+    def mask(self, season=None, water_requirement=None, crop_type=None, exclude=()):
+        """Combined boolean mask of classes that satisfy every given constraint.
+
+        Raises ValueError naming the first unknown constraint value.
+        """
+        allowed = np.ones(self.n_classes, dtype=bool)
+        if season:
+            if season.lower() not in self.season_masks:
+                raise ValueError(f"Unknown season: {season}; expected one of {SEASONS}")
+            allowed &= self.season_masks[season.lower()]
+        if water_requirement:
+            if water_requirement.lower() not in WATER_LEVELS:
+                raise ValueError(f"Unknown water_requirement: {water_requirement}; expected one of {list(WATER_LEVELS)}")
+            allowed &= self.water_levels <= WATER_LEVELS[water_requirement.lower()]
+        if crop_type:
+            if crop_type.lower() not in self.crop_type_masks:
+                raise ValueError(f"Unknown crop_type: {crop_type}; expected one of {CROP_TYPES}")
+            allowed &= self.crop_type_masks[crop_type.lower()]
+        excluded = [index for name in exclude for index in self.class_index.get(str(name).lower(), [])]
+        allowed[excluded] = False
+        return allowed
+
+    def rank(self, probabilities, allowed=None, k=3, min_confidence=0.0):
+        """Indices of the k most probable allowed classes at or above min_confidence, best first."""
+        eligible = probabilities >= min_confidence
+        if allowed is not None:
+            eligible &= allowed
+        candidates = np.flatnonzero(eligible)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-probabilities[candidates], k - 1)[:k]]
+        return candidates[np.argsort(-probabilities[candidates], kind='stable')]
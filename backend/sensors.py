@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""Live sensor ingestion with per-field ring buffers and change-triggered re-scoring.
+
+Each field keeps its recent readings in fixed-size NumPy ring buffers (one
+timestamp column and one column per model input), so memory per field is
+bounded no matter how often sensors report. Aggregated features are derived
+over a rolling window: cumulative rainfall and the mean of every other input.
+A field is re-scored only when an aggregated feature has moved past its
+threshold since the last scoring, and subscribers (the SSE stream) are told
+when the resulting recommendation changes.
+
+Readings stamped more than ``max_clock_skew_s`` in the future are rejected,
+since the window follows the newest timestamp. Only one re-score per field
+runs at a time, and the number of subscribers is capped because each one
+holds a server thread.
+"""
+import queue
+import threading
+import time
+
+import numpy as np
+
+SENSOR_FIELDS = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']
+# Summed over the window; every other input is averaged
+CUMULATIVE_FIELDS = ['rainfall']
+# Feature movement that triggers a re-score
+DEFAULT_THRESHOLDS = {
+    'N': 10.0, 'P': 5.0, 'K': 10.0, 'temperature': 1.5, 'humidity': 5.0, 'ph': 0.2, 'rainfall': 10.0
+}
+
+
+class FieldBuffer:
+    """Fixed-capacity ring of timestamped readings; fields a reading omits are NaN."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.timestamps = np.full(capacity, -np.inf)
+        self.values = np.full((capacity, len(SENSOR_FIELDS)), np.nan)
+        self.cumulative = np.isin(SENSOR_FIELDS, CUMULATIVE_FIELDS)
+        self.next = 0
+        self.count = 0
+
+    def append(self, timestamps, values):
+        """Append (n,) timestamps and (n, fields) values, overwriting the oldest rows."""
+        n = len(timestamps)
+        if n > self.capacity:
+            timestamps, values, n = timestamps[-self.capacity:], values[-self.capacity:], self.capacity
+        rows = (self.next + np.arange(n)) % self.capacity
+        self.timestamps[rows] = timestamps
+        self.values[rows] = values
+        self.next = int((self.next + n) % self.capacity)
+        self.count = min(self.count + n, self.capacity)
+
+    def features(self, window_s):
+        """Aggregates over readings within window_s of the newest one; NaN where a field has none."""
+        latest = self.timestamps.max()
+        in_window = self.timestamps >= latest - window_s
+        values = self.values[in_window]
+        observed = ~np.isnan(values)
+        counts = observed.sum(axis=0)
+        sums = np.where(observed, values, 0.0).sum(axis=0)
+        means = np.divide(sums, counts, out=np.full(len(SENSOR_FIELDS), np.nan), where=counts > 0)
+        return np.where(self.cumulative & (counts > 0), sums, means)
+
+
+class FieldState:
+    """Buffered readings of one field and the recommendation last computed for it."""
+
+    def __init__(self, capacity):
+        self.buffer = FieldBuffer(capacity)
+        self.soil_type = None
+        self.state = None
+        self.scored_features = None  # Features the current recommendation was computed from
+        self.rescoring = False  # A re-score was handed out and has not been published yet
+        self.recommendations = None
+        self.version = 0
+        self.updated = None
+
+
+class SensorHub:
+    """Per-field sensor windows, re-score decisions and change notifications."""
+
+    def __init__(self, capacity=2016, window_s=7 * 24 * 3600, thresholds=None, max_fields=1000, subscriber_queue_size=100,
+                 max_subscribers=100, max_clock_skew_s=300):
+        self.capacity = capacity
+        self.window_s = window_s
+        self.thresholds = np.array([(thresholds or DEFAULT_THRESHOLDS).get(name, DEFAULT_THRESHOLDS[name])
+                                    for name in SENSOR_FIELDS])
+        self.max_fields = max_fields
+        self.subscriber_queue_size = subscriber_queue_size
+        self.max_subscribers = max_subscribers
+        self.max_clock_skew_s = max_clock_skew_s
+        self.fields = {}
+        self._subscribers = []  # (queue, field_id or None for every field)
+        self._lock = threading.Lock()
+        self.stats = {'readings': 0, 'rescored': 0, 'skipped': 0, 'rescore_in_progress': 0, 'changes': 0,
+                      'dropped_events': 0, 'rejected_subscribers': 0}
+
+    def ingest(self, field_id, readings, soil_type=None, state=None, defaults=None):
+        """Record readings for a field and decide whether it needs re-scoring.
+
+        readings is a list of dicts with any of SENSOR_FIELDS and an optional
+        epoch ``timestamp``. Features no sensor has reported fall back to
+        ``defaults`` (e.g. a regional soil profile). Returns (features dict,
+        missing feature names, names of features past their threshold, rescore).
+        A True rescore must be followed by publish() or abandon_rescore();
+        until then other updates of the field are not re-scored.
+        Raises ValueError for non-numeric readings, timestamps too far in the
+        future or when the field limit is reached.
+        """
+        now = time.time()
+        timestamps = np.array([float(reading.get('timestamp', now)) for reading in readings])
+        if not np.isfinite(timestamps).all() or (timestamps > now + self.max_clock_skew_s).any():
+            raise ValueError(f"timestamps must not be more than {self.max_clock_skew_s:g}s in the future")
+        values = np.array([
+            [float(reading[name]) if reading.get(name) is not None else np.nan for name in SENSOR_FIELDS]
+            for reading in readings
+        ]).reshape(len(readings), len(SENSOR_FIELDS))
+
+        with self._lock:
+            field = self.fields.get(field_id)
+            if field is None:
+                if len(self.fields) >= self.max_fields:
+                    raise ValueError(f"Sensor field limit of {self.max_fields} reached")
+                field = self.fields[field_id] = FieldState(self.capacity)
+            soil_changed = soil_type is not None and soil_type != field.soil_type
+            field.soil_type = soil_type or field.soil_type
+            field.state = state or field.state
+            field.buffer.append(timestamps, values)
+            field.updated = now
+            self.stats['readings'] += len(readings)
+
+            features = field.buffer.features(self.window_s)
+            if defaults:
+                fallback = np.array([defaults.get(name, np.nan) for name in SENSOR_FIELDS], dtype=np.float64)
+                features = np.where(np.isnan(features), fallback, features)
+            missing = [name for name, value in zip(SENSOR_FIELDS, features) if np.isnan(value)]
+            if field.scored_features is None:
+                moved = np.ones(len(SENSOR_FIELDS), dtype=bool)
+            else:
+                moved = np.abs(features - field.scored_features) >= self.thresholds
+            changed = [name for name, flag in zip(SENSOR_FIELDS, moved) if flag and name not in missing]
+            rescore = not missing and (bool(changed) or soil_changed)
+            if rescore and field.rescoring:
+                # The re-score already running stands in for this one
+                rescore = False
+                self.stats['rescore_in_progress'] += 1
+            else:
+                field.rescoring = rescore
+                self.stats['rescored' if rescore else 'skipped'] += 1
+        features = {name: (None if np.isnan(value) else value) for name, value in zip(SENSOR_FIELDS, features.tolist())}
+        return features, missing, changed, rescore
+
+    def publish(self, field_id, features, recommendations):
+        """Store a field's new recommendation; notify subscribers if the ranked crops changed."""
+        with self._lock:
+            field = self.fields[field_id]
+            field.rescoring = False
+            previous = [r['crop'] for r in field.recommendations] if field.recommendations else None
+            field.scored_features = np.array([features[name] for name in SENSOR_FIELDS])
+            field.recommendations = recommendations
+            if previous == [r['crop'] for r in recommendations]:
+                return False
+            field.version += 1
+            self.stats['changes'] += 1
+            event = {
+                'field_id': field_id,
+                'version': field.version,
+                'previous': previous,
+                'recommendations': recommendations,
+                'features': features,
+                'timestamp': time.time()
+            }
+            for subscriber, wanted in self._subscribers:
+                if wanted is None or wanted == field_id:
+                    try:
+                        subscriber.put_nowait(event)
+                    except queue.Full:
+                        self.stats['dropped_events'] += 1
+            return True
+
+    def abandon_rescore(self, field_id):
+        """Release a field whose re-score failed so the next update can re-score it."""
+        with self._lock:
+            field = self.fields.get(field_id)
+            if field is not None:
+                field.rescoring = False
+
+    def subscribe(self, field_id=None):
+        """Queue that receives change events for one field, or for every field; None at the subscriber limit."""
+        subscriber = queue.Queue(maxsize=self.subscriber_queue_size)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                self.stats['rejected_subscribers'] += 1
+                return None
+            self._subscribers.append((subscriber, field_id))
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers = [(q, wanted) for q, wanted in self._subscribers if q is not subscriber]
+
+    def describe(self, field_id):
+        """Current window features, buffered count and recommendation of a field, or None."""
+        with self._lock:
+            field = self.fields.get(field_id)
+            if field is None:
+                return None
+            features = field.buffer.features(self.window_s)
+            return {
+                'field_id': field_id,
+                'soil_type': field.soil_type,
+                'state': field.state,
+                'buffered_readings': field.buffer.count,
+                'features': {name: (None if np.isnan(value) else value) for name, value in zip(SENSOR_FIELDS, features.tolist())},
+                'recommendations': field.recommendations,
+                'version': field.version,
+                'updated': field.updated
+            }
+
+    def memory_bytes(self):
+        """Field count and bytes held by every field's ring buffers."""
+        with self._lock:
+            buffer_bytes = sum(field.buffer.timestamps.nbytes + field.buffer.values.nbytes for field in self.fields.values())
+            return len(self.fields), buffer_bytes
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'fields': len(self.fields),
+                'subscribers': len(self._subscribers),
+                'max_subscribers': self.max_subscribers,
+                'capacity': self.capacity,
+                'window_s': self.window_s,
+                'thresholds': dict(zip(SENSOR_FIELDS, self.thresholds.tolist())),
+                **self.stats
+            }
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Shadow evaluation of a candidate model on sampled live traffic.
+
+A sampled fraction of /predict inputs is copied onto a bounded queue and scored
+by the shadow model on a background thread, so the primary request never waits
+on it. When the queue is full the sample is dropped and counted instead.
+Statistics are kept per worker process.
+"""
+import queue
+import random
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+class ShadowEvaluator:
+    """Scores sampled requests with a secondary model and tracks agreement with the primary."""
+
+    def __init__(self, queue_size=256, sample_rate=0.1, latency_window=1000):
+        self.sample_rate = sample_rate
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._latency_window = latency_window
+        self._worker = None
+        self.model = None
+        self.scaler = None
+        self.name = None
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.offered = 0
+        self.enqueued = 0
+        self.dropped = 0
+        self.scored = 0
+        self.errors = 0
+        self.top1_matches = 0
+        self.top3_overlap_total = 0.0
+        self.confidence_delta_total = 0.0
+        self.abs_confidence_delta_total = 0.0
+        self.latencies_ms = deque(maxlen=self._latency_window)
+        self.loaded_at = time.time()
+
+    @property
+    def enabled(self):
+        return self.model is not None
+
+    def load(self, model, scaler, name, sample_rate=None):
+        """Install a shadow model and start the background worker if needed."""
+        with self._lock:
+            self.model = model
+            self.scaler = scaler
+            self.name = name
+            if sample_rate is not None:
+                self.sample_rate = sample_rate
+            self._reset_stats()
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name='shadow-evaluator', daemon=True)
+            self._worker.start()
+
+    def unload(self):
+        """Stop shadow scoring; queued samples are discarded by the worker."""
+        with self._lock:
+            self.model = None
+            self.scaler = None
+            self.name = None
+
+    def offer(self, input_data, primary_probabilities, primary_classes):
+        """Maybe enqueue a request for shadow scoring; never blocks the caller."""
+        if self.model is None or random.random() >= self.sample_rate:
+            return False
+        try:
+            self._queue.put_nowait((input_data, primary_probabilities, primary_classes))
+            enqueued = True
+        except queue.Full:
+            enqueued = False
+        with self._lock:
+            self.offered += 1
+            if enqueued:
+                self.enqueued += 1
+            else:
+                self.dropped += 1
+        return enqueued
+
+    def _run(self):
+        while True:
+            input_data, primary_probabilities, primary_classes = self._queue.get()
+            with self._lock:
+                model, scaler = self.model, self.scaler
+            if model is None:
+                continue
+            try:
+                start = time.perf_counter()
+                model_input = scaler.transform(input_data) if scaler is not None else input_data
+                shadow_probabilities = model.predict_proba(model_input)[0]
+                latency_ms = (time.perf_counter() - start) * 1000
+                self._record(primary_probabilities, np.asarray(primary_classes),
+                             shadow_probabilities, np.asarray(model.classes_), latency_ms)
+            except Exception as e:
+                print(f"[ERROR] shadow evaluation: {e}")
+                with self._lock:
+                    self.errors += 1
+
+    def _record(self, primary_probabilities, primary_classes, shadow_probabilities, shadow_classes, latency_ms):
+        primary_top = primary_classes[np.argsort(primary_probabilities)[-3:][::-1]]
+        shadow_top = shadow_classes[np.argsort(shadow_probabilities)[-3:][::-1]]
+        confidence_delta = float(np.max(shadow_probabilities) - np.max(primary_probabilities))
+        with self._lock:
+            self.scored += 1
+            self.top1_matches += int(primary_top[0] == shadow_top[0])
+            self.top3_overlap_total += len(set(primary_top.tolist()) & set(shadow_top.tolist())) / 3
+            self.confidence_delta_total += confidence_delta
+            self.abs_confidence_delta_total += abs(confidence_delta)
+            self.latencies_ms.append(latency_ms)
+
+    def queue_size(self):
+        """Sampled requests waiting to be scored by the shadow model."""
+        return self._queue.qsize()
+
+    def stats(self):
+        """Snapshot of sampling counters, agreement rates and shadow latency."""
+        with self._lock:
+            scored = self.scored
+            latencies = np.asarray(self.latencies_ms)
+            return {
+                'enabled': self.model is not None,
+                'shadow_model': self.name,
+                'sample_rate': self.sample_rate,
+                'since': self.loaded_at,
+                'queue_depth': self._queue.qsize(),
+                'queue_capacity': self._queue.maxsize,
+                'offered': self.offered,
+                'enqueued': self.enqueued,
+                'dropped': self.dropped,
+                'scored': scored,
+                'errors': self.errors,
+                'top1_agreement': self.top1_matches / scored if scored else None,
+                'top3_agreement': self.top3_overlap_total / scored if scored else None,
+                'mean_confidence_delta': self.confidence_delta_total / scored if scored else None,
+                'mean_abs_confidence_delta': self.abs_confidence_delta_total / scored if scored else None,
+                'latency_ms': {
+                    'mean': float(latencies.mean()),
+                    'p50': float(np.percentile(latencies, 50)),
+                    'p95': float(np.percentile(latencies, 95)),
+                    'max': float(latencies.max())
+                } if len(latencies) else None
+            }
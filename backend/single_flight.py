@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Single-flight coalescing of identical in-flight computations.
+
+While a computation for a key is running, further callers with the same key
+wait on its Future and share its result (or exception) instead of running it
+again. Nothing is kept once the computation finishes; this is not a cache.
+"""
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Run at most one computation per key at a time and share the outcome with every caller."""
+
+    def __init__(self):
+        self._inflight = {}  # key -> Future shared by the leader and its followers
+        self._lock = threading.Lock()
+        self.stats = {'leaders': 0, 'coalesced': 0, 'errors': 0, 'max_followers': 0}
+        self._followers = {}
+
+    def do(self, key, compute, timeout=None):
+        """Return (result, shared): shared is True when another caller's computation was reused.
+
+        Followers wait at most ``timeout`` seconds and get
+        concurrent.futures.TimeoutError after that; the leader always runs
+        ``compute`` to completion.
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                self._followers[key] = 0
+                self.stats['leaders'] += 1
+            else:
+                self._followers[key] += 1
+                self.stats['coalesced'] += 1
+                self.stats['max_followers'] = max(self.stats['max_followers'], self._followers[key])
+
+        if not leader:
+            return future.result(timeout=timeout), True
+
+        try:
+            result = compute()
+        except Exception as e:
+            with self._lock:
+                self.stats['errors'] += 1
+                self._inflight.pop(key, None)
+                self._followers.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._inflight.pop(key, None)
+            self._followers.pop(key, None)
+        future.set_result(result)
+        return result, False
+
+    def snapshot(self):
+        with self._lock:
+            return {'in_flight': len(self._inflight), **self.stats}
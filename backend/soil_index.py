@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Nearest-neighbour lookup over geolocated soil sample records.
+
+The sample table (CSV with lat, lon, N, P, K, ph and optional soil_type) is
+loaded once and indexed with a haversine BallTree, so a lookup is a
+logarithmic-time tree query even over hundreds of thousands of points.
+Nearby samples are combined into one N/P/K/pH profile by inverse-distance
+weighting.
+"""
+import time
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+NUTRIENT_COLUMNS = ['N', 'P', 'K', 'ph']
+
+
+class SoilSampleIndex:
+    """Spatial index over soil samples that aggregates the nearest records."""
+
+    def __init__(self, samples, source=None):
+        from sklearn.neighbors import BallTree
+
+        missing = [column for column in ['lat', 'lon'] + NUTRIENT_COLUMNS if column not in samples.columns]
+        if missing:
+            raise ValueError(f"Soil samples are missing columns: {missing}")
+        samples = samples.dropna(subset=['lat', 'lon'] + NUTRIENT_COLUMNS).reset_index(drop=True)
+        start = time.perf_counter()
+        self.source = source
+        self.nutrients = samples[NUTRIENT_COLUMNS].to_numpy(dtype=np.float64)
+        self.soil_types = samples['soil_type'].astype(str).to_numpy() if 'soil_type' in samples.columns else None
+        self.tree = BallTree(np.radians(samples[['lat', 'lon']].to_numpy(dtype=np.float64)), metric='haversine')
+        self.build_time_s = time.perf_counter() - start
+        self.size = len(samples)
+
+    @classmethod
+    def from_csv(cls, path):
+        """Load and index a soil sample CSV."""
+        import pandas as pd
+
+        return cls(pd.read_csv(path), source=str(path))
+
+    def nearest(self, lat, lon, k=8, max_distance_km=None):
+        """Return (distances_km, row_indices) of the k closest samples within the radius."""
+        k = min(k, self.size)
+        distances, indices = self.tree.query(np.radians([[lat, lon]]), k=k)
+        distances_km = distances[0] * EARTH_RADIUS_KM
+        indices = indices[0]
+        if max_distance_km is not None:
+            within = distances_km <= max_distance_km
+            distances_km, indices = distances_km[within], indices[within]
+        return distances_km, indices
+
+    def aggregate(self, lat, lon, k=8, max_distance_km=None):
+        """Inverse-distance weighted N/P/K/pH of the nearest samples, or None if none qualify."""
+        distances_km, indices = self.nearest(lat, lon, k, max_distance_km)
+        if len(indices) == 0:
+            return None
+        # A small floor keeps a sample at the exact query point from taking all the weight
+        weights = 1.0 / np.maximum(distances_km, 0.05)
+        profile = np.average(self.nutrients[indices], axis=0, weights=weights)
+        result = {column: round(float(value), 2) for column, value in zip(NUTRIENT_COLUMNS, profile)}
+        result.update({
+            'samples_used': int(len(indices)),
+            'nearest_km': round(float(distances_km[0]), 3),
+            'farthest_km': round(float(distances_km[-1]), 3)
+        })
+        if self.soil_types is not None:
+            values, counts = np.unique(self.soil_types[indices], return_counts=True)
+            result['soil_type'] = str(values[np.argmax(counts)])
+        return result
+
+    def info(self):
+        return {'source': self.source, 'samples': self.size, 'build_time_s': round(self.build_time_s, 3)}
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""Columnar, memory-mapped soil profile store built from soil health card data.
+
+``build_soil_store`` streams a (possibly multi-million row) CSV in chunks into
+one raw binary file per column (float32 nutrients, integer state/district
+codes) and then precomputes per-state and per-district aggregates (count,
+mean and percentiles of N, P, K and pH). ``SoilProfileStore`` memory-maps the
+result, so opening it costs almost nothing and serving a profile is an array
+row read. The store is built in a temporary sibling directory and renamed into
+place only when complete, so a crashed build never leaves a store that looks
+valid.
+
+Usage:
+    python backend/soil_store.py soil_health_cards.csv Models/soil_store
+    python backend/soil_store.py cards.csv Models/soil_store --state-column State --n-column Nitrogen
+"""
+import argparse
+import json
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+NUTRIENTS = ['N', 'P', 'K', 'ph']
+PERCENTILES = {'p10': 10, 'p25': 25, 'median': 50, 'p75': 75, 'p90': 90}
+STATISTICS = ['count', 'mean'] + list(PERCENTILES)
+STORE_VERSION = 1
+
+
+def normalize_name(name):
+    """Case- and whitespace-insensitive key for state and district names."""
+    return ' '.join(str(name).split()).lower()
+
+
+def normalized_names(names):
+    """Vectorized normalize_name over a pandas Series."""
+    return names.astype(str).str.strip().str.replace(r'\s+', ' ', regex=True).str.lower()
+
+
+def grouped_statistics(codes, values, n_groups):
+    """Count, mean and percentiles of values per integer group code, fully vectorized."""
+    order = np.lexsort((values, codes))
+    sorted_codes = codes[order]
+    sorted_values = values[order].astype(np.float64)
+    starts = np.searchsorted(sorted_codes, np.arange(n_groups), side='left')
+    ends = np.searchsorted(sorted_codes, np.arange(n_groups), side='right')
+    counts = ends - starts
+
+    result = np.full((n_groups, len(STATISTICS)), np.nan, dtype=np.float32)
+    result[:, 0] = counts
+    present = counts > 0
+    sums = np.add.reduceat(sorted_values, starts[present]) if present.any() else np.array([])
+    result[present, 1] = sums / counts[present]
+    for column, q in enumerate(PERCENTILES.values(), start=2):
+        # Linear interpolation between the closest ranks, as np.percentile does
+        position = starts[present] + (counts[present] - 1) * (q / 100.0)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, ends[present] - 1)
+        fraction = position - lower
+        result[present, column] = sorted_values[lower] * (1 - fraction) + sorted_values[upper] * fraction
+    return result
+
+
+def build_soil_store(csv_path, out_dir, columns=None, chunksize=500_000):
+    """Convert a soil health card CSV into the columnar store; returns its metadata."""
+    import pandas as pd
+
+    columns = {'state': 'state', 'district': 'district', 'N': 'N', 'P': 'P', 'K': 'K', 'ph': 'ph', **(columns or {})}
+    out_dir = Path(out_dir)
+    build_dir = out_dir.with_name(out_dir.name + '.tmp')
+    shutil.rmtree(build_dir, ignore_errors=True)
+    build_dir.mkdir(parents=True)
+    start = time.perf_counter()
+
+    state_codes, district_codes = {}, {}
+    state_names, districts = [], []
+    rows, dropped = 0, 0
+    column_files = {name: open(build_dir / f"{name}.bin", 'wb') for name in NUTRIENTS + ['state_code', 'district_code']}
+    try:
+        for chunk in pd.read_csv(csv_path, usecols=list(columns.values()), chunksize=chunksize):
+            chunk = chunk.rename(columns={source: name for name, source in columns.items()})
+            complete = chunk.dropna(subset=['state'] + NUTRIENTS)
+            dropped += len(chunk) - len(complete)
+            if complete.empty:
+                continue
+
+            # Register new names from the distinct values only, then map codes vectorized
+            state_keys = normalized_names(complete['state'])
+            for key, raw in pd.DataFrame({'key': state_keys, 'raw': complete['state'].astype(str).str.strip()}).drop_duplicates('key').itertuples(index=False):
+                if key not in state_codes:
+                    state_codes[key] = len(state_names)
+                    state_names.append(raw)
+            chunk_state_codes = state_keys.map(state_codes).to_numpy(dtype=np.int16)
+
+            district_raw = complete['district'].fillna('Unknown').astype(str).str.strip()
+            district_keys = pd.Series(chunk_state_codes, index=complete.index).astype(str) + '|' + normalized_names(district_raw)
+            for key, code, raw in pd.DataFrame({'key': district_keys, 'code': chunk_state_codes, 'raw': district_raw}).drop_duplicates('key').itertuples(index=False):
+                if key not in district_codes:
+                    district_codes[key] = len(districts)
+                    districts.append([int(code), raw])
+            chunk_district_codes = district_keys.map(district_codes).to_numpy(dtype=np.int32)
+
+            for name in NUTRIENTS:
+                complete[name].to_numpy(dtype=np.float32).tofile(column_files[name])
+            chunk_state_codes.tofile(column_files['state_code'])
+            chunk_district_codes.tofile(column_files['district_code'])
+            rows += len(complete)
+    finally:
+        for handle in column_files.values():
+            handle.close()
+
+    meta = {
+        'version': STORE_VERSION,
+        'source': str(csv_path),
+        'rows': rows,
+        'dropped_rows': dropped,
+        'dtypes': {**{name: 'float32' for name in NUTRIENTS}, 'state_code': 'int16', 'district_code': 'int32'},
+        'states': state_names,
+        'districts': districts,
+        'nutrients': NUTRIENTS,
+        'statistics': STATISTICS
+    }
+    (build_dir / 'meta.json').write_text(json.dumps(meta))
+
+    store = SoilProfileStore(build_dir, require_aggregates=False)
+    state_stats = np.stack([grouped_statistics(store.columns['state_code'], store.columns[name], len(state_names))
+                            for name in NUTRIENTS], axis=1)
+    district_stats = np.stack([grouped_statistics(store.columns['district_code'], store.columns[name], len(districts))
+                               for name in NUTRIENTS], axis=1)
+    np.save(build_dir / 'state_aggregates.npy', state_stats)
+    np.save(build_dir / 'district_aggregates.npy', district_stats)
+    del store
+    meta['build_time_s'] = round(time.perf_counter() - start, 3)
+    (build_dir / 'meta.json').write_text(json.dumps(meta))
+
+    # Swap the finished build into place; a server still mapping the old files keeps reading them
+    previous = out_dir.with_name(out_dir.name + '.old')
+    shutil.rmtree(previous, ignore_errors=True)
+    if out_dir.exists():
+        out_dir.rename(previous)
+    build_dir.rename(out_dir)
+    shutil.rmtree(previous, ignore_errors=True)
+    return meta
+
+
+class SoilProfileStore:
+    """Read-only view over a built store; raw columns and aggregates are memory-mapped."""
+
+    def __init__(self, path, require_aggregates=True):
+        self.path = Path(path)
+        self.meta = json.loads((self.path / 'meta.json').read_text())
+        if self.meta.get('version') != STORE_VERSION:
+            raise ValueError(f"Unsupported soil store version: {self.meta.get('version')}")
+        rows = self.meta['rows']
+        self.columns = {
+            name: np.memmap(self.path / f"{name}.bin", dtype=dtype, mode='r', shape=(rows,)) if rows else np.empty(0, dtype=dtype)
+            for name, dtype in self.meta['dtypes'].items()
+        }
+        self.state_index = {normalize_name(name): code for code, name in enumerate(self.meta['states'])}
+        self.district_index = {(code, normalize_name(name)): i for i, (code, name) in enumerate(self.meta['districts'])}
+        if require_aggregates:
+            self.state_aggregates = np.load(self.path / 'state_aggregates.npy', mmap_mode='r')
+            self.district_aggregates = np.load(self.path / 'district_aggregates.npy', mmap_mode='r')
+
+    def _profile(self, row, statistic):
+        column = STATISTICS.index(statistic)
+        if row[0, 0] == 0:
+            return None
+        profile = {name: round(float(row[i, column]), 2) for i, name in enumerate(NUTRIENTS)}
+        profile['samples'] = int(row[0, 0])
+        return profile
+
+    def state_profile(self, state, statistic='median'):
+        """N/P/K/pH for a state from its precomputed row, or None if the state is absent."""
+        code = self.state_index.get(normalize_name(state))
+        return None if code is None else self._profile(self.state_aggregates[code], statistic)
+
+    def district_profile(self, state, district, statistic='median'):
+        """N/P/K/pH for a district of a state, or None if it is absent."""
+        code = self.state_index.get(normalize_name(state))
+        if code is None:
+            return None
+        index = self.district_index.get((code, normalize_name(district)))
+        return None if index is None else self._profile(self.district_aggregates[index], statistic)
+
+    def describe_state(self, state):
+        """Every statistic for a state and each of its districts."""
+        code = self.state_index.get(normalize_name(state))
+        if code is None:
+            return None
+
+        def table(row):
+            return {name: {stat: round(float(row[i, j]), 2) for j, stat in enumerate(STATISTICS)}
+                    for i, name in enumerate(NUTRIENTS)}
+
+        return {
+            'state': self.meta['states'][code],
+            'aggregates': table(self.state_aggregates[code]),
+            'districts': {name: table(self.district_aggregates[i])
+                          for i, (state_code, name) in enumerate(self.meta['districts']) if state_code == code}
+        }
+
+    def info(self):
+        return {
+            'path': str(self.path),
+            'rows': self.meta['rows'],
+            'states': len(self.meta['states']),
+            'districts': len(self.meta['districts']),
+            'build_time_s': self.meta.get('build_time_s')
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the columnar soil profile store from a soil health card CSV.')
+    parser.add_argument('csv', type=Path, help='Soil health card CSV')
+    parser.add_argument('output', type=Path, help='Directory to write the store to')
+    parser.add_argument('--chunksize', type=int, default=500_000)
+    for name in ['state', 'district'] + NUTRIENTS:
+        parser.add_argument(f"--{name.lower()}-column", dest=f"{name}_column", default=name, help=f"CSV column holding {name}")
+    args = parser.parse_args()
+
+    columns = {name: getattr(args, f"{name}_column") for name in ['state', 'district'] + NUTRIENTS}
+    meta = build_soil_store(args.csv, args.output, columns, args.chunksize)
+    print(f"Soil store written to {args.output}: {meta['rows']} rows ({meta['dropped_rows']} dropped), "
+          f"{len(meta['states'])} states, {len(meta['districts'])} districts in {meta['build_time_s']}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
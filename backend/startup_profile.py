@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Import-time profile and cold-start budget check for the backend.
+
+Each measurement runs in a fresh interpreter so nothing is already imported:
+
+* an ``-X importtime`` run of ``import app``, reported as the modules with the
+  largest cumulative and self import times;
+* cold-start runs that import the app and serve the catalog-only endpoints
+  (/soil-types, /crops, /states, /health) through the Flask test client,
+  timed and checked for heavy modules that should not have been loaded;
+* an import of every offline CLI (training, compaction, comparison, lookup
+  grid, drift baseline), checked for pulling in the app and its singletons.
+
+Exits non-zero when the best cold start exceeds --budget-ms, a forbidden
+module was imported or a CLI imported the app, so it can run as a CI gate.
+
+Usage:
+    python backend/startup_profile.py
+    python backend/startup_profile.py --budget-ms 800 --top 15 --json startup.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent
+CATALOG_ENDPOINTS = ['/soil-types', '/crops', '/states', '/health']
+HEAVY_MODULES = ['pandas', 'sklearn', 'scipy', 'joblib', 'requests']
+CLI_MODULES = ['train', 'compact_model', 'compare_models', 'lookup_grid', 'drift']
+# Importing any of these from a CLI builds the Flask app, its background threads and the model
+SERVER_MODULES = ['app', 'flask']
+
+COLD_START_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+statuses = {path: client.get(path).status_code for path in %r}
+served = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'total_ms': (served - start) * 1000,
+    'statuses': statuses,
+    'loaded_heavy_modules': [name for name in %r if name in sys.modules]
+}))
+"""
+
+
+def run_python(args, env=None):
+    return subprocess.run([sys.executable] + args, cwd=BACKEND_DIR, capture_output=True, text=True,
+                          env={**os.environ, **(env or {})})
+
+
+def import_time_profile(top):
+    """Per-module self and cumulative import times (ms) of `import app`."""
+    result = run_python(['-X', 'importtime', '-c', 'import app'])
+    if result.returncode != 0:
+        raise RuntimeError(f"import app failed:\n{result.stderr}")
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append({'module': name.strip(), 'depth': (len(name) - len(name.lstrip())) // 2,
+                        'self_ms': int(self_us) / 1000, 'cumulative_ms': int(cumulative_us) / 1000})
+    app_module = next(module for module in modules if module['module'] == 'app')
+    return {
+        'total_ms': app_module['cumulative_ms'],
+        'modules_imported': len(modules),
+        'by_cumulative': sorted(modules, key=lambda m: -m['cumulative_ms'])[:top],
+        'by_self': sorted(modules, key=lambda m: -m['self_ms'])[:top]
+    }
+
+
+def cold_start(repeats):
+    """Best-of-N fresh-process time to import the app and serve the catalog endpoints."""
+    runs = []
+    for _ in range(repeats):
+        result = run_python(['-c', COLD_START_SCRIPT % (CATALOG_ENDPOINTS, HEAVY_MODULES)])
+        if result.returncode != 0:
+            raise RuntimeError(f"cold start run failed:\n{result.stderr}")
+        runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    best = min(runs, key=lambda run: run['total_ms'])
+    return {**best, 'runs_ms': [round(run['total_ms'], 1) for run in runs]}
+
+
+def cli_imports():
+    """Server modules loaded by importing each offline CLI in a fresh interpreter."""
+    loaded = {}
+    for module in CLI_MODULES:
+        result = run_python(['-c', f"import json, sys, {module}; print(json.dumps([name for name in {SERVER_MODULES!r} if name in sys.modules]))"])
+        if result.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+        loaded[module] = json.loads(result.stdout.strip().splitlines()[-1])
+    return loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Profile backend import time and enforce a cold-start budget.')
+    parser.add_argument('--budget-ms', type=float, default=float(os.getenv('STARTUP_BUDGET_MS', '1000')),
+                        help='Maximum time to import the app and serve the catalog endpoints')
+    parser.add_argument('--forbid', default=','.join(HEAVY_MODULES),
+                        help='Comma-separated modules that must not be loaded by a catalog-only start')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--top', type=int, default=10, help='Modules to list in the import profile')
+    parser.add_argument('--json', type=Path, help='Also write the report to this JSON file')
+    args = parser.parse_args()
+
+    profile = import_time_profile(args.top)
+    start = cold_start(args.repeats)
+    clis = cli_imports()
+    forbidden = [name for name in args.forbid.split(',') if name]
+    violations = []
+    if start['total_ms'] > args.budget_ms:
+        violations.append(f"cold start {start['total_ms']:.0f}ms exceeds budget {args.budget_ms:.0f}ms")
+    loaded = [name for name in start['loaded_heavy_modules'] if name in forbidden]
+    if loaded:
+        violations.append(f"catalog-only start imported {loaded}")
+    failed = {path: status for path, status in start['statuses'].items() if status != 200}
+    if failed:
+        violations.append(f"catalog endpoints failed: {failed}")
+    coupled = {module: loaded for module, loaded in clis.items() if loaded}
+    if coupled:
+        violations.append(f"CLIs import the server: {coupled}")
+
+    print(f"import app: {profile['total_ms']:.0f}ms across {profile['modules_imported']} modules")
+    print(f"{'module':<40} {'cumulative ms':>14} {'self ms':>10}")
+    for module in profile['by_cumulative']:
+        print(f"{module['module']:<40} {module['cumulative_ms']:>14.1f} {module['self_ms']:>10.1f}")
+    print(f"\nCold start (import + {', '.join(CATALOG_ENDPOINTS)}): best {start['total_ms']:.0f}ms "
+          f"(import {start['import_ms']:.0f}ms), runs {start['runs_ms']}, budget {args.budget_ms:.0f}ms")
+    print(f"Heavy modules loaded: {start['loaded_heavy_modules'] or 'none'}")
+    print(f"CLIs importing the server: {sorted(module for module, loaded in clis.items() if loaded) or 'none'}")
+
+    if args.json:
+        args.json.write_text(json.dumps({'import_profile': profile, 'cold_start': start, 'cli_imports': clis,
+                                         'budget_ms': args.budget_ms, 'violations': violations}, indent=2))
+    if violations:
+        for violation in violations:
+            print(f"FAIL: {violation}")
+        return 1
+    print("OK: startup within budget")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
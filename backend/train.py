@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""Train the crop model and write the serving bundle.
+
+Reads a labelled CSV with the server's nine-feature schema (see
+FEATURE_COLUMNS) plus a label column of crop names or CROP_LABELS codes, then:
+
+* splits it into stratified cross-validation folds and fits the scaler once
+  per fold, caching the scaled fold arrays so hyperparameter candidates reuse
+  them instead of redoing the preprocessing;
+* fits and scores every (candidate, fold) pair in parallel worker processes;
+  joblib memory-maps the cached arrays rather than copying them to each worker;
+* refits the scaler and the best candidate on every row.
+
+The output directory (the Models directory by default) receives, each written
+to a temporary file and renamed into place so a running server never loads a
+partial artifact:
+
+* crop_model.pkl (or CROP_MODEL_FILE) and scaler.pkl, as load_crop_model expects;
+  both are staged before either is renamed, so a reload cannot pair the new
+  scaler with a model that is still being written;
+* feature_schema.json: feature order, soil type encoding and training ranges;
+* class_mapping.json: model class code -> crop name;
+* training_report.json: per-candidate CV scores and phase timings.
+
+Usage:
+    python backend/train.py labelled.csv
+    python backend/train.py labelled.csv --folds 5 --jobs 8 --grid '{"n_estimators": [200, 400], "max_depth": [null, 24]}'
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold
+from sklearn.preprocessing import StandardScaler
+
+from artifacts import CROP_MODEL_PATH, MODELS_DIR, compute_model_version
+from catalog import CROP_LABELS, FEATURE_COLUMNS, REQUIRED_FIELDS, SOIL_TYPES, encode_soil_type
+
+DEFAULT_GRID = {'n_estimators': [100, 200], 'max_depth': [None, 20], 'min_samples_leaf': [1, 2]}
+
+
+def encode_labels(labels):
+    """Map crop names or numeric crop codes to CROP_LABELS indices; raises ValueError on unknown crops."""
+    codes = {name: code for code, name in enumerate(CROP_LABELS)}
+    encoded = []
+    unknown = set()
+    for label in labels:
+        text = str(label).strip()
+        try:
+            code = int(float(text))
+        except ValueError:
+            code = codes.get(text.lower(), -1)
+        if not 0 <= code < len(CROP_LABELS):
+            unknown.add(text)
+        encoded.append(code)
+    if unknown:
+        raise ValueError(f"Unknown crop labels: {sorted(unknown)[:10]}")
+    return np.array(encoded)
+
+
+def encode_features(frame):
+    """Float model feature frame from a dataset frame with the FEATURE_COLUMNS."""
+    features = frame[FEATURE_COLUMNS].copy()
+    # Soil types may be given by name; encode them as the server does
+    if not pd.api.types.is_numeric_dtype(features['Soil_Type']):
+        features['Soil_Type'] = features['Soil_Type'].map(encode_soil_type)
+    return features.astype(float)
+
+
+def load_training_data(data_path, label_column):
+    """Model feature frame and encoded labels from a labelled CSV."""
+    frame = pd.read_csv(data_path)
+    missing = [column for column in FEATURE_COLUMNS + [label_column] if column not in frame.columns]
+    if missing:
+        raise ValueError(f"Dataset is missing columns: {missing}")
+    return encode_features(frame), encode_labels(frame[label_column])
+
+
+def build_fold_cache(X, y, folds, seed):
+    """Scale every cross-validation split once: [(X_train, y_train, X_test, y_test), ...]."""
+    cache = []
+    for train_index, test_index in StratifiedKFold(folds, shuffle=True, random_state=seed).split(X, y):
+        scaler = StandardScaler().fit(X.iloc[train_index])
+        cache.append((scaler.transform(X.iloc[train_index]), y[train_index],
+                      scaler.transform(X.iloc[test_index]), y[test_index]))
+    return cache
+
+
+def score_candidate(params, X_train, y_train, X_test, y_test, seed):
+    """Fit one candidate on one cached fold; returns (accuracy, fit seconds). Runs in a worker."""
+    start = time.perf_counter()
+    model = RandomForestClassifier(random_state=seed, n_jobs=1, **params).fit(X_train, y_train)
+    fit_s = time.perf_counter() - start
+    return float((model.predict(X_test) == y_test).mean()), fit_s
+
+
+def write_atomic(path, write):
+    """Write via a temporary sibling file and rename it over path."""
+    write_together([(path, write)])
+
+
+def write_together(writes):
+    """Write every (path, write) pair to a temporary sibling, then rename them all in order."""
+    staged = []
+    for path, write in writes:
+        temporary = path.with_name(path.name + '.tmp')
+        write(temporary)
+        staged.append((temporary, path))
+    for temporary, path in staged:
+        os.replace(temporary, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the crop model and write the serving bundle.')
+    parser.add_argument('data', type=Path, help='Labelled CSV with the nine model feature columns')
+    parser.add_argument('--label-column', default='label', help='Column holding crop names or crop codes')
+    parser.add_argument('--output-dir', type=Path, default=MODELS_DIR, help='Where to write the bundle')
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--grid', type=json.loads, default=DEFAULT_GRID,
+                        help='JSON object of RandomForestClassifier parameter lists to search')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='Parallel fits')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    timings = {}
+    started = time.perf_counter()
+    X, y = load_training_data(args.data, args.label_column)
+    timings['load_s'] = time.perf_counter() - started
+    print(f"Loaded {len(X)} rows, {len(np.unique(y))} crops from {args.data}")
+
+    phase = time.perf_counter()
+    fold_cache = build_fold_cache(X, y, args.folds, args.seed)
+    timings['fold_cache_s'] = time.perf_counter() - phase
+
+    candidates = [dict(zip(args.grid, values)) for values in itertools.product(*args.grid.values())]
+    tasks = [(candidate_index, fold) for candidate_index in range(len(candidates)) for fold in range(args.folds)]
+    print(f"Searching {len(candidates)} candidates x {args.folds} folds = {len(tasks)} fits on {args.jobs} workers...")
+    phase = time.perf_counter()
+    scores = Parallel(n_jobs=args.jobs)(
+        delayed(score_candidate)(candidates[candidate_index], *fold_cache[fold], args.seed)
+        for candidate_index, fold in tasks
+    )
+    timings['search_s'] = time.perf_counter() - phase
+
+    results = []
+    for candidate_index, params in enumerate(candidates):
+        fold_scores = [scores[i] for i, (index, _) in enumerate(tasks) if index == candidate_index]
+        accuracies = np.array([accuracy for accuracy, _ in fold_scores])
+        results.append({
+            'params': params,
+            'mean_accuracy': float(accuracies.mean()),
+            'std_accuracy': float(accuracies.std()),
+            'mean_fit_s': float(np.mean([fit_s for _, fit_s in fold_scores]))
+        })
+    results.sort(key=lambda result: -result['mean_accuracy'])
+    best = results[0]
+
+    phase = time.perf_counter()
+    scaler = StandardScaler().fit(X)
+    model = RandomForestClassifier(random_state=args.seed, n_jobs=args.jobs, **best['params'])
+    model.fit(scaler.transform(X), y)
+    # The server scores one row at a time, where worker threads only add overhead
+    model.set_params(n_jobs=1)
+    timings['final_fit_s'] = time.perf_counter() - phase
+
+    phase = time.perf_counter()
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    model_path = args.output_dir / CROP_MODEL_PATH.name
+    schema = {
+        'feature_columns': FEATURE_COLUMNS,
+        'request_fields': REQUIRED_FIELDS,
+        'soil_type_encoding': {soil_type: encode_soil_type(soil_type) for soil_type in SOIL_TYPES},
+        'training_rows': int(len(X)),
+        'ranges': {
+            column: {'min': float(X[column].min()), 'max': float(X[column].max()), 'mean': float(X[column].mean())}
+            for column in FEATURE_COLUMNS
+        }
+    }
+    class_mapping = {str(code): CROP_LABELS[code] for code in model.classes_}
+    # Both files are fully written before either replaces the served pair
+    write_together([
+        (model_path, lambda path: joblib.dump(model, path)),
+        (args.output_dir / 'scaler.pkl', lambda path: joblib.dump(scaler, path))
+    ])
+    write_atomic(args.output_dir / 'feature_schema.json', lambda path: path.write_text(json.dumps(schema, indent=2)))
+    write_atomic(args.output_dir / 'class_mapping.json', lambda path: path.write_text(json.dumps(class_mapping, indent=2)))
+    timings['write_s'] = time.perf_counter() - phase
+    timings['total_s'] = time.perf_counter() - started
+
+    report = {
+        'data': str(args.data),
+        'rows': int(len(X)),
+        'folds': args.folds,
+        'jobs': args.jobs,
+        'fits': len(tasks),
+        'best_params': best['params'],
+        'cv_accuracy': best['mean_accuracy'],
+        'candidates': results,
+        'model_version': compute_model_version(model_path),
+        'timings': {name: round(seconds, 3) for name, seconds in timings.items()}
+    }
+    write_atomic(args.output_dir / 'training_report.json', lambda path: path.write_text(json.dumps(report, indent=2)))
+
+    print("\n--- Cross-Validation ---")
+    print(f"{'mean accuracy':>14}{'std':>8}{'fit s':>8}  params")
+    for result in results:
+        print(f"{result['mean_accuracy']:>14.4f}{result['std_accuracy']:>8.4f}{result['mean_fit_s']:>8.2f}  {result['params']}")
+    print("\n--- Training Time ---")
+    for name, seconds in timings.items():
+        print(f"{name:<14}{seconds:>8.2f}s")
+    print(f"\nBest {best['params']} (CV accuracy {best['mean_accuracy']:.4f})")
+    print(f"Wrote {model_path.name}, scaler.pkl, feature_schema.json, class_mapping.json and training_report.json "
+          f"to {args.output_dir} (model version {report['model_version']})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
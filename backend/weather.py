@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""Server-side weather providers and a shared per-state weather cache.
+
+Providers turn a coordinate into the three weather features the crop model
+uses. WeatherCache sits in front of a provider so upstream traffic depends on
+the number of states and the TTL, not on our request rate:
+
+* fresh entries (younger than ``ttl``) are served directly;
+* stale entries (younger than ``ttl + stale_ttl``) are served immediately while
+  one background refresh is scheduled (stale-while-revalidate);
+* concurrent misses for the same key share a single upstream call;
+* a failed fetch is remembered for ``error_ttl`` so an upstream outage is not
+  hit once per request;
+* entries past ``ttl + stale_ttl`` and expired failures are dropped whenever
+  an upstream call completes, so keys that stop being requested do not pile up.
+"""
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Typical values used when no live weather is available
+DEFAULT_WEATHER = {'temperature': 25, 'humidity': 70, 'rainfall': 100}
+
+
+class WeatherProvider:
+    """Interface for weather sources: fetch(lat, lon) -> temperature/humidity/rainfall."""
+
+    name = 'base'
+
+    def fetch(self, lat, lon):
+        raise NotImplementedError
+
+
+class StaticWeatherProvider(WeatherProvider):
+    """Returns the fixed typical values; used when no weather API is configured."""
+
+    name = 'static'
+
+    def fetch(self, lat, lon):
+        return dict(DEFAULT_WEATHER)
+
+
+class OpenWeatherProvider(WeatherProvider):
+    """OpenWeather current-conditions client over a pooled, retrying HTTP session."""
+
+    name = 'openweather'
+
+    def __init__(self, api_key, base_url='https://api.openweathermap.org/data/2.5', timeout=3.0, pool_size=10):
+        # requests is only needed when a weather API is configured
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        retries = Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504], allowed_methods=['GET'])
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retries)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def fetch(self, lat, lon):
+        response = self.session.get(
+            f"{self.base_url}/weather",
+            params={'lat': lat, 'lon': lon, 'appid': self.api_key, 'units': 'metric'},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        data = response.json()
+        return {
+            'temperature': float(data['main']['temp']),
+            'humidity': float(data['main']['humidity']),
+            # Current conditions only report the last hour or so of rain, which is not
+            # comparable to the seasonal rainfall the model was trained on.
+            'rainfall': DEFAULT_WEATHER['rainfall']
+        }
+
+
+class WeatherCache:
+    """Per-key TTL cache with stale-while-revalidate refresh and request coalescing."""
+
+    def __init__(self, provider, ttl=600, stale_ttl=3600, error_ttl=30, refresh_workers=2):
+        self.provider = provider
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.error_ttl = error_ttl
+        self._entries = {}  # key -> (fetched_at, weather)
+        self._failures = {}  # key -> (failed_at, exception)
+        self._inflight = {}  # key -> Future shared by every caller waiting on that key
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix='weather-refresh')
+        self.stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'coalesced': 0,
+                      'upstream_calls': 0, 'upstream_errors': 0, 'cached_errors': 0,
+                      'background_refreshes': 0}
+
+    def get(self, key, lat, lon, timeout=None):
+        """Return weather for key, fetching from the provider only when needed."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry[0]
+                if age < self.ttl:
+                    self.stats['hits'] += 1
+                    return entry[1]
+                if age < self.ttl + self.stale_ttl:
+                    self.stats['stale_hits'] += 1
+                    if key not in self._inflight:
+                        self.stats['background_refreshes'] += 1
+                        future = self._inflight[key] = Future()
+                        self._refresher.submit(self._fetch_into, key, lat, lon, future)
+                    return entry[1]
+            failure = self._failures.get(key)
+            if failure is not None and now - failure[0] < self.error_ttl:
+                self.stats['cached_errors'] += 1
+                raise failure[1]
+            self.stats['misses'] += 1
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self.stats['coalesced'] += 1
+
+        if leader:
+            self._fetch_into(key, lat, lon, future)
+        return future.result(timeout=timeout)
+
+    def _fetch_into(self, key, lat, lon, future):
+        """Call the provider once and publish the outcome to every waiter."""
+        try:
+            with self._lock:
+                self.stats['upstream_calls'] += 1
+            weather = self.provider.fetch(lat, lon)
+            with self._lock:
+                self._entries[key] = (time.time(), weather)
+                self._failures.pop(key, None)
+                self._prune()
+            future.set_result(weather)
+        except Exception as e:
+            print(f"[ERROR] weather fetch for {key}: {e}")
+            with self._lock:
+                self.stats['upstream_errors'] += 1
+                self._failures[key] = (time.time(), e)
+                self._prune()
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _prune(self):
+        """Drop entries too old to be served and failures past error_ttl (lock held)."""
+        now = time.time()
+        expired = [key for key, (fetched_at, _) in self._entries.items() if now - fetched_at >= self.ttl + self.stale_ttl]
+        for key in expired:
+            del self._entries[key]
+        expired = [key for key, (failed_at, _) in self._failures.items() if now - failed_at >= self.error_ttl]
+        for key in expired:
+            del self._failures[key]
+
+    def entry_count(self):
+        with self._lock:
+            return len(self._entries)
+
+    def entries(self):
+        """Copy of the cached (fetched_at, weather) pairs by key."""
+        with self._lock:
+            return dict(self._entries)
+
+    def snapshot(self):
+        """Cache counters plus the age of every cached entry."""
+        now = time.time()
+        with self._lock:
+            return {
+                'provider': self.provider.name,
+                'ttl_s': self.ttl,
+                'stale_ttl_s': self.stale_ttl,
+                'entries': {key: round(now - fetched_at, 1) for key, (fetched_at, _) in self._entries.items()},
+                'in_flight': len(self._inflight),
+                **self.stats
+            }
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Local stand-in for the OpenWeather current-conditions API.
+
+Serves deterministic OpenWeather-shaped responses derived from the requested
+coordinates and counts requests, so the weather cache can be exercised
+without network access or an API key.
+
+Usage:
+    python backend/weather_stub.py --port 8765
+    WEATHER_API_KEY=stub WEATHER_API_BASE_URL=http://127.0.0.1:8765 python backend/app.py
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class StubWeatherServer:
+    """Threaded HTTP server answering GET /weather?lat=..&lon=.. like OpenWeather."""
+
+    def __init__(self, host='127.0.0.1', port=0, delay=0.0):
+        self.delay = delay
+        self.request_count = 0
+        self._count_lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = parse_qs(url.query)
+                with stub._count_lock:
+                    stub.request_count += 1
+                if url.path != '/weather' or 'lat' not in params or 'lon' not in params:
+                    self.send_error(404)
+                    return
+                if stub.delay:
+                    time.sleep(stub.delay)
+                lat, lon = float(params['lat'][0]), float(params['lon'][0])
+                body = json.dumps({
+                    'coord': {'lat': lat, 'lon': lon},
+                    'main': {'temp': round(35 - abs(lat) * 0.5, 1), 'humidity': int(40 + (lon % 50))},
+                    'weather': [{'main': 'Clear', 'description': 'clear sky', 'icon': '01d'}],
+                    'wind': {'speed': 2.5}
+                }).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='weather-stub', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run a local OpenWeather stub server.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay', type=float, default=0.0, help='Seconds to wait before each response')
+    args = parser.parse_args()
+    stub = StubWeatherServer(args.host, args.port, args.delay)
+    print(f"Weather stub listening on {stub.base_url}")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
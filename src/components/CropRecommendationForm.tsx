@@ -321,12 +321,14 @@ export default function CropRecommendationForm() {
       });
 
       if (!response.ok) {
-        throw new Error('Failed to get crop recommendation');
+        const errorBody = await response.json().catch(() => null);
+        throw new Error(errorBody?.error || 'Failed to get crop recommendation');
       }
 
       const result: PredictionResult = await response.json();
       
       console.log('Raw backend response:', result);
+      console.log('Server timing:', response.headers.get('Server-Timing'));
       console.log('Primary recommendation crop:', result.primary_recommendation.crop);
       console.log('Other recommendations:', result.other_recommendations.map(r => r.crop));
       
@@ -58,10 +58,17 @@ export interface RegionalData {
   }>;
 }
 
+export interface WeatherData {
+  temperature: number;
+  humidity: number;
+  rainfall: number;
+}
+
 export interface EnvironmentalData {
   soilData?: SoilData;
   cropRecommendation?: CropRecommendation;
   regionalData?: RegionalData;
+  weather?: WeatherData;
 }
 
 export interface GeminiChatResponse {
@@ -219,12 +226,20 @@ Remember: Farmers need quick, actionable advice. Be concise, data-driven, and pr
     try {
       const environmentalData: EnvironmentalData = {};
       
-      // Get soil data with NPK values
-      if (soilType) {
-        const soilData = await this.fetchFromAPI('/soil-types');
-        if (soilData.success && soilData.soil_info) {
-          const soilInfo = soilData.soil_info[soilType];
-          if (soilInfo) {
+      // One /advisory call returns soil info, the regional and the personalized
+      // recommendation (scored together on the server) and the regional weather
+      if (userLocation || soilType) {
+        const advisory = await this.fetchFromAPI('/advisory', {
+          method: 'POST',
+          body: JSON.stringify({
+            state: userLocation,
+            soil_type: soilType || 'Loam'
+          }),
+        });
+
+        if (advisory.success) {
+          const soilInfo = advisory.soil_info as Record<string, string> | undefined;
+          if (soilType && soilInfo) {
             environmentalData.soilData = {
               type: soilType,
               ...soilInfo,
@@ -232,38 +247,19 @@ Remember: Farmers need quick, actionable advice. Be concise, data-driven, and pr
               estimatedNPK: this.estimateNPKFromSoil(soilType)
             };
           }
-        }
-      }
-      
-      // Get regional weather and soil nutrient data
-      if (userLocation) {
-        const regionalData = await this.fetchFromAPI(`/regional-recommendation/${userLocation}`);
-        if (regionalData.success) {
-          environmentalData.regionalData = regionalData as unknown as RegionalData;
-        }
-      }
-      
-      // Get comprehensive crop recommendation with real data
-      if (userLocation || soilType) {
-        const npkData = this.getRegionalNPK(userLocation);
-        const weatherData = this.getRegionalWeather(userLocation);
-        
-        const prediction = await this.fetchFromAPI('/predict', {
-          method: 'POST',
-          body: JSON.stringify({
-            N: npkData.N,
-            P: npkData.P, 
-            K: npkData.K,
-            temperature: weatherData.temperature,
-            humidity: weatherData.humidity,
-            ph: npkData.ph,
-            rainfall: weatherData.rainfall,
-            soil_type: soilType || 'Loam'
-          }),
-        });
-        
-        if (prediction.success) {
-          environmentalData.cropRecommendation = prediction as unknown as CropRecommendation;
+          if (advisory.regional) {
+            environmentalData.regionalData = {
+              success: true,
+              state: advisory.state as string,
+              ...(advisory.regional as Omit<RegionalData, 'success' | 'state'>)
+            };
+          }
+          environmentalData.cropRecommendation = {
+            success: true,
+            ...(advisory.personalized as Omit<CropRecommendation, 'success' | 'soil_info'>),
+            soil_info: soilInfo
+          };
+          environmentalData.weather = advisory.weather as WeatherData;
         }
       }
 
@@ -289,40 +285,6 @@ Remember: Farmers need quick, actionable advice. Be concise, data-driven, and pr
     return soilNPKMap[soilType] || soilNPKMap['Loam'];
   }
 
-  private getRegionalNPK(location?: string): { N: number; P: number; K: number; ph: number } {
-    // Regional soil nutrient profiles based on agricultural data
-    const regionalNPK: Record<string, { N: number; P: number; K: number; ph: number }> = {
-      'Punjab': { N: 90, P: 45, K: 40, ph: 7.2 },
-      'Maharashtra': { N: 60, P: 30, K: 50, ph: 6.8 },
-      'Uttar Pradesh': { N: 75, P: 40, K: 45, ph: 7.0 },
-      'West Bengal': { N: 85, P: 50, K: 55, ph: 6.9 },
-      'Tamil Nadu': { N: 55, P: 35, K: 60, ph: 6.5 },
-      'Karnataka': { N: 65, P: 35, K: 45, ph: 6.7 },
-      'Andhra Pradesh': { N: 70, P: 40, K: 55, ph: 6.8 },
-      'Rajasthan': { N: 45, P: 25, K: 35, ph: 7.5 },
-      'Gujarat': { N: 55, P: 30, K: 40, ph: 7.2 },
-      'Haryana': { N: 85, P: 42, K: 38, ph: 7.3 }
-    };
-    return regionalNPK[location || ''] || { N: 65, P: 35, K: 40, ph: 6.8 };
-  }
-
-  private getRegionalWeather(location?: string): { temperature: number; humidity: number; rainfall: number } {
-    // Regional weather patterns for agricultural planning
-    const regionalWeather: Record<string, { temperature: number; humidity: number; rainfall: number }> = {
-      'Punjab': { temperature: 26, humidity: 65, rainfall: 120 },
-      'Maharashtra': { temperature: 28, humidity: 70, rainfall: 110 },
-      'Uttar Pradesh': { temperature: 27, humidity: 68, rainfall: 100 },
-      'West Bengal': { temperature: 29, humidity: 80, rainfall: 150 },
-      'Tamil Nadu': { temperature: 31, humidity: 75, rainfall: 90 },
-      'Karnataka': { temperature: 25, humidity: 72, rainfall: 130 },
-      'Andhra Pradesh': { temperature: 30, humidity: 73, rainfall: 95 },
-      'Rajasthan': { temperature: 32, humidity: 45, rainfall: 60 },
-      'Gujarat': { temperature: 29, humidity: 60, rainfall: 80 },
-      'Haryana': { temperature: 27, humidity: 62, rainfall: 110 }
-    };
-    return regionalWeather[location || ''] || { temperature: 25, humidity: 70, rainfall: 100 };
-  }
-
   private getCurrentSeason(month: number): string {
     // Indian agricultural seasons
     if (month >= 6 && month <= 9) return 'Kharif (Monsoon)';
@@ -424,7 +386,7 @@ Remember: Farmers need quick, actionable advice. Be concise, data-driven, and pr
         // Add current season and weather context
         const currentMonth = new Date().getMonth() + 1;
         const season = this.getCurrentSeason(currentMonth);
-        const weatherContext = this.getRegionalWeather(location || query.context?.location);
+        const weatherContext = environmentalData.weather || { temperature: 25, humidity: 70, rainfall: 100 };
         
         contextParts.push(`🌡️ CURRENT CONDITIONS:
 - Season: ${season}